@@ -0,0 +1,11 @@
+import streamlit as st
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from modules._98_diagnostics.main import display_content_page
+
+# Display the dashboard
+display_content_page()
@@ -0,0 +1,3 @@
+"""
+Benchmarks and Load Tests for Evaluation App
+"""
@@ -0,0 +1,281 @@
+"""
+Synthetic data generator for the benchmarks and load tests.
+
+Produces realistic `case_studies_v2` documents (classification taxonomy, source URLs
+spread across inputs/company_urls.txt, long `case_study_final` bodies and structured
+summaries) and evaluations with a skewed evaluator activity, at any scale.
+
+    python -m benchmarks.generator --case-studies 10000 --output cache/local_firestore.pkl
+
+The output file can be loaded by the app with EVALHUB_STORAGE=local and EVALHUB_LOCAL_DATA.
+"""
+import argparse
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.local_firestore import MAX_BATCH_WRITES, LocalFirestoreClient
+
+logger = logging.getLogger(__name__)
+
+COMPANY_URLS_FILE = "inputs/company_urls.txt"
+
+SECTION_SEPARATOR = "- - - - - - - - -"
+
+# Classification taxonomy: sector -> industries
+INDUSTRIES = {
+    "Healthcare": ["Hospitals", "Pharmaceuticals", "Medical Devices", "Health Insurance"],
+    "Financial Services": ["Banking", "Insurance", "Asset Management", "Payments"],
+    "Retail": ["E-commerce", "Grocery", "Fashion", "Consumer Electronics"],
+    "Manufacturing": ["Automotive", "Industrial Equipment", "Chemicals", "Aerospace"],
+    "Technology": ["Software", "Telecommunications", "Semiconductors", "IT Services"],
+    "Energy": ["Oil and Gas", "Renewables", "Utilities"],
+    "Public Sector": ["Government", "Education", "Defense"],
+    "Logistics": ["Freight", "Warehousing", "Last-mile Delivery"]
+}
+
+BUSINESS_FUNCTIONS = {
+    "Customer Service": ["Contact Center", "Self-service", "Customer Support Automation"],
+    "Marketing": ["Personalization", "Content Generation", "Campaign Optimization"],
+    "Sales": ["Lead Scoring", "Sales Enablement", "Pricing"],
+    "Operations": ["Supply Chain", "Quality Control", "Predictive Maintenance"],
+    "Finance": ["Fraud Detection", "Forecasting", "Invoice Processing"],
+    "Human Resources": ["Recruiting", "Employee Support", "Learning"],
+    "IT": ["Developer Productivity", "IT Support", "Security Operations"],
+    "Legal": ["Contract Review", "Compliance"]
+}
+
+BUSINESS_IMPACTS = {
+    "Cost Reduction": ["Labor Savings", "Process Automation", "Error Reduction"],
+    "Revenue Growth": ["Conversion Uplift", "New Products", "Customer Retention"],
+    "Customer Experience": ["Response Time", "Satisfaction", "Personalization"],
+    "Risk Management": ["Fraud Losses", "Regulatory Compliance", "Safety"],
+    "Productivity": ["Time Savings", "Throughput", "Decision Speed"]
+}
+
+MATURITY_MODELS = {
+    "Level 1": ["Exploration", "Awareness"],
+    "Level 2": ["Experimentation", "Pilot"],
+    "Level 3": ["Operational", "Deployment"],
+    "Level 4": ["Scaled", "Integration"],
+    "Level 5": ["Transformational", "Optimization"]
+}
+
+IMPROVEMENT_AREAS = [
+    "Accuracy (factual correctness and data reliability)",
+    "Structure (logical organization and clear flow of information)",
+    "Depth (appropriate level of details and thoroughness)",
+    "Writing Style (clear, professional, unbiased, and engaging)",
+    "Tone (voice of business consultant, appropriate for selected audience)",
+    "Other (please specify in your comment)"
+]
+
+SECTION_TITLES = [
+    "Background", "Challenge", "Solution", "Implementation", "Results", "Lessons Learned", "Next Steps"
+]
+
+_VOCABULARY = """
+ai model data platform customer team process workflow automation accuracy latency cost revenue deployment
+pipeline agent assistant retrieval knowledge integration analytics forecast quality compliance security
+operations support service experience insight decision scale cloud infrastructure training evaluation
+feedback prototype pilot rollout adoption metric improvement efficiency reduction growth partner vendor
+enterprise solution language generation classification document search recommendation personalization
+""".split()
+
+def load_company_urls(path: str = COMPANY_URLS_FILE) -> List[str]:
+    """Company URLs used as source URL roots, with a fallback when the file is missing"""
+    try:
+        with open(path, 'r') as f:
+            urls = sorted({line.strip() for line in f if line.strip()})
+        if urls:
+            return urls
+    except OSError:
+        pass
+    return [f"https://company{index}.example.com" for index in range(100)]
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 22))
+        sentences.append(_sentence(rng, length))
+        words -= length
+    return " ".join(sentences)
+
+def _pick(rng: random.Random, taxonomy: Dict[str, List[str]], count: int) -> List[Dict[str, str]]:
+    items = []
+    for _ in range(count):
+        category = rng.choice(list(taxonomy))
+        items.append({'category': category, 'subcategory': rng.choice(taxonomy[category])})
+    return items
+
+def _summary(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'title': _sentence(rng, rng.randint(5, 10)).rstrip("."),
+        'introduction': _paragraph(rng, rng.randint(30, 60)),
+        'sections': [
+            {
+                'section_title': title,
+                'section_introduction': _sentence(rng, rng.randint(10, 20)),
+                'section_content': [_sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(2, 5))]
+            }
+            for title in rng.sample(SECTION_TITLES, rng.randint(3, 5))
+        ]
+    }
+
+def generate_case_study(rng: random.Random, company_urls: List[str], body_words: int = 900) -> Dict[str, Any]:
+    """Generate one case study document"""
+
+    company = rng.choice(company_urls).rstrip("/")
+    sector = rng.choice(list(INDUSTRIES))
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+
+    # Long markdown body with sections separated like the generated case studies
+    sections = []
+    section_words = max(20, body_words // len(SECTION_TITLES))
+    for title in SECTION_TITLES:
+        sections.append(f"## {title}\n\n{_paragraph(rng, section_words)}")
+
+    return {
+        'source_url': f"{company}/customers/{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}",
+        'case_study_final': f"\n\n{SECTION_SEPARATOR}\n\n".join(sections),
+        'case_study_summary': _summary(rng),
+        'case_study_summary_old': _summary(rng),
+        'classification': {
+            'industry': {'category': sector, 'subcategory': rng.choice(INDUSTRIES[sector])},
+            'business_functions': _pick(rng, BUSINESS_FUNCTIONS, rng.randint(1, 3)),
+            'business_impacts': _pick(rng, BUSINESS_IMPACTS, rng.randint(1, 3)),
+            'maturity_models': _pick(rng, MATURITY_MODELS, rng.randint(1, 2))
+        },
+        'created_at': created_at,
+        'updated_at': created_at + timedelta(days=rng.randint(0, 60))
+    }
+
+def generate_case_studies(count: int, seed: int = 0, body_words: int = 900,
+                          company_urls: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (document ID, case study) pairs"""
+
+    rng = random.Random(seed)
+    company_urls = company_urls or load_company_urls()
+    for index in range(count):
+        yield f"cs{index:08d}", generate_case_study(rng, company_urls, body_words)
+
+def evaluator_emails(count: int) -> List[str]:
+    return [f"evaluator{index:03d}@example.com" for index in range(count)]
+
+def generate_evaluations(case_studies: List[Tuple[str, str]], count: int, evaluators: int = 40,
+                         skew: float = 1.2, seed: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (document ID, evaluation) pairs for (case study ID, source URL) pairs.
+    Evaluator activity follows a Zipf-like distribution: a few evaluators submit most evaluations.
+    Each evaluator evaluates a case study at most once.
+    """
+
+    rng = random.Random(seed + 1)
+    emails = evaluator_emails(evaluators)
+    weights = [1 / (rank + 1) ** skew for rank in range(evaluators)]
+    evaluated = set()
+
+    generated = 0
+    attempts = 0
+    while generated < count and attempts < count * 10:
+        attempts += 1
+        email = rng.choices(emails, weights)[0]
+        case_study_id, source_url = rng.choice(case_studies)
+        if (email, case_study_id) in evaluated:
+            continue
+        evaluated.add((email, case_study_id))
+
+        evaluation_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{case_study_id}:{email}"))
+        yield evaluation_id, {
+            'id': evaluation_id,
+            'case_study_id': case_study_id,
+            'case_study_url': source_url,
+            'evaluator_email': email,
+            'evaluation_score': min(10, max(1, round(rng.gauss(6.5, 2)))),
+            'improvement_area': rng.choice(IMPROVEMENT_AREAS),
+            'improvement_feedback': _paragraph(rng, rng.randint(15, 60)),
+            'timestamp': datetime(2025, 3, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+        }
+        generated += 1
+
+def _write(client, collection_name: str, documents: Iterator[Tuple[str, Dict[str, Any]]]) -> int:
+    collection = client.collection(collection_name)
+    batch = client.batch()
+    pending = 0
+    written = 0
+    for document_id, data in documents:
+        batch.set(collection.document(document_id), data)
+        pending += 1
+        if pending == MAX_BATCH_WRITES:
+            batch.commit()
+            written += pending
+            batch = client.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+        written += pending
+    return written
+
+def populate(client, case_studies: int, evaluations_per_case_study: float = 1.0, evaluators: int = 40,
+             body_words: int = 900, seed: int = 0,
+             case_studies_collections: Tuple[str, ...] = ('case_studies_v2',),
+             evaluations_collections: Tuple[str, ...] = ('evaluations_v2', 'evaluations')) -> Dict[str, Any]:
+    """
+    Fill a client with synthetic case studies and evaluations.
+    Returns the generated (case study ID, source URL) pairs and the evaluator emails.
+    """
+
+    references = []
+
+    def _case_studies():
+        for document_id, data in generate_case_studies(case_studies, seed, body_words):
+            references.append((document_id, data['source_url']))
+            yield document_id, data
+
+    # Generate once, write to every case study collection
+    documents = list(_case_studies())
+    for collection_name in case_studies_collections:
+        _write(client, collection_name, iter(documents))
+    del documents
+
+    evaluation_count = int(case_studies * evaluations_per_case_study)
+    evaluations = list(generate_evaluations(references, evaluation_count, evaluators, seed=seed))
+    for collection_name in evaluations_collections:
+        _write(client, collection_name, iter(evaluations))
+
+    logger.info(f"Generated {len(references)} case studies and {len(evaluations)} evaluations")
+    return {'case_studies': references, 'evaluators': evaluator_emails(evaluators), 'evaluations': len(evaluations)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic case studies and evaluations into a local storage file")
+    parser.add_argument("--case-studies", type=int, default=1000)
+    parser.add_argument("--evaluations-per-case-study", type=float, default=1.0)
+    parser.add_argument("--evaluators", type=int, default=40)
+    parser.add_argument("--body-words", type=int, default=900)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="cache/local_firestore.pkl")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = LocalFirestoreClient()
+    populate(
+        client,
+        args.case_studies,
+        args.evaluations_per_case_study,
+        args.evaluators,
+        args.body_words,
+        args.seed,
+        case_studies_collections=('case_studies', 'case_studies_v2', 'case_studies_v3'),
+        evaluations_collections=('evaluations', 'evaluations_v2')
+    )
+    client.save(args.output)
+    logger.info(f"Saved local storage to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Load test harness for the Case Study Evaluation Hub.
+
+Simulates many evaluators using the app at the same time during an evaluation sprint.
+Each simulated session runs in its own thread, like Streamlit sessions on a server, with its
+own evaluation store and case study prefetcher, the objects the page keeps in its session
+state. It repeats the server-side work of the evaluation page reruns against the local
+storage stand-in with injected latency:
+
+- open: first render of the page (full reruns render the first page of the user summary)
+- get_case_study: "Get Case Study to evaluate", which only reruns the evaluation tab
+- submit_evaluation: "Submit Evaluation", which saves in the background, swaps in the
+  next prefetched case study and reruns the whole page
+- team_summary: "Show Results", which only reruns the results of the Team Summary tab
+
+Background saves and prefetches are waited for before the report, so that their Firestore
+operations are counted; the interaction latencies are those the evaluators wait for.
+
+Reports p50/p95/p99 latencies per interaction and the CPU and memory used by the process.
+
+    python -m benchmarks.load_test --sessions 40 --duration 60 --latency-ms 30
+    python -m benchmarks.load_test --sessions 40 --record cache/traces/sprint.jsonl
+    python -m benchmarks.load_test --replay cache/traces/sprint.jsonl --speed 2
+
+A trace is a JSONL file with one interaction per line:
+    {"offset": 12.5, "session": "s003", "user": "evaluator003@example.com", "interaction": "submit_evaluation"}
+where `offset` is the number of seconds since the start of the run.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# The load test always runs against the local storage stand-in
+os.environ["EVALHUB_STORAGE"] = "local"
+
+from benchmarks.generator import evaluator_emails, populate
+from modules._3_case_study_evaluation_2.tabs.tab1_evaluation import IMPROVEMENT_AREAS, generate_evaluation_id
+from utils.evaluation_helpers import (
+    TeamSummaryStats,
+    analyze_improvement_areas_detailed,
+    analyze_user_details,
+    iter_evaluation_batches,
+    join_case_studies,
+    load_case_studies,
+)
+from utils.evaluation_store import EvaluationStore, wait_for_writes
+from utils.firestore_manager import USER_EVALUATIONS_PAGE_SIZE, get_db
+from utils.instrumentation import export_metrics, reset_metrics
+from utils.prefetch import CaseStudyPrefetcher, wait_for_prefetches
+
+logger = logging.getLogger(__name__)
+
+CASE_STUDIES = 'case_studies_v2'
+EVALUATIONS = 'evaluations_v2'
+
+INTERACTIONS = ['open', 'get_case_study', 'submit_evaluation', 'team_summary']
+
+# Interval between two memory samples, in seconds
+MEMORY_SAMPLE_INTERVAL = 0.1
+
+# # # # # # # # # # #
+# Simulated Session
+# # # # # # # # # # #
+
+class Session:
+    """Server-side state of one simulated user session, driven as the page reruns drive it"""
+
+    def __init__(self, session_id: str, user: str):
+        self.session_id = session_id
+        self.user = user
+        self.store = EvaluationStore(user, EVALUATIONS, CASE_STUDIES)
+        self.prefetcher = CaseStudyPrefetcher(user, CASE_STUDIES, EVALUATIONS)
+        self.current_case_study = None
+
+    def _rerun(self):
+        """Work done on every full rerun of the evaluation page: the first page of the user summary"""
+        self.store.page(0, USER_EVALUATIONS_PAGE_SIZE)
+        self.store.count()
+
+    def open(self):
+        self._rerun()
+
+    def get_case_study(self):
+        # None once every case study was evaluated: the session stops
+        self.current_case_study = self.prefetcher.next_case_study()
+
+    def submit_evaluation(self):
+        case_study = self.current_case_study
+        if case_study is None:
+            raise RuntimeError("No case study loaded")
+
+        evaluation = {
+            "id": generate_evaluation_id(case_study.get('id'), self.user),
+            "case_study_id": case_study.get('id'),
+            "case_study_url": case_study.get('source_url'),
+            "evaluator_email": self.user,
+            "evaluation_score": random.randint(1, 10),
+            "improvement_area": random.choice(list(IMPROVEMENT_AREAS.values())),
+            "improvement_feedback": "Load test evaluation",
+            "timestamp": datetime.now()
+        }
+        prefetcher = self.prefetcher
+        prefetcher.evaluated(case_study)
+        self.store.save(
+            evaluation, case_study,
+            on_rollback=lambda evaluation_ids: prefetcher.evaluations_deleted([case_study.id])
+        )
+        self.current_case_study = prefetcher.next_case_study()
+        self._rerun()
+
+    def team_summary(self):
+        # The headline statistics are refined after each batch, as the page displays them
+        stats = TeamSummaryStats()
+        evaluations = []
+        for batch in iter_evaluation_batches(EVALUATIONS):
+            evaluations.extend(batch)
+            stats.add(batch)
+            stats.average_score()
+            stats.filtered_average_score()
+            stats.user_statistics()
+            stats.improvement_areas()
+
+        join_case_studies(evaluations, load_case_studies(CASE_STUDIES))
+        analyze_user_details(evaluations)
+        analyze_improvement_areas_detailed(evaluations)
+        stats.top_scoring()
+        stats.lowest_scoring()
+
+# # # # # # # # # # #
+# Recorder
+# # # # # # # # # # #
+
+class Recorder:
+    """Collects interaction latencies and, optionally, the trace of the run"""
+
+    def __init__(self, trace_path: Optional[str] = None):
+        self.started_at = time.perf_counter()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+        self._trace = None
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+            self._trace = open(trace_path, 'w')
+
+    def run(self, session: Session, interaction: str):
+        offset = time.perf_counter() - self.started_at
+        start = time.perf_counter()
+        failed = False
+        try:
+            getattr(session, interaction)()
+        except Exception as e:
+            failed = True
+            logger.error(f"{session.session_id} {interaction} failed: {str(e)}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.latencies[interaction].append(elapsed_ms)
+            self.errors[interaction] += int(failed)
+            if self._trace:
+                self._trace.write(json.dumps({
+                    'offset': round(offset, 3),
+                    'session': session.session_id,
+                    'user': session.user,
+                    'interaction': interaction
+                }) + "\n")
+
+    def close(self):
+        if self._trace:
+            self._trace.close()
+
+class ResourceMonitor:
+    """Samples the resident memory of the process and measures its CPU time"""
+
+    def __init__(self):
+        self.peak_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    @staticmethod
+    def _rss_mb() -> float:
+        try:
+            with open("/proc/self/statm", 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+        except (OSError, ValueError):
+            # No procfs: fall back to the peak reported by the kernel (kilobytes on Linux)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_rss_mb = max(self.peak_rss_mb, self._rss_mb())
+            self._stop.wait(MEMORY_SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._cpu_start = usage.ru_utime + usage.ru_stime
+        self._wall_start = time.perf_counter()
+        self.start_rss_mb = self._rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.cpu_s = usage.ru_utime + usage.ru_stime - self._cpu_start
+        self.wall_s = time.perf_counter() - self._wall_start
+        self.peak_rss_mb = max(self.peak_rss_mb, self._rss_mb())
+
+# # # # # # # # # # #
+# Workloads
+# # # # # # # # # # #
+
+def _think(rng: random.Random, think_ms: float):
+    if think_ms:
+        time.sleep(rng.expovariate(1000 / think_ms))
+
+def simulate_session(recorder: Recorder, session: Session, deadline: float, think_ms: float,
+                     team_summary_ratio: float, seed: int):
+    """
+    Evaluation sprint: open the page, then get and submit case studies, sometimes checking the Team Summary.
+    A session ends early once its user has no unevaluated company left (one case study is offered per company).
+    """
+
+    rng = random.Random(seed)
+    recorder.run(session, 'open')
+    while time.perf_counter() < deadline:
+        # Submitting swaps in the next case study: the button is only clicked when none is loaded
+        if session.current_case_study is None:
+            _think(rng, think_ms)
+            recorder.run(session, 'get_case_study')
+            if session.current_case_study is None:
+                return
+        # Reading the case study takes longer than the other steps
+        _think(rng, think_ms * 3)
+        recorder.run(session, 'submit_evaluation')
+        if rng.random() < team_summary_ratio:
+            _think(rng, think_ms)
+            recorder.run(session, 'team_summary')
+
+def replay_session(recorder: Recorder, session: Session, events: List[Dict[str, Any]], speed: float):
+    """Replay the recorded interactions of one session at their recorded offsets"""
+
+    for event in events:
+        delay = event['offset'] / speed - (time.perf_counter() - recorder.started_at)
+        if delay > 0:
+            time.sleep(delay)
+        recorder.run(session, event['interaction'])
+
+def load_trace(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Read a trace and group its interactions by session"""
+
+    sessions = defaultdict(list)
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event['interaction'] not in INTERACTIONS:
+                raise ValueError(f"Unknown interaction in trace: {event['interaction']}")
+            sessions[event['session']].append(event)
+    for events in sessions.values():
+        events.sort(key=lambda event: event['offset'])
+    return sessions
+
+# # # # # # # # # # #
+# Report
+# # # # # # # # # # #
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def build_report(recorder: Recorder, monitor: ResourceMonitor) -> Dict[str, Any]:
+    interactions = {}
+    for interaction in INTERACTIONS:
+        latencies = recorder.latencies.get(interaction)
+        if not latencies:
+            continue
+        interactions[interaction] = {
+            'count': len(latencies),
+            'errors': recorder.errors[interaction],
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'max_ms': round(max(latencies), 1),
+            'per_second': round(len(latencies) / monitor.wall_s, 2)
+        }
+
+    metrics = export_metrics()
+    totals = defaultdict(int)
+    for functions in metrics['pages'].values():
+        for stats in functions.values():
+            for operation in ('reads', 'queries', 'writes'):
+                totals[operation] += stats[operation]
+
+    return {
+        'interactions': interactions,
+        'wall_s': round(monitor.wall_s, 1),
+        'cpu_s': round(monitor.cpu_s, 1),
+        'cpu_utilization': round(monitor.cpu_s / monitor.wall_s, 2) if monitor.wall_s else None,
+        'start_rss_mb': round(monitor.start_rss_mb, 1),
+        'peak_rss_mb': round(monitor.peak_rss_mb, 1),
+        'firestore': dict(totals)
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'interaction':<20} {'count':>7} {'errors':>7} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10} {'per s':>7}")
+    for interaction, stats in report['interactions'].items():
+        print(
+            f"{interaction:<20} {stats['count']:>7} {stats['errors']:>7} {stats['p50_ms']:>10} "
+            f"{stats['p95_ms']:>10} {stats['p99_ms']:>10} {stats['max_ms']:>10} {stats['per_second']:>7}"
+        )
+    print(
+        f"\nWall time {report['wall_s']}s, CPU time {report['cpu_s']}s ({report['cpu_utilization']} cores), "
+        f"memory {report['start_rss_mb']} MB -> peak {report['peak_rss_mb']} MB"
+    )
+    print(f"Firestore: {report['firestore']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent evaluators against the local storage stand-in")
+    parser.add_argument("--sessions", type=int, default=20, help="Number of concurrent sessions")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each session keeps evaluating")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which the sessions start")
+    parser.add_argument("--think-ms", type=float, default=500, help="Mean pause between two interactions")
+    parser.add_argument("--team-summary-ratio", type=float, default=0.2, help="Share of submissions followed by a Team Summary")
+    parser.add_argument("--latency-ms", type=float, default=30, help="Latency injected into every Firestore round trip")
+    parser.add_argument("--latency-jitter-ms", type=float, default=10)
+    parser.add_argument("--case-studies", type=int, default=2000)
+    parser.add_argument("--evaluations-per-case-study", type=float, default=1.0)
+    parser.add_argument("--body-words", type=int, default=900)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", default="", help="Write the trace of the run to this JSONL file")
+    parser.add_argument("--replay", default="", help="Replay the interactions of a recorded trace")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor")
+    parser.add_argument("--output", default="", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    db = get_db()
+    db.clear()
+    populate(db, args.case_studies, args.evaluations_per_case_study, body_words=args.body_words, seed=args.seed)
+    db.set_latency(args.latency_ms, args.latency_jitter_ms)
+    reset_metrics()
+
+    recorder = Recorder(args.record or None)
+    threads = []
+    if args.replay:
+        for session_id, events in load_trace(args.replay).items():
+            session = Session(session_id, events[0]['user'])
+            threads.append(threading.Thread(target=replay_session, args=(recorder, session, events, args.speed)))
+    else:
+        users = evaluator_emails(args.sessions)
+        deadline = time.perf_counter() + args.ramp_up + args.duration
+        for index, user in enumerate(users):
+            session = Session(f"s{index:03d}", user)
+            threads.append(threading.Thread(
+                target=simulate_session,
+                args=(recorder, session, deadline, args.think_ms, args.team_summary_ratio, args.seed + index)
+            ))
+
+    with ResourceMonitor() as monitor:
+        recorder.started_at = time.perf_counter()
+        for index, thread in enumerate(threads):
+            if index and not args.replay:
+                time.sleep(args.ramp_up / (len(threads) - 1))
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wait_for_writes()
+        wait_for_prefetches()
+    recorder.close()
+
+    report = build_report(recorder, monitor)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Firestore read budgets for the Case Study Evaluation Hub.
+
+Renders every page and tab with Streamlit's AppTest against the local storage stand-in,
+wrapped by the instrumentation proxy so that each document read, query and write is
+counted, and checks every interaction against an upper bound.
+
+Performance regressions in this app usually show up as extra reads (an N+1 loop, an
+unprojected scan) rather than CPU time, so the budgets are expressed in Firestore
+operations for a fixed synthetic dataset.
+
+    python -m benchmarks.read_budgets
+    python -m benchmarks.read_budgets --only evaluation_2 --verbose
+
+Exits with status 1 when an interaction exceeds its budget or fails to render.
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+# The budgets always run against the local storage stand-in, without injected latency
+os.environ["EVALHUB_STORAGE"] = "local"
+os.environ["EVALHUB_LOCAL_LATENCY_MS"] = "0"
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.generator import populate
+from utils.firestore_manager import USER_EVALUATIONS_PAGE_SIZE, get_db
+from utils.instrumentation import export_metrics, reset_metrics
+from utils.parallel_scan import DEFAULT_PARTITIONS
+from utils.evaluation_store import wait_for_writes
+from utils.prefetch import wait_for_prefetches
+
+logger = logging.getLogger(__name__)
+
+# Synthetic dataset the budgets are calibrated against
+CASE_STUDIES = 300
+EVALUATIONS_PER_CASE_STUDY = 1.0
+EVALUATORS = 40
+BODY_WORDS = 200
+
+# The most active generated evaluator, so the user summaries have rows to delete
+USER_EMAIL = "evaluator000@example.com"
+
+# Seconds allowed for a single script run
+RUN_TIMEOUT = 120
+
+def count_operations() -> Dict[str, int]:
+    """Total Firestore operations recorded since the last reset"""
+
+    totals = {'reads': 0, 'queries': 0, 'writes': 0}
+    for functions in export_metrics()['pages'].values():
+        for stats in functions.values():
+            for operation in totals:
+                totals[operation] += stats[operation]
+    return totals
+
+def _button(at: AppTest, label: str):
+    """Find a button (or form submit button) by its label"""
+
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise LookupError(f"No button labelled '{label}'")
+
+def _start(page: str) -> AppTest:
+    at = AppTest.from_file(page, default_timeout=RUN_TIMEOUT)
+    at.session_state.authenticated = True
+    at.session_state.email = USER_EMAIL
+    return at
+
+# # # # # # # # # # #
+# Scenarios
+# # # # # # # # # # #
+# Each scenario is a list of (interaction, action, budget) steps. The action receives the
+# AppTest (None for the first step, which creates it) and returns it after running a rerun.
+# The budget receives the dataset sizes and returns the maximum reads, queries and writes.
+
+def _render(page: str) -> Callable[[Optional[AppTest]], AppTest]:
+    return lambda at: _start(page).run()
+
+def _reload(page: str) -> Callable[[AppTest], AppTest]:
+    """Render the page in a new session once the shared Streamlit caches are cleared"""
+
+    def run(at: AppTest) -> AppTest:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        return _start(page).run()
+    return run
+
+def _click(label: str) -> Callable[[AppTest], AppTest]:
+    return lambda at: _button(at, label).click().run()
+
+def _settled(action: Callable[[AppTest], AppTest]) -> Callable[[AppTest], AppTest]:
+    """Also wait for the background prefetches and writes, so that they count for this step"""
+
+    def run(at: AppTest) -> AppTest:
+        at = action(at)
+        wait_for_writes(RUN_TIMEOUT)
+        wait_for_prefetches(RUN_TIMEOUT)
+        return at
+    return run
+
+def _submit_evaluation(at: AppTest) -> AppTest:
+    at.text_area(key="current_feedback").input("The results section needs more figures.")
+    return _settled(_click("Submit Evaluation"))(at)
+
+def _delete_first_evaluation(at: AppTest) -> AppTest:
+    for button in at.button:
+        if button.key and button.key.startswith("delete_"):
+            return button.click().run()
+    raise LookupError("No evaluation to delete")
+
+def _select_page_and_click(label: str) -> Callable[[AppTest], AppTest]:
+    """Select every evaluation of the user summary page, then apply a bulk action"""
+
+    def run(at: AppTest) -> AppTest:
+        at = _button(at, "Select all on this page").click().run()
+        return _settled(lambda at: _button(at, label).click().run())(at)
+    return run
+
+def _offers_unevaluated(case_studies_collection: str, evaluations_collection: str,
+                        action: Callable[[AppTest], AppTest]) -> Callable[[AppTest], AppTest]:
+    """Also check that neither the offered nor the prefetched case studies were evaluated by the user"""
+
+    def run(at: AppTest) -> AppTest:
+        at = action(at)
+
+        # Read through the uninstrumented client, so that the check does not count for the step
+        evaluations = get_db()._target.collection(evaluations_collection).where('evaluator_email', '==', USER_EMAIL)
+        evaluated = {snapshot.to_dict().get('case_study_id') for snapshot in evaluations.stream()}
+
+        offered = []
+        if "current_case_study" in at.session_state and at.session_state["current_case_study"] is not None:
+            offered.append(at.session_state["current_case_study"].id)
+        prefetcher_key = f"prefetcher_{case_studies_collection}"
+        if prefetcher_key in at.session_state:
+            offered.extend(case_study.id for case_study in at.session_state[prefetcher_key]._ready)
+
+        already_evaluated = [case_study_id for case_study_id in offered if case_study_id in evaluated]
+        if already_evaluated:
+            raise RuntimeError(f"Offered case studies already evaluated: {', '.join(already_evaluated)}")
+        return at
+    return run
+
+def _full_text_search(at: AppTest) -> AppTest:
+    at.text_input(key="full_text_query").input("customer")
+    for button in at.button:
+        if button.label == "Search" and button.proto.form_id == "full_text_search_form":
+            return button.click().run()
+    raise LookupError("No full-text search button")
+
+def _budget(reads: int, queries: int, writes: int = 0) -> Dict[str, int]:
+    return {'reads': reads, 'queries': queries, 'writes': writes}
+
+# Rendering an evaluation page also renders its user summary, which counts the user's
+# evaluations and reads the first page of them with their case studies. This happens
+# once per session: later reruns read the session's evaluation store, updated on write.
+def _user_summary(data: Dict[str, int]) -> int:
+    return 2 * min(data['user_evaluations'], USER_EVALUATIONS_PAGE_SIZE) + 10
+
+# Selecting case studies reads the user's evaluations and the case studies. Submitting an
+# evaluation swaps in a prefetched case study and selects its replacement in the background;
+# the saved evaluation is read back once to reconcile the store
+def _prefetch(data: Dict[str, int]) -> int:
+    return data['case_studies'] + data['user_evaluations']
+
+# Deleting an evaluation replaces its row without a second rerun and without reading the
+# other evaluations again. AppTest runs the whole script on every interaction; in the
+# browser only the row's fragment reruns.
+
+# Bulk actions update the store once and write the selection in batches of up to 500
+# writes, one per evaluation, without reading the evaluations again; deleting a whole page
+# then loads the next one
+def _page_writes(data: Dict[str, int]) -> int:
+    return min(data['user_evaluations'], USER_EVALUATIONS_PAGE_SIZE)
+
+# The team summary scans both collections, one query per partition
+_TEAM_SUMMARY_QUERIES = 2 * DEFAULT_PARTITIONS + 4
+
+SCENARIOS: Dict[str, List[tuple]] = {
+    'dashboard': [
+        ('render', _render("_1_Dashboard.py"), lambda data: _budget(data['case_studies'] + 10, 2)),
+        # The persisted cube only reads the case studies updated since it was built
+        ('reload', _reload("_1_Dashboard.py"), lambda data: _budget(10, 2)),
+    ],
+    'evaluation_1': [
+        ('render', _render("_2_Case_Study_Evaluation (1).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('get case study', _offers_unevaluated("case_studies", "evaluations", _settled(_click("Get Case Study to evaluate"))),
+         lambda data: _budget(_prefetch(data) + 10, 6)),
+        ('submit evaluation', _offers_unevaluated("case_studies", "evaluations", _submit_evaluation), lambda data: _budget(_prefetch(data) + 10, 4, 1)),
+        ('team summary', _click("Show Results"), lambda data: _budget(data['case_studies'] + data['evaluations'] + 10, _TEAM_SUMMARY_QUERIES)),
+    ],
+    'evaluation_1_delete': [
+        ('render', _render("_2_Case_Study_Evaluation (1).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('delete evaluation', _settled(_delete_first_evaluation), lambda data: _budget(10, 2, 1)),
+    ],
+    'evaluation_2': [
+        ('render', _render("_3_Case_Study_Evaluation (2).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('get case study', _offers_unevaluated("case_studies_v2", "evaluations_v2", _settled(_click("Get Case Study to evaluate"))),
+         lambda data: _budget(_prefetch(data) + 10, 6)),
+        ('submit evaluation', _offers_unevaluated("case_studies_v2", "evaluations_v2", _settled(_click("Submit Evaluation"))), lambda data: _budget(_prefetch(data) + 10, 4, 1)),
+        ('team summary', _click("Show Results"), lambda data: _budget(data['case_studies'] + data['evaluations'] + 10, _TEAM_SUMMARY_QUERIES)),
+    ],
+    'evaluation_2_delete': [
+        ('render', _render("_3_Case_Study_Evaluation (2).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('delete evaluation', _settled(_delete_first_evaluation), lambda data: _budget(10, 2, 1)),
+    ],
+    'user_summary_2': [
+        ('render', _render("_3_Case_Study_Evaluation (2).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('next page', _click("Next"), lambda data: _budget(_user_summary(data), 2)),
+        ('previous page', _click("Previous"), lambda data: _budget(10, 2)),
+    ],
+    'bulk_actions_2': [
+        ('render', _render("_3_Case_Study_Evaluation (2).py"), lambda data: _budget(_user_summary(data), 2)),
+        ('change area', _select_page_and_click("Change improvement area"), lambda data: _budget(10, 2, _page_writes(data))),
+        ('delete selected', _select_page_and_click(f"Delete {USER_EVALUATIONS_PAGE_SIZE} selected"),
+         lambda data: _budget(_user_summary(data), 2, _page_writes(data))),
+    ],
+    'writing_comparison': [
+        ('render', _render("_4_Writing_Comparison.py"), lambda data: _budget(data['case_studies'] + 10, 1)),
+    ],
+    'multi_sources': [
+        # Prefix query on one company: a full scan would read every case study
+        ('render', _render("_5_Multi_Sources_Addition.py"), lambda data: _budget(data['case_studies'] // 10, 1)),
+    ],
+    'case_studies_library': [
+        ('render', _render("_99_Case_Studies_Library.py"), lambda data: _budget(10, 1)),
+        # The first search builds the search index over case_studies_v2 and case_studies_v3
+        ('full-text search', _full_text_search, lambda data: _budget(2 * data['case_studies'] + 10, 2)),
+    ],
+}
+
+def populate_dataset() -> Dict[str, int]:
+    """Reset the local storage to the calibrated dataset and return its sizes"""
+
+    db = get_db()
+    db.clear()
+    generated = populate(
+        db,
+        CASE_STUDIES,
+        EVALUATIONS_PER_CASE_STUDY,
+        EVALUATORS,
+        BODY_WORDS,
+        case_studies_collections=('case_studies', 'case_studies_v2', 'case_studies_v3'),
+        evaluations_collections=('evaluations', 'evaluations_v2')
+    )
+
+    user_evaluations = db.collection('evaluations_v2').where('evaluator_email', '==', USER_EMAIL).count().get()
+    return {
+        'case_studies': len(generated['case_studies']),
+        'evaluations': generated['evaluations'],
+        'user_evaluations': user_evaluations[0][0].value
+    }
+
+def run_scenario(name: str, steps: List[tuple]) -> List[Dict[str, Any]]:
+    """Run the steps of a scenario from a cold cache and return one result per interaction"""
+
+    # Every scenario starts from the same data and empty Streamlit caches
+    data = populate_dataset()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    results = []
+    at = None
+    for interaction, action, limits in steps:
+        reset_metrics()
+        error = None
+        try:
+            at = action(at)
+            if at.exception:
+                error = "; ".join(exception.message for exception in at.exception)
+        except Exception as e:
+            error = str(e)
+
+        counts = count_operations()
+        budget = limits(data)
+        exceeded = {operation: counts[operation] for operation in budget if counts[operation] > budget[operation]}
+        results.append({
+            'scenario': name,
+            'interaction': interaction,
+            'counts': counts,
+            'budget': budget,
+            'exceeded': exceeded,
+            'error': error
+        })
+
+        # The remaining steps depend on this one
+        if error:
+            break
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Firestore operations per interaction against their budgets")
+    parser.add_argument("--only", default="", help="Comma-separated scenario names to run")
+    parser.add_argument("--verbose", action="store_true", help="Show the application logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    selected = {name for name in args.only.split(",") if name}
+
+    results = []
+    for name, steps in SCENARIOS.items():
+        if selected and name not in selected:
+            continue
+        results.extend(run_scenario(name, steps))
+
+    print(f"{'scenario':<22} {'interaction':<20} {'reads':>13} {'queries':>9} {'writes':>8}  status")
+    failed = False
+    for result in results:
+        counts, budget = result['counts'], result['budget']
+        status = "ok"
+        if result['error']:
+            status = f"error: {result['error']}"
+        elif result['exceeded']:
+            status = "over budget: " + ", ".join(result['exceeded'])
+        failed = failed or status != "ok"
+        print(
+            f"{result['scenario']:<22} {result['interaction']:<20} "
+            f"{counts['reads']:>6}/{budget['reads']:<6} {counts['queries']:>4}/{budget['queries']:<4} "
+            f"{counts['writes']:>3}/{budget['writes']:<4}  {status}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark suite for the Case Study Evaluation Hub.
+
+Times the data-access and analysis functions against the local storage stand-in filled
+with synthetic data, at one or more scales, and compares the results with a stored baseline.
+
+    python -m benchmarks.run_benchmarks --sizes 1000,10000
+    python -m benchmarks.run_benchmarks --sizes 1000,10000 --save-baseline
+    python -m benchmarks.run_benchmarks --sizes 1000000 --body-words 200 --repeat 1
+
+Exits with status 1 when a benchmark is slower than its baseline by more than the tolerance.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+# The benchmarks always run against the local storage stand-in
+os.environ["EVALHUB_STORAGE"] = "local"
+
+from benchmarks.generator import populate
+from modules._1_dashboard.utils import get_case_studies_stats
+from modules._4_writing_comparison.utils import format_case_study_summary
+from utils.evaluation_helpers import (
+    analyze_improvement_areas,
+    analyze_improvement_areas_detailed,
+    analyze_lowest_scoring_evaluations,
+    analyze_top_scoring_evaluations,
+    analyze_user_details,
+    calculate_average_score,
+    calculate_user_statistics,
+    get_all_evaluations,
+)
+from utils.firestore_manager import get_db, get_unevaluated_case_study
+from utils.instrumentation import export_metrics, reset_metrics
+from utils.url_helper import URLHelper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+CASE_STUDIES = 'case_studies_v2'
+EVALUATIONS = 'evaluations_v2'
+
+def _prepare(context):
+    """Load the data that the pure functions receive as input"""
+    context['evaluations'] = get_all_evaluations(EVALUATIONS, CASE_STUDIES)
+    context['summaries'] = [
+        doc.to_dict().get('case_study_summary')
+        for doc in get_db().collection(CASE_STUDIES).select(['case_study_summary']).stream()
+    ]
+    context['urls'] = [source_url for _, source_url in context['generated']['case_studies']]
+    # The most active evaluator has the most evaluations to exclude
+    context['heavy_evaluator'] = context['generated']['evaluators'][0]
+
+BENCHMARKS = [
+    ('get_case_studies_stats', lambda context: get_case_studies_stats()),
+    ('get_all_evaluations', lambda context: get_all_evaluations(EVALUATIONS, CASE_STUDIES)),
+    ('calculate_average_score', lambda context: calculate_average_score(context['evaluations'])),
+    ('calculate_user_statistics', lambda context: calculate_user_statistics(context['evaluations'])),
+    ('analyze_top_scoring_evaluations', lambda context: analyze_top_scoring_evaluations(context['evaluations'])),
+    ('analyze_lowest_scoring_evaluations', lambda context: analyze_lowest_scoring_evaluations(context['evaluations'])),
+    ('analyze_improvement_areas', lambda context: analyze_improvement_areas(context['evaluations'])),
+    ('analyze_improvement_areas_detailed', lambda context: analyze_improvement_areas_detailed(context['evaluations'])),
+    ('analyze_user_details', lambda context: analyze_user_details(context['evaluations'])),
+    ('get_unevaluated_case_study', lambda context: get_unevaluated_case_study(context['heavy_evaluator'], CASE_STUDIES, EVALUATIONS)),
+    ('format_case_study_summary', lambda context: [format_case_study_summary(summary) for summary in context['summaries']]),
+    ('URLHelper.clean_url', lambda context: [URLHelper.clean_url(url) for url in context['urls']]),
+]
+
+def _reads() -> int:
+    """Total document reads recorded since the last reset"""
+    return sum(
+        stats['reads']
+        for functions in export_metrics()['pages'].values()
+        for stats in functions.values()
+    )
+
+def run_size(size: int, repeat: int, evaluations_per_case_study: float, body_words: int, selected=None) -> dict:
+    """Populate the local storage with `size` case studies and time every benchmark"""
+
+    db = get_db()
+    db.clear()
+
+    start = time.perf_counter()
+    generated = populate(db, size, evaluations_per_case_study, body_words=body_words)
+    logger.info(f"Generated {size} case studies in {time.perf_counter() - start:.1f}s")
+
+    context = {'generated': generated}
+    _prepare(context)
+
+    results = {}
+    for name, benchmark in BENCHMARKS:
+        if selected and name not in selected:
+            continue
+
+        timings = []
+        reads = 0
+        for _ in range(repeat):
+            reset_metrics()
+            start = time.perf_counter()
+            benchmark(context)
+            timings.append(time.perf_counter() - start)
+            reads = _reads()
+
+        results[name] = {
+            'median_s': statistics.median(timings),
+            'min_s': min(timings),
+            'reads': reads
+        }
+        logger.info(f"[{size}] {name}: {results[name]['median_s'] * 1000:.1f} ms, {reads} reads")
+
+    db.clear()
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the benchmarks slower than their baseline by more than the tolerance"""
+
+    regressions = []
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            reference = baseline.get(size, {}).get(name)
+            if not reference:
+                continue
+            ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else 1.0
+            result['baseline_ratio'] = round(ratio, 2)
+            if ratio > 1 + tolerance or result['reads'] > reference.get('reads', result['reads']):
+                regressions.append((size, name, ratio, result['reads'], reference.get('reads')))
+    return regressions
+
+def print_report(results: dict):
+    print(f"{'size':>9}  {'benchmark':<38} {'median (ms)':>12} {'min (ms)':>10} {'reads':>9} {'vs base':>8}")
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            ratio = result.get('baseline_ratio')
+            print(
+                f"{size:>9}  {name:<38} {result['median_s'] * 1000:>12.1f} {result['min_s'] * 1000:>10.1f} "
+                f"{result['reads']:>9} {(f'{ratio:.2f}x' if ratio else '-'):>8}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against synthetic data")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated numbers of case studies (e.g. 1000,10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--evaluations-per-case-study", type=float, default=1.0)
+    parser.add_argument("--body-words", type=int, default=900, help="Length of the generated case study bodies")
+    parser.add_argument("--only", default="", help="Comma-separated benchmark names to run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown relative to the baseline")
+    parser.add_argument("--output", default="", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    selected = {name for name in args.only.split(",") if name}
+
+    results = {}
+    for size in [int(size) for size in args.sizes.split(",") if size]:
+        results[str(size)] = run_size(size, args.repeat, args.evaluations_per_case_study, args.body_words, selected)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print("\nRegressions:")
+        for size, name, ratio, reads, baseline_reads in regressions:
+            print(f"  [{size}] {name}: {ratio:.2f}x baseline time, {reads} reads (baseline {baseline_reads})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,11 @@ This webapp manages the Evaluation Hub web application, which serves the followi
 
 import streamlit as st
 import logging
+import uuid
 
-from utils.auth import check_authentication
+from utils.auth import check_authentication, is_admin
+from utils.instrumentation import begin_rerun, end_rerun
+from utils.profiling import PAGE_STATE_KEY, profile_rerun
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,12 +34,30 @@ authenticated = check_authentication()
 # TODO: Add a page to display the current version of the app
 if authenticated:
 
-    pg = st.navigation([
+    pages = [
         st.Page("_1_Dashboard.py"), 
         st.Page("_2_Case_Study_Evaluation (1).py"), 
         st.Page("_3_Case_Study_Evaluation (2).py"), 
         st.Page("_4_Writing_Comparison.py"), 
         st.Page("_5_Multi_Sources_Addition.py"), 
         st.Page("_99_Case_Studies_Library.py"), 
-        ])
-    pg.run()
\ No newline at end of file
+        ]
+
+    # Diagnostics are only visible to administrators
+    if is_admin(st.session_state.email):
+        pages.append(st.Page("_98_Diagnostics.py"))
+
+    pg = st.navigation(pages)
+
+    # Attribute Firestore reads and latencies to this page rerun
+    if 'instrumentation_session_id' not in st.session_state:
+        st.session_state.instrumentation_session_id = uuid.uuid4().hex[:12]
+    # Fragment reruns do not go through here: they find the page in the session state
+    st.session_state[PAGE_STATE_KEY] = pg.title
+    begin_rerun(pg.title, st.session_state.instrumentation_session_id, st.session_state.email)
+    try:
+        # Profile the rerun when enabled with ?profile=... or EVALHUB_PROFILE
+        with profile_rerun(pg.title):
+            pg.run()
+    finally:
+        end_rerun()
\ No newline at end of file
@@ -0,0 +1,341 @@
+"""
+Classification cube for the Dashboard.
+
+Materializes case study counts across company, sector, industry, business function,
+business impact and maturity model at chosen granularities, stored as Parquet files.
+The cube keeps one compact fact row per (case study, facet, value) and a fingerprint
+per case study, so only changed documents are re-extracted and the rollups are updated
+with the difference between their old and new facts.
+
+The cube also records the latest `updated_at` it has read. An incremental update only
+reads the case studies updated since then, then compares the collection count with the
+cube total; when they differ (deleted case studies, documents without `updated_at`), it
+falls back to a full update, which streams the whole collection.
+
+Run the module directly to update the cube and write a rollup snapshot:
+
+    python -m modules._1_dashboard.cube
+    python -m modules._1_dashboard.cube --full
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import pandas as pd
+
+from modules._1_dashboard.facets import FACETS, extract_facet_values
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where the cube is persisted
+CUBE_DIR = "cache/classification_cube"
+
+# Dimensions of the cube, in Dashboard order
+DIMENSIONS = list(FACETS)
+
+# Granularities materialized by default: the total, every single dimension and the common pairs
+DEFAULT_GRANULARITIES = [()] + [(dimension,) for dimension in DIMENSIONS] + [
+    ('sector', 'business_function'),
+    ('sector', 'business_impact'),
+    ('sector', 'maturity_model'),
+    ('business_function', 'business_impact'),
+    ('company', 'sector')
+]
+
+# Fields needed to extract the facet values of a case study
+CUBE_FIELDS = ['source_url', 'classification']
+
+# Field holding the last update of a case study, read to advance the watermark
+UPDATED_AT_FIELD = 'updated_at'
+
+_FACT_COLUMNS = ['doc_id', 'facet', 'value']
+
+def _empty_facts() -> pd.DataFrame:
+    return pd.DataFrame({column: pd.Series(dtype=str) for column in _FACT_COLUMNS})
+
+def _rollup_name(granularity: Tuple[str, ...]) -> str:
+    return "rollup__" + ("__".join(granularity) if granularity else "total")
+
+def document_fingerprint(data: Dict[str, Any], update_time: Any = None) -> str:
+    """Fingerprint of a case study: its update time when known, else a hash of the cube fields"""
+    if update_time is not None:
+        return str(update_time)
+    payload = json.dumps({field: data.get(field) for field in CUBE_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class ClassificationCube:
+    """Materialized counts of case studies across the classification dimensions"""
+
+    def __init__(self, directory: str = CUBE_DIR, granularities: Optional[List[Tuple[str, ...]]] = None):
+        self.directory = directory
+        self.granularities = [tuple(granularity) for granularity in (granularities or DEFAULT_GRANULARITIES)]
+        self.facts = _empty_facts()
+        self.fingerprints = {}
+        self.rollups = {granularity: self._empty_rollup(granularity) for granularity in self.granularities}
+        # Latest updated_at read from the collection; None until the cube is first built
+        self.last_built = None
+
+    @staticmethod
+    def _empty_rollup(granularity: Tuple[str, ...]) -> pd.DataFrame:
+        columns = {dimension: pd.Series(dtype=str) for dimension in granularity}
+        columns['count'] = pd.Series(dtype='int64')
+        return pd.DataFrame(columns)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    # # # # # # # # # # #
+    # Aggregation
+    # # # # # # # # # # #
+
+    @staticmethod
+    def _combinations(facts: pd.DataFrame, granularity: Tuple[str, ...]) -> pd.DataFrame:
+        """Count the documents of each combination of values of the granularity dimensions"""
+
+        combined = None
+        for dimension in granularity:
+            values = facts.loc[facts['facet'] == dimension, ['doc_id', 'value']]\
+                .drop_duplicates()\
+                .rename(columns={'value': dimension})
+            combined = values if combined is None else combined.merge(values, on='doc_id')
+
+        if combined is None or combined.empty:
+            return ClassificationCube._empty_rollup(granularity)
+
+        return combined.groupby(list(granularity), observed=True).size().reset_index(name='count')
+
+    def _update_rollup(self, granularity: Tuple[str, ...], added: pd.DataFrame, removed: pd.DataFrame):
+        """Add the combinations of the new facts and subtract those of the replaced facts"""
+
+        additions = self._combinations(added, granularity)
+        removals = self._combinations(removed, granularity)
+        if additions.empty and removals.empty:
+            return
+
+        removals['count'] = -removals['count']
+        rollup = pd.concat([self.rollups[granularity], additions, removals], ignore_index=True)
+        rollup = rollup.groupby(list(granularity), observed=True)['count'].sum().reset_index()
+        self.rollups[granularity] = rollup[rollup['count'] > 0].reset_index(drop=True)
+
+    def apply_changes(self, changed: Dict[str, Tuple[str, Dict[str, List[str]]]], deleted: Iterable[str] = ()):
+        """
+        Apply changed and deleted documents to the facts and rollups.
+        changed maps a document ID to its fingerprint and facet values.
+        """
+
+        deleted = set(deleted)
+        replaced_ids = set(changed) | deleted
+        if not replaced_ids:
+            return
+
+        replaced_mask = self.facts['doc_id'].isin(replaced_ids)
+        removed = self.facts[replaced_mask]
+        added = pd.DataFrame(
+            [
+                (doc_id, facet, value)
+                for doc_id, (_, facet_values) in changed.items()
+                for facet, values in facet_values.items()
+                for value in values
+            ],
+            columns=_FACT_COLUMNS
+        )
+
+        for granularity in self.granularities:
+            if granularity:
+                self._update_rollup(granularity, added, removed)
+
+        self.facts = pd.concat([self.facts[~replaced_mask], added], ignore_index=True)
+        for doc_id in deleted:
+            self.fingerprints.pop(doc_id, None)
+        for doc_id, (fingerprint, _) in changed.items():
+            self.fingerprints[doc_id] = fingerprint
+
+        if () in self.rollups:
+            self.rollups[()] = pd.DataFrame({'count': [len(self.fingerprints)]})
+
+    def update_from_documents(self, documents: Iterable[Tuple[str, str, Dict[str, Any]]], complete: bool = True) -> Dict[str, int]:
+        """
+        Bring the cube up to date with a stream of (document ID, fingerprint, data).
+        Only documents whose fingerprint changed are re-extracted. When the stream is complete,
+        documents missing from it are deleted; an incremental stream only adds and updates documents.
+        """
+
+        changed = {}
+        seen = set()
+        for doc_id, fingerprint, data in documents:
+            seen.add(doc_id)
+            if self.fingerprints.get(doc_id) == fingerprint:
+                continue
+            changed[doc_id] = (fingerprint, extract_facet_values(data))
+
+        deleted = set(self.fingerprints) - seen if complete else set()
+        self.apply_changes(changed, deleted)
+
+        stats = {'changed': len(changed), 'deleted': len(deleted), 'total': len(self.fingerprints)}
+        logger.info(f"Classification cube updated: {stats}")
+        return stats
+
+    # # # # # # # # # # #
+    # Queries
+    # # # # # # # # # # #
+
+    def slice(self, granularity: Tuple[str, ...], filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        """
+        Return the rollup of a materialized granularity, optionally restricted to some dimension values.
+        Raises KeyError if the granularity is not materialized.
+        """
+
+        rollup = self.rollups[tuple(granularity)]
+        for dimension, values in (filters or {}).items():
+            if values:
+                rollup = rollup[rollup[dimension].isin(values)]
+        return rollup
+
+    def distribution(self, dimension: str) -> Dict[str, int]:
+        """Counts of case studies per value of a single dimension"""
+        rollup = self.slice((dimension,))
+        return dict(zip(rollup[dimension].tolist(), rollup['count'].tolist()))
+
+    def total(self) -> int:
+        return len(self.fingerprints)
+
+    def facet_rows(self) -> Iterator[Dict[str, List[str]]]:
+        """Yield the facet values of every case study, to build a facet index without reading documents"""
+
+        grouped = {}
+        for doc_id, facet, value in self.facts.itertuples(index=False, name=None):
+            grouped.setdefault(doc_id, {}).setdefault(facet, []).append(value)
+
+        for doc_id in self.fingerprints:
+            yield grouped.get(doc_id, {})
+
+    # # # # # # # # # # #
+    # Storage
+    # # # # # # # # # # #
+
+    def save(self, snapshot: bool = False):
+        """
+        Write the facts, fingerprints and rollups as Parquet files.
+        With snapshot=True, the rollups are also copied to a timestamped snapshot directory.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        facts = self.facts.astype({'facet': 'category', 'value': 'category'})
+        facts.to_parquet(os.path.join(self.directory, "facts.parquet"), index=False)
+
+        documents = pd.DataFrame({
+            'doc_id': list(self.fingerprints.keys()),
+            'fingerprint': list(self.fingerprints.values())
+        })
+        documents.to_parquet(os.path.join(self.directory, "documents.parquet"), index=False)
+
+        for granularity, rollup in self.rollups.items():
+            rollup.to_parquet(os.path.join(self.directory, f"{_rollup_name(granularity)}.parquet"), index=False)
+
+        with open(os.path.join(self.directory, "state.json"), 'w') as f:
+            json.dump({'last_built': self.last_built.isoformat() if self.last_built else None}, f)
+
+        if snapshot:
+            snapshot_dir = os.path.join(self.directory, "snapshots", datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ'))
+            os.makedirs(snapshot_dir, exist_ok=True)
+            for granularity in self.rollups:
+                name = f"{_rollup_name(granularity)}.parquet"
+                shutil.copyfile(os.path.join(self.directory, name), os.path.join(snapshot_dir, name))
+
+    @classmethod
+    def load(cls, directory: str = CUBE_DIR, granularities: Optional[List[Tuple[str, ...]]] = None) -> "ClassificationCube":
+        """Load a persisted cube, or return an empty cube if none can be read"""
+
+        cube = cls(directory, granularities)
+        facts_path = os.path.join(directory, "facts.parquet")
+        documents_path = os.path.join(directory, "documents.parquet")
+        if not (os.path.exists(facts_path) and os.path.exists(documents_path)):
+            return cube
+
+        try:
+            cube.facts = pd.read_parquet(facts_path).astype(str)
+            documents = pd.read_parquet(documents_path)
+            cube.fingerprints = dict(zip(documents['doc_id'].tolist(), documents['fingerprint'].tolist()))
+
+            # Without a watermark (e.g. a cube saved by an older version) the next update is a full one
+            state_path = os.path.join(directory, "state.json")
+            if os.path.exists(state_path):
+                with open(state_path, 'r') as f:
+                    last_built = json.load(f).get('last_built')
+                cube.last_built = datetime.fromisoformat(last_built) if last_built else None
+
+            for granularity in cube.granularities:
+                path = os.path.join(directory, f"{_rollup_name(granularity)}.parquet")
+                if os.path.exists(path):
+                    cube.rollups[granularity] = pd.read_parquet(path)
+                elif granularity:
+                    # Materialize granularities added since the cube was saved
+                    cube.rollups[granularity] = cls._combinations(cube.facts, granularity)
+                else:
+                    cube.rollups[granularity] = pd.DataFrame({'count': [len(cube.fingerprints)]})
+
+        except Exception as e:
+            logger.error(f"Error loading classification cube from {directory}: {str(e)}")
+            return cls(directory, granularities)
+
+        return cube
+
+def _collection_count(db, collection_name: str) -> int:
+    """Number of documents of a collection, counted with an aggregation query"""
+    return db.collection(collection_name).count().get()[0][0].value
+
+def update_cube_from_collection(cube: ClassificationCube, db, collection_name: str = 'case_studies_v2', full: bool = False) -> Dict[str, int]:
+    """
+    Stream the classification fields of a collection into the cube.
+    Once the cube has a watermark, only the case studies updated since then are read, unless full=True.
+    An incremental update that leaves the cube total different from the collection count is followed by a full one.
+    """
+
+    incremental = cube.last_built is not None and not full
+    query = db.collection(collection_name)
+    if incremental:
+        # Documents updated at the watermark itself are read again; their fingerprint skips them
+        query = query.where(UPDATED_AT_FIELD, '>=', cube.last_built)
+    last_built = cube.last_built
+
+    def _documents():
+        nonlocal last_built
+        for doc in query.select(CUBE_FIELDS + [UPDATED_AT_FIELD]).stream():
+            data = doc.to_dict() or {}
+            updated_at = data.get(UPDATED_AT_FIELD)
+            if isinstance(updated_at, datetime) and (last_built is None or updated_at > last_built):
+                last_built = updated_at
+            yield doc.id, document_fingerprint(data, getattr(doc, 'update_time', None)), data
+
+    stats = cube.update_from_documents(_documents(), complete=not incremental)
+    cube.last_built = last_built
+
+    if incremental:
+        count = _collection_count(db, collection_name)
+        if count != cube.total():
+            logger.info(f"Classification cube has {cube.total()} case studies, {collection_name} has {count}: full update")
+            return update_cube_from_collection(cube, db, collection_name, full=True)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the classification cube and write a rollup snapshot")
+    parser.add_argument("--collection", default='case_studies_v2')
+    parser.add_argument("--full", action="store_true", help="Read the whole collection, also removing deleted case studies")
+    args = parser.parse_args()
+
+    from utils.firestore_manager import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    cube = ClassificationCube.load()
+    update_cube_from_collection(cube, get_db(), args.collection, args.full)
+    cube.save(snapshot=True)
+
+if __name__ == "__main__":
+    main()
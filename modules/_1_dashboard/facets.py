@@ -0,0 +1,200 @@
+"""
+Faceted filtering over the case study classification taxonomy.
+
+Each facet value is stored as a NumPy boolean bitmap over the case studies, so any
+combination of selected values can be intersected and every distribution recounted
+in memory, without going back to Firestore.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+import numpy as np
+
+from utils.url_helper import URLHelper
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of per-value bitmaps kept in memory
+MAX_CACHED_BITMAPS = 256
+
+# Facet keys and their display labels, in Dashboard order
+FACETS = {
+    'company': 'Company',
+    'sector': 'Sector',
+    'industry': 'Industry',
+    'business_function': 'Business Function',
+    'business_impact': 'Business Impact',
+    'maturity_model': 'Maturity Model'
+}
+
+def extract_facet_values(case: Dict[str, Any]) -> Dict[str, List[str]]:
+    """
+    Extract the facet values of a case study.
+    Labels follow the same format as the Dashboard distributions.
+    """
+
+    values = {facet: [] for facet in FACETS}
+    if not isinstance(case, dict):
+        return values
+
+    url = case.get('source_url')
+    if isinstance(url, str) and url:
+        clean_url = URLHelper.clean_url(url)
+        if clean_url:
+            values['company'].append(clean_url)
+
+    classification = case.get('classification')
+    if not isinstance(classification, dict):
+        return values
+
+    industry = classification.get('industry')
+    if isinstance(industry, dict):
+        sector = industry.get('category')
+        subcategory = industry.get('subcategory')
+        if sector:
+            values['sector'].append(sector)
+        if sector and subcategory:
+            values['industry'].append(f"{subcategory} ({sector})")
+
+    for facet, field in (('business_function', 'business_functions'), ('business_impact', 'business_impacts')):
+        items = classification.get(field, [])
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            category = item.get('category')
+            subcategory = item.get('subcategory')
+            if category and subcategory:
+                values[facet].append(f"{subcategory} ({category})")
+
+    models = classification.get('maturity_models', [])
+    if isinstance(models, list):
+        for model in models:
+            if not isinstance(model, dict):
+                continue
+            level = model.get('level')
+            category = model.get('category')
+            subcategory = model.get('subcategory')
+            if level and category and subcategory:
+                values['maturity_model'].append(f"{subcategory} ({level} - {category})")
+
+    return values
+
+class FacetIndex:
+    """
+    Per-facet-value bitmap index over a set of case studies.
+    Within a facet, selected values are combined with OR; across facets, with AND.
+    """
+
+    def __init__(self, facet_rows: Iterable[Dict[str, List[str]]], known_values: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Build the index from one row of facet values per case study.
+        known_values lists values that must appear even with no case study (e.g. configured companies).
+        """
+
+        self.values = {facet: [] for facet in FACETS}
+        self.rows = {facet: {} for facet in FACETS}
+        for facet, facet_values in (known_values or {}).items():
+            for value in facet_values:
+                self._value_row(facet, value)
+
+        # (case study, value) pairs per facet; a case study counts once per value
+        documents = {facet: [] for facet in FACETS}
+        value_rows = {facet: [] for facet in FACETS}
+
+        size = 0
+        for row in facet_rows:
+            for facet, facet_values in row.items():
+                for value_row in {self._value_row(facet, value) for value in facet_values}:
+                    documents[facet].append(size)
+                    value_rows[facet].append(value_row)
+            size += 1
+
+        self.size = size
+        self.documents = {facet: np.asarray(documents[facet], dtype=np.int64) for facet in FACETS}
+        self.value_rows = {facet: np.asarray(value_rows[facet], dtype=np.int64) for facet in FACETS}
+        self.totals = {
+            facet: dict(zip(self.values[facet], self._count_rows(facet, self.value_rows[facet]).tolist()))
+            for facet in FACETS
+        }
+        self._bitmaps = {}
+
+    def _value_row(self, facet: str, value: str) -> int:
+        rows = self.rows[facet]
+        if value not in rows:
+            rows[value] = len(self.values[facet])
+            self.values[facet].append(value)
+        return rows[value]
+
+    def _count_rows(self, facet: str, value_rows: np.ndarray) -> np.ndarray:
+        return np.bincount(value_rows, minlength=len(self.values[facet]))
+
+    def bitmap(self, facet: str, value: str) -> np.ndarray:
+        """Boolean bitmap of the case studies having a facet value, built on first use"""
+
+        key = (facet, value)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            bitmap = np.zeros(self.size, dtype=bool)
+            row = self.rows[facet].get(value)
+            if row is not None:
+                bitmap[self.documents[facet][self.value_rows[facet] == row]] = True
+            if len(self._bitmaps) >= MAX_CACHED_BITMAPS:
+                self._bitmaps.clear()
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def _facet_mask(self, facet: str, selected_values: Iterable[str]) -> np.ndarray:
+        """Bitmap of the case studies matching any of the selected values of a facet"""
+
+        mask = np.zeros(self.size, dtype=bool)
+        for value in selected_values:
+            mask |= self.bitmap(facet, value)
+        return mask
+
+    def mask(self, selections: Dict[str, List[str]], exclude_facet: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Bitmap of the case studies matching every facet selection.
+        Returns None when nothing is selected, meaning all case studies match.
+        """
+
+        mask = None
+        for facet, selected_values in selections.items():
+            if facet == exclude_facet or not selected_values:
+                continue
+            facet_mask = self._facet_mask(facet, selected_values)
+            mask = facet_mask if mask is None else mask & facet_mask
+        return mask
+
+    def count(self, selections: Dict[str, List[str]]) -> int:
+        """Number of case studies matching the selections"""
+        mask = self.mask(selections)
+        return self.size if mask is None else int(np.count_nonzero(mask))
+
+    def distribution(self, facet: str, selections: Dict[str, List[str]]) -> Dict[str, int]:
+        """
+        Counts per value of a facet, restricted by the selections of every other facet,
+        so the alternatives of the facet remain visible while it is filtered.
+        """
+
+        mask = self.mask(selections, exclude_facet=facet)
+        if mask is None:
+            return dict(self.totals[facet])
+
+        counts = self._count_rows(facet, self.value_rows[facet][mask[self.documents[facet]]])
+        return {value: count for value, count in zip(self.values[facet], counts.tolist()) if count}
+
+    def distributions(self, selections: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """Counts per value of every facet under the selections"""
+        return {facet: self.distribution(facet, selections) for facet in FACETS}
+
+def build_facet_index(case_studies: Iterable[Dict[str, Any]], known_companies: Optional[Iterable[str]] = None) -> FacetIndex:
+    """Build a facet index from a stream of case study dictionaries"""
+
+    known_values = {}
+    if known_companies:
+        known_values['company'] = [URLHelper.clean_url(url) for url in known_companies if url]
+
+    return FacetIndex((extract_facet_values(case) for case in case_studies), known_values)
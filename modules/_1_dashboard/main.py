@@ -1,7 +1,72 @@
 import streamlit as st
 import pandas as pd
 
-from modules._1_dashboard.utils import get_case_studies_stats
+from modules._1_dashboard.cube import ClassificationCube
+from modules._1_dashboard.facets import FACETS, FacetIndex
+from modules._1_dashboard.utils import get_classification_cube
+from utils.helpers import load_company_urls
+from utils.profiling import profile_section
+from utils.url_helper import URLHelper
+
+@st.cache_resource(ttl=3600, show_spinner="Loading case studies...")
+def load_classification_data():
+    """
+    Load the classification cube once and share it across sessions and reruns,
+    with a facet index built from the cube facts for cross-filtering.
+    """
+    cube = get_classification_cube()
+    facet_index = FacetIndex(cube.facet_rows(), {'company': get_configured_companies()})
+    return cube, facet_index
+
+def get_configured_companies() -> list:
+    """Clean URLs of the companies listed in the config file"""
+    return [URLHelper.clean_url(url) for url in load_company_urls() if url]
+
+def get_distributions(cube: ClassificationCube, facet_index: FacetIndex, selections: dict) -> dict:
+    """
+    Read the distributions from the cube slices when nothing is filtered,
+    otherwise recount them from the facet index.
+    """
+    if any(selections.values()):
+        return facet_index.distributions(selections)
+
+    distributions = {facet: cube.distribution(facet) for facet in FACETS}
+
+    # Keep the configured companies without case studies
+    distributions['company'] = {
+        **{company: 0 for company in get_configured_companies()},
+        **distributions['company']
+    }
+    return distributions
+
+def display_distribution(facet: str, distribution: dict):
+    """Display the distribution of one facet as a table"""
+
+    label = FACETS[facet]
+    st.subheader(f"Case Studies by {label}")
+    if not distribution:
+        st.info(f"No {label.lower()} data available")
+        return
+
+    df = pd.DataFrame({
+        label: distribution.keys(),
+        'Count': distribution.values()
+    }).sort_values('Count', ascending=False)
+
+    if facet == 'company':
+        st.dataframe(
+            df,
+            hide_index=True,
+            column_config={
+                "Company": st.column_config.LinkColumn(
+                    "Company",
+                    help="Click to visit company website",
+                    validate="^https?://.*",  # Validate URLs
+                )
+            }
+        )
+    else:
+        st.dataframe(df, hide_index=True)
 
 def display_content_page():
 
@@ -14,97 +79,40 @@ def display_content_page():
     # Fetch data
     try:
         
-        stats = get_case_studies_stats()
+        with profile_section("load classification data"):
+            cube, facet_index = load_classification_data()
+
+        # Cross-filters on the classification taxonomy
+        with st.expander("🔎 Filters", expanded=False):
+            selections = {}
+            columns = st.columns(3)
+            for position, (facet, label) in enumerate(FACETS.items()):
+                with columns[position % 3]:
+                    selections[facet] = st.multiselect(
+                        label,
+                        options=sorted(facet_index.values[facet]),
+                        key=f"dashboard_filter_{facet}"
+                    )
+
+            if st.button("Reload Case Studies"):
+                load_classification_data.clear()
+                st.rerun()
+
+        filtered = any(selections.values())
         
         # Display total count
         st.metric(
-            label="Total Case Studies",
-            value=stats["total_case_studies"],
-            help="Total number of case studies in the database"
+            label="Matching Case Studies" if filtered else "Total Case Studies",
+            value=facet_index.count(selections) if filtered else cube.total(),
+            help="Number of case studies matching the filters" if filtered else "Total number of case studies in the database"
         )
-        
-        # Company Distribution
-        st.subheader("Case Studies by Company")
-        company_data = stats["company_distribution"]
-        if company_data:
-            company_df = pd.DataFrame({
-                'Company': company_data.keys(),
-                'Count': company_data.values()
-            }).sort_values('Count', ascending=False)
-            
-            st.dataframe(
-                company_df,
-                hide_index=True,
-                column_config={
-                    "Company": st.column_config.LinkColumn(
-                        "Company",
-                        help="Click to visit company website",
-                        validate="^https?://.*",  # Validate URLs
-                    )
-                }
-            )
-        else:
-            st.info("No company data available")
-
-        # Sector Distribution
-        st.subheader("Case Studies by Sector")
-        sector_data = stats["sector_distribution"]
-        if sector_data:
-            sector_df = pd.DataFrame({
-                'Sector': sector_data.keys(),
-                'Count': sector_data.values()
-            }).sort_values('Count', ascending=False)
-            st.dataframe(sector_df, hide_index=True)
-        else:
-            st.info("No sector data available")
-
-        # Industry Distribution
-        st.subheader("Case Studies by Industry")
-        industry_data = stats["industry_distribution"]
-        if industry_data:
-            industry_df = pd.DataFrame({
-                'Industry': industry_data.keys(),
-                'Count': industry_data.values()
-            }).sort_values('Count', ascending=False)
-            st.dataframe(industry_df, hide_index=True)
-        else:
-            st.info("No industry data available")
-        
-        # Business Function Distribution
-        st.subheader("Case Studies by Business Function")
-        function_data = stats["business_functions"]
-        if function_data:
-            function_df = pd.DataFrame({
-                'Business Function': function_data.keys(),
-                'Count': function_data.values()
-            }).sort_values('Count', ascending=False)
-            st.dataframe(function_df, hide_index=True)
-        else:
-            st.info("No business function data available")
-        
-        # Business Impact Distribution
-        st.subheader("Case Studies by Business Impact")
-        impact_data = stats["business_impacts"]
-        if impact_data:
-            impact_df = pd.DataFrame({
-                'Business Impact': impact_data.keys(),
-                'Count': impact_data.values()
-            }).sort_values('Count', ascending=False)
-            st.dataframe(impact_df, hide_index=True)
-        else:
-            st.info("No business impact data available")
-
-        # Maturity Model Distribution
-        st.subheader("Case Studies by Maturity Model")
-        maturity_data = stats["maturity_models"]
-        if maturity_data:
-            maturity_df = pd.DataFrame({
-                'Maturity Model': maturity_data.keys(),
-                'Count': maturity_data.values()
-            }).sort_values('Count', ascending=False)
-            st.dataframe(maturity_df, hide_index=True)
-        else:
-            st.info("No maturity model data available")
+
+        # Distributions of every facet under the other facets' filters
+        with profile_section("compute distributions"):
+            distributions = get_distributions(cube, facet_index, selections)
+        with profile_section("render distributions"):
+            for facet in FACETS:
+                display_distribution(facet, distributions[facet])
 
     except Exception as e:
-        st.error(f"Error fetching data: {str(e)}") 
\ No newline at end of file
+        st.error(f"Error fetching data: {str(e)}") 
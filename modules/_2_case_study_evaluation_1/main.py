@@ -1,5 +1,6 @@
 import streamlit as st
 import logging
+from utils.profiling import profile_section
 from modules._2_case_study_evaluation_1.tabs.tab1_guidelines import display_content as display_guidelines
 from modules._2_case_study_evaluation_1.tabs.tab2_evaluation import display_content as display_evaluation
 from modules._2_case_study_evaluation_1.tabs.tab3_user_summary import display_content as display_user_summary
@@ -40,25 +41,29 @@ def display_content_page():
     # = = = = = = = = = = = = = = = = = = = =
     with tab1:
         handle_tab_change("Guidelines")
-        display_guidelines()
+        with profile_section("guidelines tab"):
+            display_guidelines()
 
     # = = = = = = = = = = = = = = = = = = = =
     # TAB 2: EVALUATION
     # = = = = = = = = = = = = = = = = = = = =
     with tab2:
         handle_tab_change("Evaluation")
-        display_evaluation()
+        with profile_section("evaluation tab"):
+            display_evaluation()
 
     # = = = = = = = = = = = = = = = = = = = =
     # TAB 3: USER SUMMARY
     # = = = = = = = = = = = = = = = = = = = =
     with tab3:
         handle_tab_change("User Summary")
-        display_user_summary()
+        with profile_section("user summary tab"):
+            display_user_summary()
         
     # = = = = = = = = = = = = = = = = = = = =
     # TAB 4: TEAM SUMMARY
     # = = = = = = = = = = = = = = = = = = = =
     with tab4:
         handle_tab_change("Team Summary")
-        display_team_summary()
\ No newline at end of file
+        with profile_section("team summary tab"):
+            display_team_summary()
\ No newline at end of file
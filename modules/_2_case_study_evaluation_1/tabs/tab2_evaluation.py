@@ -7,12 +7,25 @@ import streamlit as st
 from datetime import datetime
 import logging
 import uuid
-from utils.firestore_manager import get_random_case_study
-from utils.firestore_manager import save_evaluation
+from utils.evaluation_store import get_evaluation_store
+from utils.markdown_helper import render_case_study
+from utils.prefetch import get_prefetcher
+from utils.profiling import instrumented_fragment, profile_section
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Improvement areas with their descriptions, as stored in the evaluations
+IMPROVEMENT_AREAS = {
+    "Relevance": "Relevance (Alignment with AI case study goals)",
+    "Accuracy": "Accuracy (Factual correctness and data reliability)",
+    "Structure": "Structure (Logical organization and clear flow of information)",
+    "Depth": "Depth (Appropriate technical detail and thoroughness)",
+    "Style": "Style (Clear, professional, and engaging writing)",
+    "Tone": "Tone (Appropriate voice and perspective for audience)",
+    "Other": "Other (Please specify clearly in your comment)"
+}
+
 def generate_evaluation_id(case_study_id, user_email):
     """Generate a deterministic UUID from case study ID and user email"""
 
@@ -22,6 +35,17 @@ def generate_evaluation_id(case_study_id, user_email):
     # Generate UUID version 5 (deterministic) using DNS namespace
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, combined.decode('utf-8')))
 
+def load_next_case_study():
+    """Swap in the next case study, prefetched in the background while the current one was open"""
+
+    case_study = get_prefetcher("case_studies", "evaluations").next_case_study()
+    st.session_state.current_case_study = case_study
+    st.session_state.content_loaded = case_study is not None
+
+    # Start the next form from its default values
+    st.session_state.pop("current_feedback", None)
+    return case_study
+
 # # # # # # # # # # #
 # Case Study Content
 # # # # # # # # # # #
@@ -38,10 +62,8 @@ def display_case_study(case_study):
         st.subheader("Case Study Content")
         st.info("Step 1. Read the case study content carefully.")
 
-        # Clean up the content by replacing separator lines with blank lines
-        content = case_study['case_study_final']
-        content = content.replace("- - - - - - - - -", "\n")
-        st.markdown(content)
+        # Render the cleaned content (separator lines replaced by blank lines)
+        render_case_study(case_study['case_study_final'])
     
     else:
         
@@ -54,7 +76,7 @@ def display_case_study(case_study):
 def display_evaluation_form(case_study):
     """Display the evaluation form for the case study"""
         
-    with st.form("evaluation_form"):
+    with st.form(f"evaluation_form_{case_study.get('id')}"):
 
         st.subheader("Evaluation Form")
         st.info("Step 2. Evaluate the case study based on the following criteria.")
@@ -76,16 +98,6 @@ def display_evaluation_form(case_study):
         # 2. Top Improvement Area
         st.markdown("##### 2. Improvement Area")
         
-        # Define improvement areas with descriptions
-        improvement_areas = {
-            "Relevance": "Relevance (Alignment with AI case study goals)",
-            "Accuracy": "Accuracy (Factual correctness and data reliability)",
-            "Structure": "Structure (Logical organization and clear flow of information)",
-            "Depth": "Depth (Appropriate technical detail and thoroughness)",
-            "Style": "Style (Clear, professional, and engaging writing)",
-            "Tone": "Tone (Appropriate voice and perspective for audience)",
-            "Other": "Other (Please specify clearly in your comment)"
-        }
         
         # Create radio buttons with descriptions
         st.write("Which area needs the most improvement?")
@@ -93,7 +105,7 @@ def display_evaluation_form(case_study):
         # Use radio buttons with values instead of keys
         improvement_area = st.radio(
             "Select one area:",
-            options=[improvement_areas[key] for key in improvement_areas.keys()],
+            options=list(IMPROVEMENT_AREAS.values()),
             label_visibility="collapsed"
         )
                         
@@ -131,21 +143,31 @@ def display_evaluation_form(case_study):
                 "timestamp": datetime.now()
             }   
 
-            # Save evaluation to firestore
-            save_evaluation(evaluation_object, "evaluations")
+            # Listed in the user summary right away, saved to firestore in the background;
+            # the case study is offered again if the save fails
+            prefetcher = get_prefetcher("case_studies", "evaluations")
+            prefetcher.evaluated(case_study)
+            get_evaluation_store("evaluations", "case_studies").save(
+                evaluation_object, case_study,
+                on_rollback=lambda evaluation_ids: prefetcher.evaluations_deleted([case_study.id])
+            )
             
             # Show success message
             st.success("Evaluation submitted successfully!")
             
-            # Optional: Clear form by resetting session state
-            st.session_state.content_loaded = False
+            # Swap in the next case study, with a cleared form (the whole page reruns, as the user summary changed)
+            load_next_case_study()
             st.rerun()
 
 # # # # # # # # # # #
 # Main Function
 # # # # # # # # # # #
+@instrumented_fragment
 def display_content():
-    """Main function to display the evaluation page"""
+    """
+    Main function to display the evaluation page.
+    Runs as a fragment: loading, skipping and the relevance choice only rerun this tab.
+    """
         
     # Create containers
     description_container = st.empty()
@@ -167,17 +189,13 @@ def display_content():
         # Add button in separate container
         if button_container.button("Get Case Study to evaluate"):
 
-            case_study = get_random_case_study("case_studies", "evaluations")
-
-            # Case study found
-            if case_study:
-                st.session_state.current_case_study = case_study
-                st.session_state.content_loaded = True
+            with profile_section("load case study"):
+                case_study = load_next_case_study()
 
             # Case study not found
-            else:
+            if case_study is None:
                 logger.error("Failed to load case study from database")
-                st.error("No case studies found in the database")
+                st.error("No unevaluated case studies found in the database")
     
     # Loaded state - show content and form
     if st.session_state.content_loaded:
@@ -189,7 +207,7 @@ def display_content():
         # Display the case study and evaluation form
         with content_container:
             col1, col2 = st.columns([6, 4])
-            with col1:
+            with col1, profile_section("render case study"):
                 display_case_study(st.session_state.current_case_study)
-            with col2:
+            with col2, profile_section("render evaluation form"):
                 display_evaluation_form(st.session_state.current_case_study)
\ No newline at end of file
@@ -1,17 +1,175 @@
 import streamlit as st
-from utils.firestore_manager import get_user_evaluations, delete_evaluation
-import pandas as pd
+from modules._2_case_study_evaluation_1.tabs.tab2_evaluation import IMPROVEMENT_AREAS
+from utils.evaluation_store import get_evaluation_store
+from utils.firestore_manager import USER_EVALUATIONS_PAGE_SIZE
+from utils.markdown_helper import render_case_study
+from utils.prefetch import get_prefetcher
+from utils.profiling import instrumented_fragment, profile_section
 import logging
+from datetime import datetime
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Evaluations per page
+PAGE_SIZE = USER_EVALUATIONS_PAGE_SIZE
+
+def delete_evaluation(evaluation_id, case_study_id):
+    """
+    Delete one evaluation from its row.
+    It is removed from the session store right away, so the summary rerun no longer shows it;
+    a failed delete is rolled back and reported.
+    """
+
+    logger.info(f"Delete button clicked for evaluation: {evaluation_id}")
+    prefetcher = get_prefetcher("case_studies", "evaluations")
+    prefetcher.evaluations_deleted([case_study_id])
+    get_evaluation_store("evaluations", "case_studies").delete(
+        evaluation_id,
+        on_rollback=lambda evaluation_ids: prefetcher.evaluations_restored([case_study_id])
+    )
+    st.toast(f"Evaluation {evaluation_id[:8]}... deleted successfully!")
+
+def display_evaluation_row(row):
+    """Display one evaluation with its delete button"""
+
+    with st.expander(f"Evaluation {row['Evaluation ID'][:8]}... - Score: {row['Score']}/10"):
+    
+        # Create tabs for evaluation details and case study content
+        tab1, tab2 = st.tabs(["Evaluation Details", "Case Study Content"])
+    
+        with tab1:
+            st.write(f"**Case Study ID:** {row['Case Study ID']}")
+            st.write(f"**Case Study URL:** {row['Case Study URL']}")
+            st.write(f"**Score:** {row['Score']}/10")
+            st.write(f"**Area for Improvement:** {row['Area for Improvement']}")
+            st.write(f"**Feedback:** {row['Feedback']}")
+            st.write(f"**Date:** {row['Date']}")
+        
+            # Reruns the summary, so its caption, bulk actions and rows all come from the updated store
+            st.button("Delete", key=f"delete_{row['Evaluation ID']}", type="secondary",
+                      on_click=delete_evaluation, args=(row['Evaluation ID'], row['Case Study ID']))
+    
+        with tab2:
+            # Render the cleaned content (separator lines replaced by blank lines)
+            render_case_study(row['Case Study Content'])
+
+def summary_row(evaluation):
+    """Row of the summary for an evaluation, with the column names displayed"""
+
+    timestamp = evaluation.get('timestamp')
+    return {
+        'Evaluation ID': evaluation['id'],
+        'Case Study ID': evaluation.get('case_study_id'),
+        'Score': evaluation.get('evaluation_score'),
+        'Area for Improvement': evaluation.get('improvement_area'),
+        'Feedback': evaluation.get('improvement_feedback'),
+        'Date': timestamp.strftime('%Y-%m-%d %H:%M') if isinstance(timestamp, datetime) else 'No date',
+        'Case Study URL': evaluation.get('case_study_url'),
+        'Case Study Content': evaluation.get('case_study_content')
+    }
+
+def set_page(page):
+    st.session_state.evaluations_summary_page = page
+
+def select_all(selection_key, evaluation_ids):
+    st.session_state[selection_key] = evaluation_ids
+
+def delete_selected(selection_key, case_study_ids):
+    """
+    Delete the selected evaluations with batched writes.
+    The store, its count and the prefetcher are updated once for the whole selection.
+    """
+
+    evaluation_ids = st.session_state.get(selection_key, [])
+    if not evaluation_ids:
+        return
+
+    logger.info(f"Deleting {len(evaluation_ids)} selected evaluations")
+    prefetcher = get_prefetcher("case_studies", "evaluations")
+    prefetcher.evaluations_deleted(case_study_ids[evaluation_id] for evaluation_id in evaluation_ids)
+    get_evaluation_store("evaluations", "case_studies").delete_many(
+        evaluation_ids,
+        on_rollback=lambda failed: prefetcher.evaluations_restored(case_study_ids[evaluation_id] for evaluation_id in failed)
+    )
+    st.session_state[selection_key] = []
+    st.toast(f"Deleted {len(evaluation_ids)} evaluations")
+
+def retag_selected(selection_key, area_key):
+    """Set the improvement area of the selected evaluations with batched writes"""
+
+    evaluation_ids = st.session_state.get(selection_key, [])
+    if not evaluation_ids:
+        return
+
+    improvement_area = st.session_state[area_key]
+    logger.info(f"Setting the improvement area of {len(evaluation_ids)} selected evaluations to {improvement_area}")
+    get_evaluation_store("evaluations", "case_studies").update_improvement_area(evaluation_ids, improvement_area)
+    st.session_state[selection_key] = []
+    st.toast(f"Updated {len(evaluation_ids)} evaluations")
+
+def display_bulk_actions(evaluations, page):
+    """Select evaluations of the page to delete them, or change their improvement area, at once"""
+
+    selection_key = f"evaluations_summary_selected_{page}"
+    area_key = "evaluations_summary_area"
+    labels = {
+        evaluation['id']: f"{evaluation['id'][:8]}... - Score: {evaluation.get('evaluation_score')}/10 - {evaluation.get('improvement_area')}"
+        for evaluation in evaluations
+    }
+    case_study_ids = {evaluation['id']: evaluation.get('case_study_id') for evaluation in evaluations}
+
+    # Evaluations deleted from their row meanwhile are no longer options
+    if selection_key in st.session_state:
+        st.session_state[selection_key] = [evaluation_id for evaluation_id in st.session_state[selection_key] if evaluation_id in labels]
+
+    with st.expander("Manage several evaluations"):
+        selected = st.multiselect(
+            "Evaluations",
+            options=list(labels),
+            format_func=labels.get,
+            key=selection_key,
+            placeholder="Select evaluations of this page"
+        )
+        st.button("Select all on this page", key="evaluations_summary_select_all",
+                  on_click=select_all, args=(selection_key, list(labels)))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Improvement area", options=list(IMPROVEMENT_AREAS.values()), key=area_key)
+            st.button("Change improvement area", key="evaluations_summary_retag", disabled=not selected,
+                      on_click=retag_selected, args=(selection_key, area_key), use_container_width=True)
+        with col2:
+            st.button(f"Delete {len(selected)} selected", key="evaluations_summary_delete_selected", type="secondary",
+                      disabled=not selected, on_click=delete_selected, args=(selection_key, case_study_ids),
+                      use_container_width=True)
+
+@instrumented_fragment
 def display_content():
+    """
+    Display the user's evaluations, newest first, one page at a time.
+    Runs as a fragment: changing page or deleting evaluations only reruns the summary.
+    """
+
     logger.info("Displaying evaluation summary")
     st.subheader("Evaluation Summary")
     
-    # Get all evaluations for the current user
-    evaluations = get_user_evaluations(st.session_state.email, "evaluations", "case_studies")
+    # Evaluations of the current page, loaded from Firestore once per session
+    store = get_evaluation_store("evaluations", "case_studies")
+    page = st.session_state.get("evaluations_summary_page", 0)
+    with profile_section("fetch evaluations"):
+        evaluations = store.page(page, PAGE_SIZE)
+        total = store.count()
+
+        # The last page may be empty after deletes
+        if not evaluations and page > 0:
+            page = max(0, (total - 1) // PAGE_SIZE)
+            set_page(page)
+            evaluations = store.page(page, PAGE_SIZE)
+
+    # Writes that failed in the background (and were rolled back)
+    for message in store.pop_errors():
+        st.error(message)
     
     if not evaluations:
         logger.info(f"No evaluations found for user: {st.session_state.email}")
@@ -19,59 +177,22 @@ def display_content():
         return
     
     logger.info(f"Processing {len(evaluations)} evaluations for display")
+    first = page * PAGE_SIZE
+    st.caption(f"Evaluations {first + 1}-{first + len(evaluations)} of {total}")
+
+    # Bulk delete and re-tagging of the evaluations of the page
+    display_bulk_actions(evaluations, page)
     
-    # Convert to DataFrame for better display
-    df = pd.DataFrame(evaluations)
-    
-    # Reorder and rename columns
-    df = df[[
-        'id', 'case_study_id', 'evaluation_score', 
-        'improvement_area', 'improvement_feedback', 'timestamp',
-        'case_study_url', 'case_study_content'
-    ]].rename(columns={
-        'id': 'Evaluation ID',
-        'case_study_id': 'Case Study ID',
-        'evaluation_score': 'Score',
-        'improvement_area': 'Area for Improvement',
-        'improvement_feedback': 'Feedback',
-        'timestamp': 'Date',
-        'case_study_url': 'Case Study URL',
-        'case_study_content': 'Case Study Content'
-    })
-    
-    # Format timestamp
-    df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d %H:%M')
-    
-    # Display each evaluation in an expander
-    for _, row in df.iterrows():
-        
-        with st.expander(f"Evaluation {row['Evaluation ID'][:8]}... - Score: {row['Score']}/10"):
-            
-            # Create tabs for evaluation details and case study content
-            tab1, tab2 = st.tabs(["Evaluation Details", "Case Study Content"])
-            
-            with tab1:
-                st.write(f"**Case Study ID:** {row['Case Study ID']}")
-                st.write(f"**Case Study URL:** {row['Case Study URL']}")
-                st.write(f"**Score:** {row['Score']}/10")
-                st.write(f"**Area for Improvement:** {row['Area for Improvement']}")
-                st.write(f"**Feedback:** {row['Feedback']}")
-                st.write(f"**Date:** {row['Date']}")
-                
-                if st.button("Delete", key=f"delete_{row['Evaluation ID']}", type="secondary"):
-
-                    logger.info(f"Delete button clicked for evaluation: {row['Evaluation ID']}")
-                    
-                    if delete_evaluation(row['Evaluation ID'], "evaluations"):
-                        logger.info(f"Successfully deleted evaluation: {row['Evaluation ID']}")
-                        st.success("Evaluation deleted successfully!")
-                        st.rerun()
-                    
-                    else:
-                        logger.error(f"Failed to delete evaluation: {row['Evaluation ID']}")
-                        st.error("Failed to delete evaluation.")
-            
-            with tab2:
-                # Clean up the content by replacing separator lines with blank lines
-                content = row['Case Study Content'].replace("- - - - - - - - -", "\n")
-                st.markdown(content) 
\ No newline at end of file
+    with profile_section("render evaluations"):
+        # Display each evaluation in an expander
+        for evaluation in evaluations:
+            display_evaluation_row(summary_row(evaluation))
+
+    # Page navigation
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("Previous", key="evaluations_summary_previous", disabled=page == 0,
+                  on_click=set_page, args=(page - 1,), use_container_width=True)
+    with col2:
+        st.button("Next", key="evaluations_summary_next", disabled=first + len(evaluations) >= total,
+                  on_click=set_page, args=(page + 1,), use_container_width=True)
@@ -1,9 +1,12 @@
 import streamlit as st
 import logging
 
-from utils.evaluation_helpers import get_all_evaluations, calculate_average_score, calculate_user_statistics
-from utils.evaluation_helpers import analyze_top_scoring_evaluations, analyze_lowest_scoring_evaluations
-from utils.evaluation_helpers import analyze_user_details, analyze_improvement_areas, analyze_improvement_areas_detailed
+from utils.evaluation_helpers import TeamSummaryStats, iter_evaluation_batches, join_case_studies, load_case_studies
+from utils.evaluation_helpers import analyze_user_details, analyze_improvement_areas_detailed
+from utils.export import display_export_panel
+from utils.markdown_helper import render_case_study
+from utils.profiling import instrumented_fragment, profile_section
+from utils.report_builder import display_published_report
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -48,221 +51,271 @@ def create_metric_card(title, value, description=""):
         </div>
     """, unsafe_allow_html=True)
 
+def display_metric_cards(placeholder, stats):
+    """Render the headline cards from the statistics of the evaluations read so far"""
+
+    with placeholder.container():
+        # Create a 4-column layout
+        col1, col2, col3, col4 = st.columns(4)
+    
+        with col1:
+            create_metric_card(
+                "Total Evaluations",
+                stats.total.result(),
+                "Total number of evaluations submitted"
+            )
+    
+        with col2:
+            create_metric_card(
+                "Evaluations (excl. Relevance)",
+                stats.filtered.result(),
+                "Number of evaluations excluding relevance issues"
+            )
+    
+        with col3:
+            create_metric_card(
+                "Team Average Score",
+                f"{stats.average_score()}/10",
+                "Average score across all evaluations"
+            )
+    
+        with col4:
+            create_metric_card(
+                "Average Score (excl. Relevance)",
+                f"{stats.filtered_average_score()}/10",
+                "Average score excluding relevance issues"
+            )
+
+def display_user_statistics(placeholder, user_stats):
+    """Render the Users Analysis table"""
+
+    if user_stats:
+        placeholder.dataframe(
+            user_stats,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "User": st.column_config.TextColumn("User"),
+                "Forms Submitted": st.column_config.NumberColumn("Forms Submitted"),
+                "Average Score": st.column_config.TextColumn("Average Score"),
+                "Min Score": st.column_config.TextColumn("Min Score"),
+                "Max Score": st.column_config.TextColumn("Max Score")
+            }
+        )
+    else:
+        placeholder.info("No user statistics available yet.")
+
+def display_improvement_areas(placeholder, improvement_areas):
+    """Render the Improvement Areas table"""
+
+    if improvement_areas:
+        placeholder.dataframe(
+            improvement_areas,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Improvement Area": st.column_config.TextColumn("Improvement Area"),
+                "Total Citations": st.column_config.NumberColumn("Total Citations"),
+                "Users Citing": st.column_config.TextColumn("Users Citing")
+            }
+        )
+    else:
+        placeholder.info("No improvement areas data available yet.")
+
 def display_content():
     """Display the team summary content"""
     
     st.subheader("Team Evaluation Summary")
+
+    # Export the evaluations joined with case study metadata
+    display_export_panel('evaluations', 'case_studies')
+
+    # Static report built offline with `python -m utils.report_builder`
+    display_published_report('round_1')
+
+    # Computed on demand, in a fragment of its own
+    display_results()
+
+@instrumented_fragment
+def display_results():
+    """
+    Stream the evaluations and render every section of the summary.
+    Runs as a fragment: showing the results only reruns this part of the tab.
+    """
     
     if st.button('Show Results'):
-        with st.spinner('Generating summary...'):
 
-            try:
-                # Fetch all evaluations
-                evaluations = get_all_evaluations('evaluations', 'case_studies')
-                
-                # Create filtered dataset (excluding relevance)
-                filtered_evaluations = [
-                    eval for eval in evaluations 
-                    if eval.get('improvement_area', '') != 'Relevance (Alignment with AI case study goals)'
-                ]
-                
-                # Create a 4-column layout
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    create_metric_card(
-                        "Total Evaluations",
-                        len(evaluations),
-                        "Total number of evaluations submitted"
-                    )
-                
-                with col2:
-                    create_metric_card(
-                        "Evaluations (excl. Relevance)",
-                        len(filtered_evaluations),
-                        "Number of evaluations excluding relevance issues"
-                    )
-                
-                with col3:
-                    avg_score = calculate_average_score(evaluations)
-                    create_metric_card(
-                        "Team Average Score",
-                        f"{avg_score}/10",
-                        "Average score across all evaluations"
-                    )
-                
-                with col4:
-                    filtered_avg_score = calculate_average_score(filtered_evaluations)
-                    create_metric_card(
-                        "Average Score (excl. Relevance)",
-                        f"{filtered_avg_score}/10",
-                        "Average score excluding relevance issues"
-                    )
-                
-                # User Statistics Card
-                st.subheader("Users Analysis")
-                user_stats = calculate_user_statistics(evaluations)
-                if user_stats:
-                    st.dataframe(
-                        user_stats,
-                        hide_index=True,
-                        use_container_width=True,
-                        column_config={
-                            "User": st.column_config.TextColumn("User"),
-                            "Forms Submitted": st.column_config.NumberColumn("Forms Submitted"),
-                            "Average Score": st.column_config.TextColumn("Average Score"),
-                            "Min Score": st.column_config.TextColumn("Min Score"),
-                            "Max Score": st.column_config.TextColumn("Max Score")
-                        }
-                    )
-                else:
-                    st.info("No user statistics available yet.")
-                
+        try:
+            # Lay out every section with a placeholder, filled as the evaluations stream in
+            status = st.empty()
+            cards = st.empty()
+            st.subheader("Users Analysis")
+            users_table = st.empty()
+            st.subheader("Detailed User Analysis")
+            user_details_section = st.empty()
+            st.subheader("Improvement Areas Analysis")
+            areas_table = st.empty()
+            st.subheader("Detailed Improvement Areas Analysis")
+            detailed_areas_section = st.empty()
+            st.subheader("Top 10 Highest Scoring Evaluations")
+            top_section = st.empty()
+            st.subheader("Top 10 Lowest Scoring Evaluations")
+            lowest_section = st.empty()
+            for placeholder in (users_table, user_details_section, areas_table, detailed_areas_section, top_section, lowest_section):
+                placeholder.caption("Loading...")
+
+            # Headline cards and tables are refined after each batch of evaluations
+            stats = TeamSummaryStats()
+            evaluations = []
+            with profile_section("stream evaluations"):
+                for batch in iter_evaluation_batches('evaluations'):
+                    evaluations.extend(batch)
+                    stats.add(batch)
+                    status.caption(f"Loaded {stats.total.result()} evaluations...")
+                    display_metric_cards(cards, stats)
+                    display_user_statistics(users_table, stats.user_statistics())
+                    display_improvement_areas(areas_table, stats.improvement_areas())
+
+                # Final state (also when there are no evaluations)
+                display_metric_cards(cards, stats)
+                display_user_statistics(users_table, stats.user_statistics())
+                display_improvement_areas(areas_table, stats.improvement_areas())
+
+            # The detailed sections show the case studies: join them once every evaluation is read
+            with profile_section("fetch case studies"):
+                status.caption(f"Loaded {stats.total.result()} evaluations, loading case studies...")
+                join_case_studies(evaluations, load_case_studies('case_studies'))
+                status.empty()
+            
+            with profile_section("detailed user analysis"):
                 # Detailed User Analysis
-                st.subheader("Detailed User Analysis")
-                user_details = analyze_user_details(evaluations)
-                if user_details:
-                    for user_data in user_details:
-                        with st.expander(f"{user_data['user']} ({user_data['count']} evaluations)"):
-                            st.markdown(f"### Total evaluations: {user_data['count']}")
-                            st.markdown("---")
-                            for eval in user_data['evaluations']:
-                                timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval['timestamp'] else 'No date'
+                with user_details_section.container():
+                    user_details = analyze_user_details(evaluations)
+                    if user_details:
+                        for user_data in user_details:
+                            with st.expander(f"{user_data['user']} ({user_data['count']} evaluations)"):
+                                st.markdown(f"### Total evaluations: {user_data['count']}")
+                                st.markdown("---")
+                                for eval in user_data['evaluations']:
+                                    timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval['timestamp'] else 'No date'
                                 
-                                # Create tabs for each evaluation
-                                eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
+                                    # Create tabs for each evaluation
+                                    eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
                                 
-                                with eval_tab:
-                                    st.markdown(f"""
-                                        **{timestamp_str}** | Score: **{eval['score']}/10** | Area: **{eval['improvement_area']}**  
-                                        🔗 {eval['source_url']}  
-                                        _{eval['feedback']}_
-                                    """)
+                                    with eval_tab:
+                                        st.markdown(f"""
+                                            **{timestamp_str}** | Score: **{eval['score']}/10** | Area: **{eval['improvement_area']}**  
+                                            🔗 {eval['source_url']}  
+                                            _{eval['feedback']}_
+                                        """)
                                 
-                                with case_tab:
-                                    # Clean up the content by replacing separator lines with blank lines
-                                    content = eval['case_study_final'].replace("- - - - - - - - -", "\n")
-                                    st.markdown(content)
+                                    with case_tab:
+                                        # Render the cleaned content (separator lines replaced by blank lines)
+                                        render_case_study(eval['case_study_final'])
                                 
-                                st.markdown("---")
-                else:
-                    st.info("No detailed user analysis available yet.")
-                
-                # Improvement Areas Analysis
-                st.subheader("Improvement Areas Analysis")
-                improvement_areas = analyze_improvement_areas(evaluations)
-                if improvement_areas:
-                    st.dataframe(
-                        improvement_areas,
-                        hide_index=True,
-                        use_container_width=True,
-                        column_config={
-                            "Improvement Area": st.column_config.TextColumn("Improvement Area"),
-                            "Total Citations": st.column_config.NumberColumn("Total Citations"),
-                            "Users Citing": st.column_config.TextColumn("Users Citing")
-                        }
-                    )
-                else:
-                    st.info("No improvement areas data available yet.")
-                
+                                    st.markdown("---")
+                    else:
+                        st.info("No detailed user analysis available yet.")
+            
+            with profile_section("detailed improvement areas"):
                 # Detailed Improvement Areas
-                st.subheader("Detailed Improvement Areas Analysis")
-                detailed_areas = analyze_improvement_areas_detailed(evaluations)
-                if detailed_areas:
-                    for area_data in detailed_areas:
-                        with st.expander(f"{area_data['area']} (Cited {area_data['count']} times)"):
-                            st.markdown(f"### Total citations: {area_data['count']}")
-                            st.markdown("---")
-                            sorted_feedbacks = sorted(
-                                area_data['feedbacks'],
-                                key=lambda x: (x['score'] if isinstance(x['score'], (int, float)) else 0,
-                                            x['timestamp'] if x['timestamp'] else '0'),
-                                reverse=True
-                            )
-                            for feedback in sorted_feedbacks:
-                                timestamp_str = feedback['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if feedback['timestamp'] else 'No date'
+                with detailed_areas_section.container():
+                    detailed_areas = analyze_improvement_areas_detailed(evaluations)
+                    if detailed_areas:
+                        for area_data in detailed_areas:
+                            with st.expander(f"{area_data['area']} (Cited {area_data['count']} times)"):
+                                st.markdown(f"### Total citations: {area_data['count']}")
+                                st.markdown("---")
+                                sorted_feedbacks = sorted(
+                                    area_data['feedbacks'],
+                                    key=lambda x: (x['score'] if isinstance(x['score'], (int, float)) else 0,
+                                                x['timestamp'] if x['timestamp'] else '0',
+                                                x['id']),
+                                    reverse=True
+                                )
+                                for feedback in sorted_feedbacks:
+                                    timestamp_str = feedback['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if feedback['timestamp'] else 'No date'
                                 
-                                # Create tabs for each feedback
-                                eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
+                                    # Create tabs for each feedback
+                                    eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
                                 
-                                with eval_tab:
-                                    st.markdown(f"""
-                                        **{timestamp_str}** | Score: **{feedback['score']}/10** | By: **{feedback['user']}**  
-                                        🔗 {feedback['source_url']}  
-                                        _{feedback['feedback']}_
-                                    """)
+                                    with eval_tab:
+                                        st.markdown(f"""
+                                            **{timestamp_str}** | Score: **{feedback['score']}/10** | By: **{feedback['user']}**  
+                                            🔗 {feedback['source_url']}  
+                                            _{feedback['feedback']}_
+                                        """)
                                 
-                                with case_tab:
-                                    # Clean up the content by replacing separator lines with blank lines
-                                    content = feedback.get('case_study_final', 'No summary available').replace("- - - - - - - - -", "\n")
-                                    st.markdown(content)
+                                    with case_tab:
+                                        # Render the cleaned content (separator lines replaced by blank lines)
+                                        render_case_study(feedback.get('case_study_final', 'No summary available'))
                                 
-                                st.markdown("---")
-                else:
-                    st.info("No detailed feedback available yet.")
+                                    st.markdown("---")
+                    else:
+                        st.info("No detailed feedback available yet.")
+            
+            with profile_section("top scoring evaluations"):
+                # Top Scoring Evaluations
+                with top_section.container():
+                    top_evaluations = stats.top_scoring()
                 
-                # Add Top Scoring Evaluations section
-                st.subheader("Top 10 Highest Scoring Evaluations")
-                top_evaluations = analyze_top_scoring_evaluations(evaluations)
-                
-                if top_evaluations:
-                    for eval in top_evaluations:
-                        timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval.get('timestamp') else 'No date'
-                        score = eval.get('evaluation_score', 'N/A')
-                        evaluator = eval.get('evaluator_email', 'Unknown')
+                    if top_evaluations:
+                        for eval in top_evaluations:
+                            timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval.get('timestamp') else 'No date'
+                            score = eval.get('evaluation_score', 'N/A')
+                            evaluator = eval.get('evaluator_email', 'Unknown')
                         
-                        with st.expander(f"Score: {score}/10 - {timestamp_str} - By: {evaluator}"):
-                            eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
+                            with st.expander(f"Score: {score}/10 - {timestamp_str} - By: {evaluator}"):
+                                eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
                             
-                            with eval_tab:
-                                st.markdown(f"""
-                                    **Date:** {timestamp_str}  
-                                    **Score:** {score}/10  
-                                    **Area:** {eval.get('improvement_area', 'Not specified')}  
-                                    **Evaluator:** {eval.get('evaluator_email', 'Unknown')}  
-                                    🔗 {eval.get('source_url', 'No URL provided')}  
+                                with eval_tab:
+                                    st.markdown(f"""
+                                        **Date:** {timestamp_str}  
+                                        **Score:** {score}/10  
+                                        **Area:** {eval.get('improvement_area', 'Not specified')}  
+                                        **Evaluator:** {eval.get('evaluator_email', 'Unknown')}  
+                                        🔗 {eval.get('source_url', 'No URL provided')}  
                                     
-                                    _{eval.get('improvement_feedback', 'No feedback provided')}_
-                                """)
+                                        _{eval.get('improvement_feedback', 'No feedback provided')}_
+                                    """)
                             
-                            with case_tab:
-                                # Clean up the content by replacing separator lines with blank lines
-                                content = eval.get('case_study_final', 'No summary available').replace("- - - - - - - - -", "\n")
-                                st.markdown(content)
-                else:
-                    st.info("No evaluations available yet.")
-                
-                # Add Lowest Scoring Evaluations section
-                st.subheader("Top 10 Lowest Scoring Evaluations")
-                lowest_evaluations = analyze_lowest_scoring_evaluations(evaluations)
+                                with case_tab:
+                                    # Render the cleaned content (separator lines replaced by blank lines)
+                                    render_case_study(eval.get('case_study_final', 'No summary available'))
+                    else:
+                        st.info("No evaluations available yet.")
+            
+            with profile_section("lowest scoring evaluations"):
+                # Lowest Scoring Evaluations
+                with lowest_section.container():
+                    lowest_evaluations = stats.lowest_scoring()
                 
-                if lowest_evaluations:
-                    for eval in lowest_evaluations:
-                        timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval.get('timestamp') else 'No date'
-                        score = eval.get('evaluation_score', 'N/A')
-                        evaluator = eval.get('evaluator_email', 'Unknown')
+                    if lowest_evaluations:
+                        for eval in lowest_evaluations:
+                            timestamp_str = eval['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if eval.get('timestamp') else 'No date'
+                            score = eval.get('evaluation_score', 'N/A')
+                            evaluator = eval.get('evaluator_email', 'Unknown')
                         
-                        with st.expander(f"Score: {score}/10 - {timestamp_str} - By: {evaluator}"):
-                            eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
+                            with st.expander(f"Score: {score}/10 - {timestamp_str} - By: {evaluator}"):
+                                eval_tab, case_tab = st.tabs(["Evaluation", "Case Study"])
                             
-                            with eval_tab:
-                                st.markdown(f"""
-                                    **Date:** {timestamp_str}  
-                                    **Score:** {score}/10  
-                                    **Area:** {eval.get('improvement_area', 'Not specified')}  
-                                    **Evaluator:** {eval.get('evaluator_email', 'Unknown')}  
-                                    🔗 {eval.get('source_url', 'No URL provided')}  
+                                with eval_tab:
+                                    st.markdown(f"""
+                                        **Date:** {timestamp_str}  
+                                        **Score:** {score}/10  
+                                        **Area:** {eval.get('improvement_area', 'Not specified')}  
+                                        **Evaluator:** {eval.get('evaluator_email', 'Unknown')}  
+                                        🔗 {eval.get('source_url', 'No URL provided')}  
                                     
-                                    _{eval.get('improvement_feedback', 'No feedback provided')}_
-                                """)
+                                        _{eval.get('improvement_feedback', 'No feedback provided')}_
+                                    """)
                             
-                            with case_tab:
-                                # Clean up the content by replacing separator lines with blank lines
-                                content = eval.get('case_study_final', 'No summary available').replace("- - - - - - - - -", "\n")
-                                st.markdown(content)
-                else:
-                    st.info("No evaluations available yet.")
-                
-            except Exception as e:
-                logger.error(f"Error generating summary: {str(e)}")
-                st.error("An error occurred while generating the summary. Please try again.")
+                                with case_tab:
+                                    # Render the cleaned content (separator lines replaced by blank lines)
+                                    render_case_study(eval.get('case_study_final', 'No summary available'))
+                    else:
+                        st.info("No evaluations available yet.")
+            
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}")
+            st.error("An error occurred while generating the summary. Please try again.")
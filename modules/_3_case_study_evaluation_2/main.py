@@ -1,5 +1,6 @@
 import streamlit as st
 import logging
+from utils.profiling import profile_section
 from modules._3_case_study_evaluation_2.tabs.tab1_evaluation import display_content as display_evaluation
 from modules._3_case_study_evaluation_2.tabs.tab2_user_summary import display_content as display_user_summary
 from modules._3_case_study_evaluation_2.tabs.tab3_team_summary import display_content as display_team_summary
@@ -37,18 +38,21 @@ def display_content_page():
     # = = = = = = = = = = = = = = = = = = = =
     with tab1:
         handle_tab_change("Evaluation")
-        display_evaluation()
+        with profile_section("evaluation tab"):
+            display_evaluation()
 
     # = = = = = = = = = = = = = = = = = = = =
     # TAB 2: USER SUMMARY
     # = = = = = = = = = = = = = = = = = = = =
     with tab2:
         handle_tab_change("User Summary")
-        display_user_summary()
+        with profile_section("user summary tab"):
+            display_user_summary()
         
     # = = = = = = = = = = = = = = = = = = = =
     # TAB 3: TEAM SUMMARY
     # = = = = = = = = = = = = = = = = = = = =
     with tab3:
         handle_tab_change("Team Summary")
-        display_team_summary()
\ No newline at end of file
+        with profile_section("team summary tab"):
+            display_team_summary()
\ No newline at end of file
@@ -7,12 +7,24 @@ import streamlit as st
 from datetime import datetime
 import logging
 import uuid
-from utils.firestore_manager import get_random_case_study
-from utils.firestore_manager import save_evaluation
+from utils.evaluation_store import get_evaluation_store
+from utils.markdown_helper import render_case_study
+from utils.prefetch import get_prefetcher
+from utils.profiling import instrumented_fragment, profile_section
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Improvement areas with their descriptions, as stored in the evaluations
+IMPROVEMENT_AREAS = {
+    "Accuracy": "Accuracy (factual correctness and data reliability)",
+    "Structure": "Structure (logical organization and clear flow of information)",
+    "Depth": "Depth (appropriate level of details and thoroughness)",
+    "Writing Style": "Writing Style (clear, professional, unbiased, and engaging)",
+    "Tone": "Tone (voice of business consultant, appropriate for selected audience)",
+    "Other": "Other (please specify in your comment)"
+}
+
 def generate_evaluation_id(case_study_id, user_email):
     """Generate a deterministic UUID from case study ID and user email"""
 
@@ -22,6 +34,23 @@ def generate_evaluation_id(case_study_id, user_email):
     # Generate UUID version 5 (deterministic) using DNS namespace
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, combined.decode('utf-8')))
 
+def load_next_case_study():
+    """Swap in the next case study, prefetched in the background while the current one was open"""
+
+    case_study = get_prefetcher("case_studies_v2", "evaluations_v2").next_case_study()
+    st.session_state.current_case_study = case_study
+    st.session_state.content_loaded = case_study is not None
+
+    # Start the next form from its default values
+    st.session_state.pop("current_feedback", None)
+    return case_study
+
+def skip_case_study(case_study):
+    """Exclude a case study that is not relevant and load the next one"""
+
+    get_prefetcher("case_studies_v2", "evaluations_v2").evaluated(case_study)
+    load_next_case_study()
+
 # # # # # # # # # # #
 # Case Study Content
 # # # # # # # # # # #
@@ -38,10 +67,8 @@ def display_case_study(case_study):
         st.subheader("Case Study Content")
         st.info("Step 1. Read the case study content carefully.")
 
-        # Clean up the content by replacing separator lines with blank lines
-        content = case_study['case_study_final']
-        content = content.replace("- - - - - - - - -", "\n")
-        st.markdown(content)
+        # Render the cleaned content (separator lines replaced by blank lines)
+        render_case_study(case_study['case_study_final'])
     
     else:
         
@@ -69,6 +96,7 @@ def display_evaluation_form(case_study):
     is_relevant = st.radio(
         "Is this document relevant for evaluation?",
         ("Yes", "No"),
+        key=f"is_relevant_{case_study.get('id')}",
         help="Select 'No' if this document is not suitable for evaluation (e.g., not a case study, wrong content type, etc.)"
     )
 
@@ -78,15 +106,15 @@ def display_evaluation_form(case_study):
 
     # If the document is not relevant, skip the rest of the evaluation process
     if is_relevant == "No":
-        if st.button("Skip and Load Next Document", type="primary", use_container_width=True):
-            st.session_state.content_loaded = False
-            st.rerun()
+        # The next case study is swapped in before the tab reruns
+        st.button("Skip and Load Next Document", type="primary", use_container_width=True,
+                  on_click=skip_case_study, args=(case_study,))
     
     # If the document is relevant, show the evaluation form
     if is_relevant == "Yes":
 
         # Add form to submit the evaluation
-        with st.form("evaluation_form"):
+        with st.form(f"evaluation_form_{case_study.get('id')}"):
                                 
             # 1. Overall Assessment
             st.markdown("##### 2. Overall Scoring")
@@ -104,20 +132,11 @@ def display_evaluation_form(case_study):
             # Create radio buttons with descriptions
             st.write("Which area needs the most improvement?")
     
-            # Define improvement areas with descriptions
-            improvement_areas = {
-                "Accuracy": "Accuracy (factual correctness and data reliability)",
-                "Structure": "Structure (logical organization and clear flow of information)",
-                "Depth": "Depth (appropriate level of details and thoroughness)",
-                "Writing Style": "Writing Style (clear, professional, unbiased, and engaging)",
-                "Tone": "Tone (voice of business consultant, appropriate for selected audience)",
-                "Other": "Other (please specify in your comment)"
-            }
                         
             # Use radio buttons with values instead of keys
             improvement_area = st.radio(
                 "Select one area:",
-                options=[improvement_areas[key] for key in improvement_areas.keys()],
+                options=list(IMPROVEMENT_AREAS.values()),
                 label_visibility="collapsed"
             )
                             
@@ -151,21 +170,31 @@ def display_evaluation_form(case_study):
                     "timestamp": datetime.now()
                 }   
 
-                # Save evaluation to firestore
-                save_evaluation(evaluation_object, "evaluations_v2")
+                # Listed in the user summary right away, saved to firestore in the background;
+                # the case study is offered again if the save fails
+                prefetcher = get_prefetcher("case_studies_v2", "evaluations_v2")
+                prefetcher.evaluated(case_study)
+                get_evaluation_store("evaluations_v2", "case_studies_v2").save(
+                    evaluation_object, case_study,
+                    on_rollback=lambda evaluation_ids: prefetcher.evaluations_deleted([case_study.id])
+                )
                 
                 # Show success message
                 st.success("Evaluation submitted successfully!")
                 
-                # Clear form by resetting session state
-                st.session_state.content_loaded = False
+                # Swap in the next case study, with a cleared form (the whole page reruns, as the user summary changed)
+                load_next_case_study()
                 st.rerun()
 
 # # # # # # # # # # #
 # Main Function
 # # # # # # # # # # #
+@instrumented_fragment
 def display_content():
-    """Main function to display the evaluation page"""
+    """
+    Main function to display the evaluation page.
+    Runs as a fragment: loading, skipping and the relevance choice only rerun this tab.
+    """
         
     # Create containers
     description_container = st.empty()
@@ -187,17 +216,13 @@ def display_content():
         # Add button in separate container
         if button_container.button("Get Case Study to evaluate"):
 
-            case_study = get_random_case_study("case_studies_v2", "evaluations_v2")
-
-            # Case study found
-            if case_study:
-                st.session_state.current_case_study = case_study
-                st.session_state.content_loaded = True
+            with profile_section("load case study"):
+                case_study = load_next_case_study()
 
             # Case study not found
-            else:
+            if case_study is None:
                 logger.error("Failed to load case study from database")
-                st.error("No case studies found in the database")
+                st.error("No unevaluated case studies found in the database")
     
     # Loaded state - show content and form
     if st.session_state.content_loaded:
@@ -209,7 +234,7 @@ def display_content():
         # Display the case study and evaluation form
         with content_container:
             col1, col2 = st.columns([6, 4])
-            with col1:
+            with col1, profile_section("render case study"):
                 display_case_study(st.session_state.current_case_study)
-            with col2:
+            with col2, profile_section("render evaluation form"):
                 display_evaluation_form(st.session_state.current_case_study)
\ No newline at end of file
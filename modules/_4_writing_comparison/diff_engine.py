@@ -0,0 +1,213 @@
+"""
+= = = = = = = = = = = =
+Summary Diff Engine
+= = = = = = = = = = = =
+
+This module computes word- and section-level changes between the old and new
+structured case study summaries, with a similarity ratio per section.
+
+Results are cached by a hash of both summaries, in a bounded in-memory LRU and on
+disk, so the Writing Comparison page only computes a diff once. Run the module directly to
+precompute the diffs for every company in a batch:
+
+    python -m modules._4_writing_comparison.diff_engine
+"""
+import hashlib
+import html
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directory where computed diffs are persisted
+DIFF_CACHE_DIR = "cache/summary_diffs"
+
+# Maximum number of diffs kept in memory; older ones are read back from disk
+MAX_CACHED_DIFFS = 256
+
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+def _summary_sections(summary: Optional[Dict]) -> Dict[str, str]:
+    """Flatten a structured summary into an ordered mapping of section name to plain text."""
+
+    sections = {}
+    if not isinstance(summary, dict):
+        return sections
+
+    if summary.get('title'):
+        sections['Title'] = summary['title']
+
+    if summary.get('introduction'):
+        sections['Introduction'] = summary['introduction']
+
+    for index, section in enumerate(summary.get('sections') or [], start=1):
+        if not isinstance(section, dict):
+            continue
+
+        name = section.get('section_title') or f"Section {index}"
+        parts = []
+        if section.get('section_introduction'):
+            parts.append(section['section_introduction'])
+        for point in section.get('section_content') or []:
+            if point:
+                parts.append(str(point))
+
+        # Keep duplicate section titles apart
+        key = name
+        suffix = 2
+        while key in sections:
+            key = f"{name} ({suffix})"
+            suffix += 1
+        sections[key] = "\n".join(parts)
+
+    return sections
+
+def _word_diff(old_text: str, new_text: str) -> Dict[str, Any]:
+    """Compute the word-level diff between two texts."""
+
+    old_words = old_text.split()
+    new_words = new_text.split()
+    matcher = SequenceMatcher(None, old_words, new_words, autojunk=False)
+
+    added = 0
+    removed = 0
+    rendered = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old_chunk = html.escape(" ".join(old_words[i1:i2]))
+        new_chunk = html.escape(" ".join(new_words[j1:j2]))
+        if tag == 'equal':
+            rendered.append(old_chunk)
+            continue
+        if tag in ('delete', 'replace'):
+            removed += i2 - i1
+            rendered.append(f"<del style='background-color:#fde2e2'>{old_chunk}</del>")
+        if tag in ('insert', 'replace'):
+            added += j2 - j1
+            rendered.append(f"<ins style='background-color:#e2f5e2'>{new_chunk}</ins>")
+
+    return {
+        'similarity': round(matcher.ratio(), 3) if (old_words or new_words) else 1.0,
+        'added_words': added,
+        'removed_words': removed,
+        'diff_html': " ".join(rendered)
+    }
+
+def compute_summary_diff(old_summary: Optional[Dict], new_summary: Optional[Dict]) -> Dict[str, Any]:
+    """
+    Compare two structured summaries section by section.
+    Sections are matched by title; unmatched sections are reported as added or removed.
+    Returns a dictionary with the per-section changes and the overall similarity.
+    """
+
+    old_sections = _summary_sections(old_summary)
+    new_sections = _summary_sections(new_summary)
+
+    # Keep the new summary order, then append sections that were removed
+    names = list(new_sections.keys()) + [name for name in old_sections if name not in new_sections]
+
+    sections = []
+    for name in names:
+        old_text = old_sections.get(name, "")
+        new_text = new_sections.get(name, "")
+        diff = _word_diff(old_text, new_text)
+
+        if name not in old_sections:
+            status = 'added'
+        elif name not in new_sections:
+            status = 'removed'
+        elif diff['added_words'] or diff['removed_words']:
+            status = 'changed'
+        else:
+            status = 'unchanged'
+
+        sections.append({'section': name, 'status': status, **diff})
+
+    # Overall similarity over the full word sequences
+    overall = _word_diff("\n".join(old_sections.values()), "\n".join(new_sections.values()))
+
+    return {
+        'overall_similarity': overall['similarity'],
+        'added_words': overall['added_words'],
+        'removed_words': overall['removed_words'],
+        'sections': sections
+    }
+
+def _diff_key(old_summary: Optional[Dict], new_summary: Optional[Dict]) -> str:
+    """Hash both summaries into a stable cache key."""
+    payload = json.dumps([old_summary, new_summary], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _cache_path(key: str) -> str:
+    return os.path.join(DIFF_CACHE_DIR, f"{key}.json")
+
+def get_summary_diff(old_summary: Optional[Dict], new_summary: Optional[Dict]) -> Dict[str, Any]:
+    """Return the diff of two summaries, computing and caching it on first request."""
+
+    key = _diff_key(old_summary, new_summary)
+
+    with _memory_cache_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+
+    diff = None
+    path = _cache_path(key)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                diff = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading cached summary diff {key}: {str(e)}")
+
+    if diff is None:
+        diff = compute_summary_diff(old_summary, new_summary)
+        try:
+            os.makedirs(DIFF_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(diff, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing cached summary diff {key}: {str(e)}")
+
+    with _memory_cache_lock:
+        _memory_cache[key] = diff
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MAX_CACHED_DIFFS:
+            _memory_cache.popitem(last=False)
+
+    return diff
+
+def _precompute_one(case: Dict[str, Any]) -> bool:
+    """Compute and cache the diff of a single case study."""
+    try:
+        get_summary_diff(case.get('case_study_summary_old'), case.get('case_study_summary'))
+        return True
+    except Exception as e:
+        logger.error(f"Error precomputing summary diff for case study {case.get('id', 'N/A')}: {str(e)}")
+        return False
+
+def precompute_summary_diffs(case_studies: List[Dict[str, Any]], max_workers: Optional[int] = None) -> int:
+    """
+    Compute and cache the diff of every case study in a batch, using a process pool.
+    Returns the number of case studies processed.
+    """
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        processed = sum(executor.map(_precompute_one, case_studies, chunksize=8))
+
+    logger.info(f"Precomputed {processed} summary diffs")
+    return processed
+
+if __name__ == "__main__":
+    from utils.firestore_manager import get_one_case_study_per_company
+
+    logging.basicConfig(level=logging.INFO)
+    precompute_summary_diffs(get_one_case_study_per_company())
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 
 from modules._4_writing_comparison.utils import format_case_study_summary
+from modules._4_writing_comparison.diff_engine import get_summary_diff
 from utils.firestore_manager import get_one_case_study_per_company
 from utils.url_helper import URLHelper
+from utils.profiling import profile_section
 
 def display_content_page():
     
@@ -19,48 +21,94 @@ def display_content_page():
     try:
         
         # Get one case study per company
-        case_studies = get_one_case_study_per_company()
+        with profile_section("fetch case studies"):
+            case_studies = get_one_case_study_per_company()
         
         if case_studies:
             st.subheader("Sample Case Studies by Company")
             
-            # Display each case study in an expander
-            for case in case_studies:
-                source_url = case.get('source_url', 'No URL available')
-                clean_url = URLHelper.clean_url(source_url)
-                
-                with st.expander(f"🏢 {clean_url}"):
-                    
-                    # Create two columns for side-by-side comparison
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-
-                        st.markdown("### Original Summary")
-                        # Format old summary
-                        old_summary = case.get('case_study_summary_old')
-                        formatted_old = format_case_study_summary(old_summary)
-                        if formatted_old:
-                            st.markdown(formatted_old)
-                        else:
-                            st.info("No original summary available")
-                    
-                    with col2:
-
-                        st.markdown("### New Summary")
-                        # Format new summary
-                        new_summary = case.get('case_study_summary')
-                        formatted_new = format_case_study_summary(new_summary)
-                        if formatted_new:
-                            st.markdown(formatted_new)
-                        else:
-                            st.info("No new summary available")
-                    
-                    # Add metadata below the comparison
-                    st.markdown("---")
-                    st.markdown(f"*Last updated: {case.get('updated_at', 'N/A')}*")
-                    st.markdown(f"[Visit Company Website]({clean_url})")
-                    
+            # Only the selected company is compared: its diff is computed (or read from the cache) on demand
+            cases_by_url = {URLHelper.clean_url(case.get('source_url', 'No URL available')): case for case in case_studies}
+            clean_url = st.selectbox(
+                "Select company:",
+                options=list(cases_by_url),
+                key="writing_comparison_company"
+            )
+            case = cases_by_url[clean_url]
+            old_summary = case.get('case_study_summary_old')
+            new_summary = case.get('case_study_summary')
+
+            # Get the cached diff between both summaries
+            with profile_section("summary diff"):
+                summary_diff = get_summary_diff(old_summary, new_summary)
+            similarity = round(summary_diff['overall_similarity'] * 100)
+
+            st.markdown(f"### 🏢 {clean_url} ({similarity}% similar)")
+
+            comparison_tab, changes_tab = st.tabs(["Side by Side", "Changes"])
+
+            with comparison_tab:
+
+                # Create two columns for side-by-side comparison
+                col1, col2 = st.columns(2)
+
+                with col1:
+
+                    st.markdown("### Original Summary")
+                    # Format old summary
+                    formatted_old = format_case_study_summary(old_summary)
+                    if formatted_old:
+                        st.markdown(formatted_old)
+                    else:
+                        st.info("No original summary available")
+
+                with col2:
+
+                    st.markdown("### New Summary")
+                    # Format new summary
+                    formatted_new = format_case_study_summary(new_summary)
+                    if formatted_new:
+                        st.markdown(formatted_new)
+                    else:
+                        st.info("No new summary available")
+
+            with changes_tab:
+
+                # Overall change metrics
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Similarity", f"{similarity}%")
+                col2.metric("Words Added", summary_diff['added_words'])
+                col3.metric("Words Removed", summary_diff['removed_words'])
+
+                # Per-section metrics
+                sections = summary_diff['sections']
+                if sections:
+                    st.dataframe(
+                        pd.DataFrame([{
+                            'Section': section['section'],
+                            'Status': section['status'],
+                            'Similarity': f"{round(section['similarity'] * 100)}%",
+                            'Words Added': section['added_words'],
+                            'Words Removed': section['removed_words']
+                        } for section in sections]),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+                    # Word-level changes of the sections that differ
+                    for section in sections:
+                        if section['status'] == 'unchanged':
+                            continue
+                        st.markdown(f"##### {section['section']} ({section['status']})")
+                        st.markdown(section['diff_html'], unsafe_allow_html=True)
+                else:
+                    st.info("No summary sections to compare")
+
+            # Add metadata below the comparison
+            st.markdown("---")
+            st.markdown(f"*Last updated: {case.get('updated_at', 'N/A')}*")
+            st.markdown(f"[Visit Company Website]({clean_url})")
+
         else:
             st.info("No case studies available")
             
@@ -0,0 +1,142 @@
+import streamlit as st
+import pandas as pd
+import json
+import os
+
+from utils.auth import is_admin
+from utils.instrumentation import LATENCY_BUCKETS_MS, export_metrics, percentile_ms, reset_metrics
+from utils.profiling import PROFILE_ENV_VAR, list_profiles
+
+def _stats_rows(functions: dict, **extra) -> list:
+    """Flatten per-function stats into table rows"""
+
+    rows = []
+    for name, stats in functions.items():
+        calls = stats['calls']
+        rows.append({
+            **extra,
+            'Function': name,
+            'Calls': calls,
+            'Reads': stats['reads'],
+            'Queries': stats['queries'],
+            'Writes': stats['writes'],
+            'KB Read': round(stats['bytes'] / 1024, 1),
+            'Avg (ms)': round(stats['total_ms'] / calls, 1) if calls else None,
+            'p95 (ms)': percentile_ms(stats['histogram'], 95),
+            'Max (ms)': round(stats['max_ms'], 1),
+            'Errors': stats['errors']
+        })
+    return rows
+
+def display_content_page():
+
+    # Title and description
+    st.title("Diagnostics")
+    st.markdown("""
+    Firestore reads, queries, writes and latencies recorded by this server, per page and per rerun.
+    """)
+
+    if not is_admin(st.session_state.get('email', '')):
+        st.error("You do not have access to this page.")
+        return
+
+    metrics = export_metrics()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Export JSON",
+            data=json.dumps(metrics, indent=2, default=str),
+            file_name="firestore_metrics.json",
+            mime="application/json",
+            use_container_width=True
+        )
+    with col2:
+        if st.button("Reset Metrics", use_container_width=True):
+            reset_metrics()
+            st.rerun()
+
+    # Totals per page and function
+    st.subheader("Totals by Page")
+    page_rows = []
+    for page, functions in metrics['pages'].items():
+        page_rows.extend(_stats_rows(functions, Page=page))
+    if page_rows:
+        st.dataframe(pd.DataFrame(page_rows).sort_values('Reads', ascending=False), hide_index=True, use_container_width=True)
+    else:
+        st.info("No Firestore activity recorded yet")
+        return
+
+    # Latency histogram of one function
+    st.subheader("Latency Histogram")
+    function_names = sorted({row['Function'] for row in page_rows})
+    selected = st.selectbox("Function", options=function_names)
+    histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for functions in metrics['pages'].values():
+        if selected in functions:
+            histogram = [a + b for a, b in zip(histogram, functions[selected]['histogram'])]
+    labels = [f"≤{bucket} ms" for bucket in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]} ms"]
+    st.bar_chart(pd.DataFrame({'Bucket': labels, 'Calls': histogram}), x='Bucket', y='Calls')
+
+    # Most recent reruns
+    st.subheader("Recent Reruns")
+    rerun_rows = []
+    for rerun in reversed(metrics['reruns']):
+        functions = rerun['functions']
+        rerun_rows.append({
+            'Started': rerun['started_at'],
+            'Page': rerun['page'],
+            'Fragment': rerun.get('fragment') or '',
+            'User': rerun['user'],
+            'Rerun ID': rerun['rerun_id'],
+            'Reads': sum(stats['reads'] for stats in functions.values()),
+            'Queries': sum(stats['queries'] for stats in functions.values()),
+            'Writes': sum(stats['writes'] for stats in functions.values()),
+            'KB Read': round(sum(stats['bytes'] for stats in functions.values()) / 1024, 1)
+        })
+    st.dataframe(pd.DataFrame(rerun_rows), hide_index=True, use_container_width=True)
+
+    with st.expander("Rerun details"):
+        rerun_ids = [row['Rerun ID'] for row in rerun_rows]
+        selected_rerun = st.selectbox("Rerun", options=rerun_ids)
+        for rerun in metrics['reruns']:
+            if rerun['rerun_id'] == selected_rerun:
+                st.dataframe(pd.DataFrame(_stats_rows(rerun['functions'])), hide_index=True, use_container_width=True)
+
+    # Profiles recorded with ?profile=... or EVALHUB_PROFILE
+    st.subheader("Rerun Profiles")
+    profiles = list_profiles()
+    if not profiles:
+        st.info(f"No profiles recorded. Add ?profile=1 (or profile=cprofile,memory) to a page URL, or set {PROFILE_ENV_VAR}.")
+        return
+
+    st.dataframe(pd.DataFrame([{
+        'Started': profile['started_at'],
+        'Page': profile['page'],
+        'Fragment': profile.get('fragment') or '',
+        'Rerun ID': profile['rerun_id'],
+        'Options': ", ".join(profile['options']),
+        'Wall (ms)': round(profile['sections'].get('rerun', {}).get('wall_ms', 0), 1),
+        'CPU (ms)': round(profile['sections'].get('rerun', {}).get('cpu_ms', 0), 1),
+        'Peak Memory (KB)': (profile.get('memory') or {}).get('peak_kb')
+    } for profile in profiles]), hide_index=True, use_container_width=True)
+
+    selected_profile = st.selectbox("Profile", options=[profile['rerun_id'] for profile in profiles])
+    for profile in profiles:
+        if profile['rerun_id'] != selected_profile:
+            continue
+
+        st.dataframe(pd.DataFrame([
+            {'Section': path, 'Calls': section['calls'], 'Wall (ms)': round(section['wall_ms'], 1), 'CPU (ms)': round(section['cpu_ms'], 1)}
+            for path, section in profile['sections'].items()
+        ]), hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        folded_path = f"{profile['base_path']}.folded"
+        prof_path = f"{profile['base_path']}.prof"
+        if os.path.exists(folded_path):
+            with open(folded_path, 'rb') as f:
+                col1.download_button("Download Collapsed Stacks", data=f.read(), file_name=os.path.basename(folded_path), use_container_width=True)
+        if os.path.exists(prof_path):
+            with open(prof_path, 'rb') as f:
+                col2.download_button("Download cProfile Stats", data=f.read(), file_name=os.path.basename(prof_path), use_container_width=True)
@@ -1,16 +1,95 @@
 import streamlit as st
+import logging
 
 from utils.firestore_manager import get_db
 from utils.helpers import load_company_urls
+from utils.search_index import SearchIndex, index_path, update_index_from_collection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Collections covered by the full-text search
+SEARCH_COLLECTIONS = ['case_studies_v2', 'case_studies_v3']
+SEARCH_INDEX_NAME = "case_studies"
+
+@st.cache_resource(show_spinner="Building search index...")
+def get_search_index() -> SearchIndex:
+    """Load the persisted search index and bring it up to date with Firestore"""
+    index = SearchIndex.load(index_path(SEARCH_INDEX_NAME))
+    refresh_search_index(index)
+    return index
+
+def refresh_search_index(index: SearchIndex):
+    """Incrementally update the search index from the case study collections and persist it"""
+    db = get_db()
+    for collection_name in SEARCH_COLLECTIONS:
+        update_index_from_collection(index, db, collection_name)
+    index.save(index_path(SEARCH_INDEX_NAME))
 
 def display_content_page():
     
     # Title and description
     st.title("View Case Studies")
     st.markdown("""
-    Search and view case studies by their source URL.
+    Search and view case studies by their source URL or by their content.
     """)
 
+    url_tab, search_tab = st.tabs(["🏢 Search by Company", "🔎 Full-text Search"])
+
+    with url_tab:
+        display_url_search()
+
+    with search_tab:
+        display_full_text_search()
+
+def display_full_text_search():
+    """Display the ranked full-text search over case study content"""
+
+    with st.form("full_text_search_form", clear_on_submit=False):
+        query = st.text_input("Search case study content:", key="full_text_query")
+        search_button = st.form_submit_button("Search", type="primary", use_container_width=True)
+
+    # Every tab renders with the page: load the index on the first search only
+    if search_button:
+        st.session_state.search_index_requested = True
+    if not st.session_state.get("search_index_requested"):
+        st.caption(f"The search index over {', '.join(SEARCH_COLLECTIONS)} is loaded on the first search")
+        return
+
+    try:
+        index = get_search_index()
+    except Exception as e:
+        logger.error(f"Error loading search index: {str(e)}")
+        st.error(f"Error loading search index: {str(e)}")
+        return
+
+    col1, col2 = st.columns([4, 1])
+    col1.caption(f"{len(index)} case studies indexed from {', '.join(SEARCH_COLLECTIONS)}")
+    if col2.button("Refresh Index", use_container_width=True):
+        with st.spinner("Updating search index..."):
+            refresh_search_index(index)
+        st.toast("Search index updated")
+
+    if search_button and query:
+        results = index.search(query)
+        if not results:
+            st.info("No case studies match this search")
+            return
+
+        st.success(f"Found {len(results)} matching case studies")
+        for result in results:
+            metadata = result['metadata']
+            with st.expander(f"📄 {metadata.get('source_url', 'No URL available')} ({metadata.get('collection', 'N/A')}, score {result['score']})"):
+                st.markdown(result['snippet'])
+                st.text(f"ID: {metadata.get('id', 'N/A')}")
+                st.text(f"Last updated: {metadata.get('updated_at', 'N/A')}")
+
+    elif search_button:
+        st.warning("Please enter search terms")
+
+def display_url_search():
+    """Display the case studies whose source URL starts with the selected company URL"""
+
     # Load URLs from file
     urls = load_company_urls()
     if not urls:
@@ -0,0 +1,169 @@
+"""
+Streaming aggregators for the Case Study Evaluation Hub.
+Each aggregator consumes documents one at a time and keeps only its running state
+(counters, a bounded heap, per-group statistics), so statistics can be computed while a
+collection is streamed, with memory independent of the number of documents.
+
+    stats = aggregate(documents, {
+        'sectors': Counter(lambda case: [case['sector']]),
+        'top': TopK(10, key=lambda evaluation: evaluation['evaluation_score']),
+        'users': GroupStats(lambda evaluation: evaluation.get('evaluator_email'),
+                            lambda evaluation: evaluation.get('evaluation_score'))
+    })
+
+Key functions return None (or an empty iterable) to skip a document.
+"""
+
+import heapq
+import logging
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class Aggregator:
+    """Running aggregate over a stream of documents"""
+
+    def add(self, item: Any):
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+class Count(Aggregator):
+    """Number of documents, optionally only those matching a predicate"""
+
+    def __init__(self, where: Optional[Callable[[Any], bool]] = None):
+        self._where = where
+        self.count = 0
+
+    def add(self, item: Any):
+        if self._where is None or self._where(item):
+            self.count += 1
+
+    def result(self) -> int:
+        return self.count
+
+class Counter(Aggregator):
+    """Count the keys returned for each document (several keys per document are allowed)"""
+
+    def __init__(self, keys: Callable[[Any], Optional[Iterable[Hashable]]], initial: Optional[Dict[Hashable, int]] = None):
+        self._keys = keys
+        self.counts = dict(initial or {})
+
+    def add(self, item: Any):
+        counts = self.counts
+        for key in self._keys(item) or ():
+            counts[key] = counts.get(key, 0) + 1
+
+    def result(self) -> Dict[Hashable, int]:
+        return self.counts
+
+class DistinctCount(Aggregator):
+    """Number of distinct keys (memory grows with the distinct keys, not the documents)"""
+
+    def __init__(self, key: Callable[[Any], Optional[Hashable]]):
+        self._key = key
+        self.seen = set()
+
+    def add(self, item: Any):
+        key = self._key(item)
+        if key is not None:
+            self.seen.add(key)
+
+    def result(self) -> int:
+        return len(self.seen)
+
+class _Reversed:
+    """Inverts comparisons, to keep the largest keys on top of a min-heap"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: "_Reversed") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+class TopK(Aggregator):
+    """
+    The k documents with the largest (or smallest) keys, in order.
+    Equivalent to sorting every document and keeping the first k, ties included, in O(k) memory.
+    """
+
+    def __init__(self, k: int, key: Callable[[Any], Any], largest: bool = True, where: Optional[Callable[[Any], bool]] = None):
+        self.k = k
+        self._key = key
+        self._largest = largest
+        self._where = where
+        self._heap = []
+        self._index = 0
+
+    def add(self, item: Any):
+        if self.k <= 0 or (self._where is not None and not self._where(item)):
+            return
+        key = self._key(item)
+        # The heap top is the entry evicted first: the smallest (or largest) key, latest on ties
+        entry = (key if self._largest else _Reversed(key), -self._index, item)
+        self._index += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def result(self) -> List[Any]:
+        entries = sorted(self._heap, reverse=True)
+        return [item for _, _, item in entries]
+
+class GroupStats(Aggregator):
+    """Count, sum, minimum and maximum of a value per group"""
+
+    def __init__(self, group: Callable[[Any], Optional[Hashable]], value: Callable[[Any], Any]):
+        self._group = group
+        self._value = value
+        self.groups = {}
+
+    def add(self, item: Any):
+        group = self._group(item)
+        if group is None:
+            return
+        value = self._value(item)
+        if value is None:
+            return
+        stats = self.groups.get(group)
+        if stats is None:
+            self.groups[group] = {'count': 1, 'sum': value, 'min': value, 'max': value}
+            return
+        stats['count'] += 1
+        stats['sum'] += value
+        if value < stats['min']:
+            stats['min'] = value
+        if value > stats['max']:
+            stats['max'] = value
+
+    @staticmethod
+    def _mean(total, count):
+        # Like statistics.mean, an exact mean of integers stays an integer
+        if isinstance(total, int) and total % count == 0:
+            return total // count
+        return total / count
+
+    def result(self) -> Dict[Hashable, Dict[str, Any]]:
+        return {
+            group: dict(stats, mean=self._mean(stats['sum'], stats['count']))
+            for group, stats in self.groups.items()
+        }
+
+def aggregate(items: Iterable[Any], aggregators: Dict[str, Aggregator]) -> Dict[str, Any]:
+    """Feed every item to every aggregator in a single pass; returns their results by name"""
+
+    for item in items:
+        for name, aggregator in aggregators.items():
+            try:
+                aggregator.add(item)
+            except Exception as e:
+                logger.error(f"Error aggregating {name}: {str(e)}")
+    return {name: aggregator.result() for name, aggregator in aggregators.items()}
@@ -7,6 +7,11 @@ import streamlit as st
 import re
 import json
 import os
+import hashlib
+import threading
+
+# Local allow-list, used instead of the Streamlit secrets when it exists
+LOCAL_AUTH_PATH = "config/authorized_emails.json"
 
 def init_auth_state():
     """Initialize authentication state"""
@@ -15,41 +20,138 @@ def init_auth_state():
     if 'email' not in st.session_state:
         st.session_state.email = ""
 
-def get_authorized_emails():
-    """Get authorized emails from local file or Streamlit secrets"""
+def _load_email_list(file_key: str, secret_key: str):
+    """Get a list of emails from the local file (under file_key) or Streamlit secrets (under secret_key)"""
 
     # Try local file first
-    local_auth_path = "config/authorized_emails.json"
-    if os.path.exists(local_auth_path):
+    if os.path.exists(LOCAL_AUTH_PATH):
         try:
-            with open(local_auth_path, 'r') as f:
+            with open(LOCAL_AUTH_PATH, 'r') as f:
                 data = json.load(f)
-                return data.get('authorized_emails', [])
+                return data.get(file_key, [])
         except Exception as e:
             st.error(f"Error reading local auth file: {str(e)}")
             return []
     
     # Fall back to Streamlit secrets
-    if st.secrets and "AUTHORIZED_EMAILS" in st.secrets:
+    if st.secrets and secret_key in st.secrets:
         try:
-            if isinstance(st.secrets["AUTHORIZED_EMAILS"], str):
-                return json.loads(st.secrets["AUTHORIZED_EMAILS"])
-            return st.secrets["AUTHORIZED_EMAILS"]
+            if isinstance(st.secrets[secret_key], str):
+                return json.loads(st.secrets[secret_key])
+            return st.secrets[secret_key]
         except Exception as e:
             st.error(f"Error reading Streamlit secrets: {str(e)}")
             return []
     
     return []
 
+def get_authorized_emails():
+    """Get authorized emails from local file or Streamlit secrets"""
+    return _load_email_list('authorized_emails', "AUTHORIZED_EMAILS")
+
+def get_admin_emails():
+    """Get admin emails from local file or Streamlit secrets"""
+    return _load_email_list('admin_emails', "ADMIN_EMAILS")
+
 def is_valid_email(email: str) -> bool:
     """Check if the email format is valid"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return bool(re.match(pattern, email))
 
+class EmailIndex:
+    """
+    Normalized allow-list for constant-time lookups.
+    Entries of the form "*@example.com" (or "@example.com") authorize a whole domain.
+    """
+
+    __slots__ = ('emails', 'domains')
+
+    def __init__(self, entries):
+        emails = set()
+        domains = set()
+        for entry in entries or []:
+            if not isinstance(entry, str):
+                continue
+            entry = entry.strip().lower()
+            if entry.startswith('*@'):
+                domains.add(entry[2:])
+            elif entry.startswith('@'):
+                domains.add(entry[1:])
+            elif entry:
+                emails.add(entry)
+        self.emails = frozenset(emails)
+        self.domains = frozenset(domains)
+
+    def __contains__(self, email) -> bool:
+        if not isinstance(email, str):
+            return False
+        email = email.strip().lower()
+        if email in self.emails:
+            return True
+        _, at, domain = email.rpartition('@')
+        return bool(at) and domain in self.domains
+
+    def __len__(self) -> int:
+        return len(self.emails) + len(self.domains)
+
+# # # # # # # # # # #
+# Allow-list cache
+# # # # # # # # # # #
+
+# Index and source signature per secret key, rebuilt only when the source changes
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def _source_signature(secret_key: str):
+    """Identifies the current content of the allow-list: the local file's mtime, or a hash of the secret"""
+
+    try:
+        stat = os.stat(LOCAL_AUTH_PATH)
+        return ('file', stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass
+
+    try:
+        if st.secrets and secret_key in st.secrets:
+            value = st.secrets[secret_key]
+            if not isinstance(value, str):
+                value = json.dumps(list(value), sort_keys=True, default=str)
+            return ('secrets', hashlib.sha256(value.encode('utf-8')).hexdigest())
+    except Exception:
+        pass
+
+    return None
+
+def _get_index(secret_key: str, load_emails) -> EmailIndex:
+    """Cached allow-list index, reloaded when its file or secret changes"""
+
+    signature = _source_signature(secret_key)
+    with _indexes_lock:
+        cached = _indexes.get(secret_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        index = EmailIndex(load_emails())
+        _indexes[secret_key] = (signature, index)
+        return index
+
+def get_authorized_index() -> EmailIndex:
+    """Index of the authorized emails and domains"""
+    return _get_index("AUTHORIZED_EMAILS", get_authorized_emails)
+
+def get_admin_index() -> EmailIndex:
+    """Index of the admin emails and domains"""
+    return _get_index("ADMIN_EMAILS", get_admin_emails)
+
 def is_authorized(email: str) -> bool:
     """Check if the email is authorized"""
-    authorized_emails = get_authorized_emails()
-    return email.lower() in [e.lower() for e in authorized_emails]
+    return email in get_authorized_index()
+
+def is_admin(email: str) -> bool:
+    """Check if the email belongs to an administrator"""
+    if not email:
+        return False
+    return email in get_admin_index()
 
 def show_login_page():
     """Display the login page"""
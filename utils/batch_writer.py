@@ -0,0 +1,216 @@
+"""
+Batch writer for the Case Study Evaluation Hub.
+Groups Firestore writes into batches of at most 500 operations and commits them across a
+bounded pool of parallel writers, retrying transient failures and optionally rate-limited.
+
+Every write can carry a sequence number (e.g. the position of a record in an input file).
+`committed_through` is the highest sequence number such that every write up to it has been
+committed, which is what a resumable job should checkpoint.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of writes in a Firestore batch
+MAX_BATCH_WRITES = 500
+
+# Default number of batches committed in parallel
+DEFAULT_WRITERS = 4
+
+# Retries of a failed batch commit, with exponential backoff
+MAX_COMMIT_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """Atomically replace the JSON checkpoint of a resumable job"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+class RateLimiter:
+    """Token bucket limiting operations per second across threads"""
+
+    def __init__(self, per_second: float, burst: Optional[float] = None):
+        self.per_second = per_second
+        self.capacity = burst if burst is not None else max(per_second, MAX_BATCH_WRITES)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1):
+        """Block until `count` operations are allowed"""
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_second)
+                self._updated = now
+                # Requests larger than the bucket are let through once it is full
+                if self._tokens >= min(count, self.capacity):
+                    self._tokens -= count
+                    return
+                wait = (min(count, self.capacity) - self._tokens) / self.per_second
+            time.sleep(wait)
+
+class BatchWriter:
+    """Buffered, parallel batch writes; use as a context manager or call close()"""
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = MAX_BATCH_WRITES,
+        max_writers: int = DEFAULT_WRITERS,
+        on_commit: Optional[Callable[[int, int], None]] = None,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Args:
+            db: Firestore client
+            batch_size: Number of writes per batch (at most 500)
+            max_writers: Number of batches committed in parallel
+            on_commit: Called as on_commit(writes, committed_through) after each commit
+            rate_limiter: Limits the writes per second, to stay under quota
+        """
+        self._db = db
+        self._batch_size = min(batch_size, MAX_BATCH_WRITES)
+        self._on_commit = on_commit
+        self._rate_limiter = rate_limiter
+        self._executor = ThreadPoolExecutor(max_workers=max_writers, thread_name_prefix="batch-writer")
+        # Bounds the batches buffered or in flight, so memory stays constant
+        self._slots = threading.BoundedSemaphore(max_writers * 2)
+        self._lock = threading.Lock()
+
+        self._pending = []
+        self._pending_sequence = None
+        self._futures = []
+        self._error = None
+
+        # Batches in submission order as [sequence, committed], to compute the low watermark
+        self._submitted = deque()
+        self._last_sequence = -1
+        self.committed_through = -1
+
+        self.writes = 0
+        self.batches = 0
+
+    # # # # # # # # # # #
+    # Writes
+    # # # # # # # # # # #
+
+    def set(self, reference, data: Dict[str, Any], merge: bool = False, sequence: Optional[int] = None):
+        self._add(('set', reference, data, merge), sequence)
+
+    def update(self, reference, data: Dict[str, Any], sequence: Optional[int] = None):
+        self._add(('update', reference, data, None), sequence)
+
+    def delete(self, reference, sequence: Optional[int] = None):
+        self._add(('delete', reference, None, None), sequence)
+
+    def _add(self, write, sequence: Optional[int]):
+        if self._error is not None:
+            raise self._error
+        self._pending.append(write)
+        if sequence is not None:
+            self._pending_sequence = sequence
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """Submit the buffered writes as one batch"""
+
+        if not self._pending:
+            return
+        writes, self._pending = self._pending, []
+
+        with self._lock:
+            sequence = self._pending_sequence if self._pending_sequence is not None else self._last_sequence + 1
+            self._pending_sequence = None
+            self._last_sequence = max(self._last_sequence, sequence)
+            entry = [sequence, False]
+            self._submitted.append(entry)
+
+        self._slots.acquire()
+        future = self._executor.submit(self._commit, writes, entry)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures = [f for f in self._futures if not f.done()] + [future]
+
+    def _commit(self, writes: List[tuple], entry: list):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(len(writes))
+
+        for attempt in range(1, MAX_COMMIT_ATTEMPTS + 1):
+            try:
+                batch = self._db.batch()
+                for operation, reference, data, merge in writes:
+                    if operation == 'set':
+                        batch.set(reference, data, merge=merge)
+                    elif operation == 'update':
+                        batch.update(reference, data)
+                    else:
+                        batch.delete(reference)
+                batch.commit()
+                break
+            except Exception as e:
+                if attempt == MAX_COMMIT_ATTEMPTS:
+                    logger.error(f"Error committing batch of {len(writes)} writes: {str(e)}")
+                    self._error = e
+                    raise
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random())
+                logger.warning(f"Batch commit failed (attempt {attempt}), retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+
+        with self._lock:
+            entry[1] = True
+            self.writes += len(writes)
+            self.batches += 1
+            # Every write up to the oldest batch not yet committed has been committed
+            while self._submitted and self._submitted[0][1]:
+                self.committed_through = self._submitted.popleft()[0]
+            committed_through = self.committed_through
+
+        if self._on_commit is not None:
+            try:
+                self._on_commit(len(writes), committed_through)
+            except Exception as e:
+                logger.error(f"Error in batch commit callback: {str(e)}")
+
+    def wait(self):
+        """Flush and wait until every submitted batch is committed; raises the first commit error"""
+
+        self.flush()
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not hide the original error behind a commit error
+            try:
+                self.close()
+            except Exception as e:
+                logger.error(f"Error closing batch writer: {str(e)}")
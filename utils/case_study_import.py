@@ -0,0 +1,270 @@
+"""
+Case study import for the Case Study Evaluation Hub.
+Loads a new generation of case studies from JSONL or Parquet into a Firestore collection.
+
+Records are streamed from the input, validated and normalized (clean URL, cleaned markdown,
+random sampling key), and committed in batches of 500 across a bounded pool of parallel writers.
+Progress is checkpointed after each commit, so an interrupted import resumes where it stopped.
+Document IDs are derived from the source URL, which makes re-importing a record idempotent.
+
+    python -m utils.case_study_import inputs/case_studies_v3.jsonl
+    python -m utils.case_study_import inputs/case_studies_v3.parquet --collection case_studies_v3 --writers 8
+    python -m utils.case_study_import inputs/case_studies_v3.jsonl --restart
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pyarrow.parquet as pq
+from firebase_admin import firestore
+
+from utils.batch_writer import DEFAULT_WRITERS, MAX_BATCH_WRITES, BatchWriter, save_checkpoint
+from utils.firestore_manager import get_db
+from utils.markdown_helper import clean_case_study_content
+from utils.url_helper import URLHelper
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where import checkpoints and rejected records are written
+IMPORTS_DIR = "cache/imports"
+
+DEFAULT_COLLECTION = 'case_studies_v3'
+
+# Number of Parquet rows decoded at a time
+PARQUET_BATCH_ROWS = 1000
+
+# # # # # # # # # # #
+# Input
+# # # # # # # # # # #
+
+def iter_records(path: str, start: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (position, record) pairs from a JSONL or Parquet file, skipping the first `start` records"""
+
+    if path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        position = 0
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+            if position + batch.num_rows <= start:
+                position += batch.num_rows
+                continue
+            for record in batch.to_pylist():
+                if position >= start:
+                    yield position, record
+                position += 1
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for position, line in enumerate(f):
+            if position < start:
+                continue
+            line = line.strip()
+            if not line:
+                yield position, None
+                continue
+            try:
+                yield position, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield position, {'_error': f"Invalid JSON: {str(e)}"}
+
+# # # # # # # # # # #
+# Normalization
+# # # # # # # # # # #
+
+def document_id_for(source_url: str) -> str:
+    return hashlib.sha1(source_url.encode('utf-8')).hexdigest()[:20]
+
+def sampling_key(document_id: str) -> float:
+    """Uniform value in [0, 1) used to pick random case studies; stable across re-imports"""
+    return int(hashlib.sha1(f"sample:{document_id}".encode('utf-8')).hexdigest()[:12], 16) / 16 ** 12
+
+def _as_timestamp(value):
+    """Store ISO date strings from JSON inputs as timestamps"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def normalize_case_study(record: Optional[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """Validate and normalize an input record. Returns (document ID, document); raises ValueError if invalid."""
+
+    if not record:
+        raise ValueError("Empty record")
+    if '_error' in record:
+        raise ValueError(record['_error'])
+
+    source_url = str(record.get('source_url') or "").strip()
+    if not source_url.startswith(("http://", "https://")):
+        raise ValueError(f"Invalid source_url: '{source_url}'")
+
+    clean_url = URLHelper.clean_url(source_url)
+    if clean_url == "https://":
+        raise ValueError(f"No domain in source_url: '{source_url}'")
+
+    content = record.get('case_study_final')
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("Missing case_study_final")
+
+    for field in ('case_study_summary', 'classification'):
+        if record.get(field) is not None and not isinstance(record[field], dict):
+            raise ValueError(f"Invalid {field}: expected an object")
+
+    document_id = str(record.get('id') or document_id_for(source_url))
+
+    document = {key: value for key, value in record.items() if key != 'id' and value is not None}
+    document.update({
+        'source_url': source_url,
+        'clean_url': clean_url,
+        'case_study_final': clean_case_study_content(content).strip(),
+        'random_key': sampling_key(document_id),
+        'created_at': _as_timestamp(record.get('created_at')) or firestore.SERVER_TIMESTAMP,
+        'updated_at': firestore.SERVER_TIMESTAMP
+    })
+    return document_id, document
+
+# # # # # # # # # # #
+# Checkpoints
+# # # # # # # # # # #
+
+def checkpoint_path(input_path: str, collection_name: str) -> str:
+    name = os.path.basename(input_path)
+    return os.path.join(IMPORTS_DIR, f"{collection_name}-{name}.checkpoint.json")
+
+def _input_signature(input_path: str) -> Dict[str, Any]:
+    stat = os.stat(input_path)
+    return {'input': os.path.abspath(input_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def load_checkpoint(path: str, input_path: str) -> Optional[Dict[str, Any]]:
+    """Return the checkpoint of a previous run of the same input, or None"""
+
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    signature = _input_signature(input_path)
+    if any(checkpoint.get(key) != value for key, value in signature.items()):
+        raise ValueError(f"{input_path} changed since the checkpoint in {path}; use --restart to import it again")
+    return checkpoint
+
+# # # # # # # # # # #
+# Import
+# # # # # # # # # # #
+
+def import_case_studies(
+    input_path: str,
+    collection_name: str = DEFAULT_COLLECTION,
+    max_writers: int = DEFAULT_WRITERS,
+    batch_size: int = MAX_BATCH_WRITES,
+    restart: bool = False,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """Import a JSONL or Parquet file, resuming from its checkpoint. Returns the final checkpoint."""
+
+    path = checkpoint_path(input_path, collection_name)
+    checkpoint = None if restart else load_checkpoint(path, input_path)
+    if checkpoint and checkpoint.get('completed'):
+        logger.info(f"{input_path} was already imported into {collection_name}")
+        return checkpoint
+
+    checkpoint = checkpoint or dict(
+        _input_signature(input_path),
+        collection=collection_name,
+        position=0,
+        imported=0,
+        rejected=0,
+        completed=False,
+        started_at=datetime.now(timezone.utc).isoformat()
+    )
+    start = checkpoint['position']
+    if start:
+        logger.info(f"Resuming import of {input_path} at record {start}")
+
+    rejects_path = path.replace(".checkpoint.json", ".rejected.jsonl")
+    # Records not yet known to be committed: position -> rejection error, or None for a write.
+    # Only records up to the low watermark are counted; those after it are read again on resume.
+    pending = OrderedDict()
+    checkpoint_lock = threading.Lock()
+    started = datetime.now(timezone.utc)
+
+    def _count_through(committed_through: Optional[int]):
+        while pending and (committed_through is None or next(iter(pending)) <= committed_through):
+            position, error = pending.popitem(last=False)
+            if error is None:
+                checkpoint['imported'] += 1
+            else:
+                checkpoint['rejected'] += 1
+                rejects.write(json.dumps({'position': position, 'error': error}) + "\n")
+        rejects.flush()
+
+    def _on_commit(writes: int, committed_through: int):
+        with checkpoint_lock:
+            _count_through(committed_through)
+            checkpoint['position'] = max(checkpoint['position'], committed_through + 1)
+            checkpoint['updated_at'] = datetime.now(timezone.utc).isoformat()
+            save_checkpoint(path, checkpoint)
+
+    db = get_db()
+    collection = db.collection(collection_name)
+    processed = 0
+    last_position = start - 1
+
+    os.makedirs(IMPORTS_DIR, exist_ok=True)
+    # The rejected records of the previous runs are kept up to the checkpoint
+    with open(rejects_path, 'a' if start else 'w', encoding='utf-8') as rejects:
+        with BatchWriter(db, batch_size=batch_size, max_writers=max_writers, on_commit=_on_commit) as writer:
+            for position, record in iter_records(input_path, start):
+                if limit is not None and processed >= limit:
+                    break
+                processed += 1
+                last_position = position
+                try:
+                    document_id, document = normalize_case_study(record)
+                except ValueError as e:
+                    with checkpoint_lock:
+                        pending[position] = str(e)
+                    continue
+                with checkpoint_lock:
+                    pending[position] = None
+                writer.set(collection.document(document_id), document, sequence=position)
+
+        # Every batch is committed: the import went through the last record read
+        with checkpoint_lock:
+            _count_through(None)
+            checkpoint['position'] = max(checkpoint['position'], last_position + 1)
+            checkpoint['completed'] = limit is None or processed < limit
+            checkpoint['updated_at'] = datetime.now(timezone.utc).isoformat()
+            save_checkpoint(path, checkpoint)
+
+    elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+    logger.info(
+        f"Imported {checkpoint['imported']} case studies into {collection_name} "
+        f"({checkpoint['rejected']} rejected, {processed} records read in {elapsed:.1f}s)"
+    )
+    return checkpoint
+
+def main():
+    parser = argparse.ArgumentParser(description="Import case studies from a JSONL or Parquet file")
+    parser.add_argument("input", help="JSONL or Parquet file")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS, help="Number of batches committed in parallel")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_WRITES)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many records (the import can be resumed)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the first record")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    import_case_studies(args.input, args.collection, args.writers, args.batch_size, args.restart, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Lazy document views for the Case Study Evaluation Hub.
+A read-only mapping over a document snapshot that decodes each field the first time it is
+read and caches it, instead of converting the whole document with `to_dict()`.
+
+Scans that only look at a few fields of each document (`source_url`, `evaluator_email`...)
+then skip the cost of the others, such as the case study bodies and summaries: the local
+backend keeps fields encoded until they are read, and Firestore snapshots are read without
+the deep copy `to_dict()` makes of every field (see `snapshot_data`).
+
+    for doc in db.collection('case_studies_v2').stream():
+        view = DocumentView(doc)
+        if view.get('source_url'):
+            ...
+
+Values are shared with the snapshot and must not be modified; use `to_dict()` for a copy.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+_MISSING = object()
+
+def snapshot_data(snapshot) -> Optional[Dict[str, Any]]:
+    """
+    Decoded fields of a Firestore snapshot, without copying them.
+    google-cloud-firestore keeps them in the private `_data` attribute; this is the only place
+    that reads it. If a release no longer has it, fall back to the public `to_dict()`.
+    """
+    data = getattr(snapshot, '_data', _MISSING)
+    if data is _MISSING:
+        return snapshot.to_dict()
+    return data
+
+class DocumentView(Mapping):
+    """Read-only, lazily decoded view of a document snapshot"""
+
+    __slots__ = ('id', '_snapshot', '_cache', '_data')
+
+    def __init__(self, snapshot):
+        self.id = snapshot.id
+        self._snapshot = snapshot
+        self._cache = {}
+        self._data = _MISSING
+
+    @property
+    def exists(self) -> bool:
+        return self._snapshot.exists
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def _firestore_data(self) -> Dict[str, Any]:
+        if self._data is _MISSING:
+            self._data = snapshot_data(self._snapshot) or {}
+        return self._data
+
+    def _decode(self, field: str) -> Any:
+        snapshot = self._snapshot
+        # Local snapshots decode a single field on demand
+        get_field = getattr(snapshot, 'get_field', None)
+        if get_field is not None:
+            return get_field(field, _MISSING)
+        # Firestore snapshots are already decoded: read the value without copying the document
+        return self._firestore_data().get(field, _MISSING)
+
+    def _value(self, field: str) -> Any:
+        value = self._cache.get(field, _MISSING)
+        if value is _MISSING:
+            value = self._decode(field)
+            if value is not _MISSING:
+                self._cache[field] = value
+        return value
+
+    def __getitem__(self, field: str) -> Any:
+        value = self._value(field)
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field: str, default: Any = None) -> Any:
+        value = self._value(field)
+        return default if value is _MISSING else value
+
+    def __contains__(self, field: object) -> bool:
+        return isinstance(field, str) and self._value(field) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        field_names = getattr(self._snapshot, 'field_names', None)
+        if field_names is not None:
+            return iter(field_names())
+        return iter(self._firestore_data())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Independent copy of the whole document"""
+        return self._snapshot.to_dict()
+
+    def __repr__(self) -> str:
+        return f"DocumentView({self.id!r})"
@@ -1,45 +1,38 @@
 from collections import defaultdict
 from statistics import mean
 
-from utils.firestore_manager import get_db
+from utils.aggregators import Count, Counter, GroupStats, TopK, aggregate
+from utils.instrumentation import instrumented
+from utils.parallel_scan import parallel_scan
+from utils.records import CaseStudy, Evaluation
 
 # Configure logging
 import logging
 logger = logging.getLogger(__name__)
 
+# Improvement area excluded from the filtered Team Summary statistics
+RELEVANCE_AREA = 'Relevance (Alignment with AI case study goals)'
+
+# Number of evaluations per batch yielded by iter_evaluation_batches
+EVALUATION_BATCH_SIZE = 500
+
+# Number of evaluations listed under the Top and Lowest Scoring Evaluations
+TOP_EVALUATIONS = 10
+
+@instrumented
 def get_all_evaluations(evaluations_collection_name, case_studies_collection_name):
     """Fetch all evaluations using the firestore manager's db connection and merge with case study information"""
 
     try:
         
-        db = get_db()
-        evaluations_ref = db.collection(evaluations_collection_name)
-        case_studies_ref = db.collection(case_studies_collection_name)
+        # Decode the case studies once; their evaluations share the same record
+        case_studies = load_case_studies(case_studies_collection_name)
         
-        # Create a dictionary of case studies with their URLs and summaries
-        case_studies = {}
-        for case in case_studies_ref.stream():
-            case_data = case.to_dict()
-            case_studies[case.id] = {
-                'source_url': case_data.get('source_url', 'No URL provided'),
-                'case_study_final': case_data.get('case_study_final', 'No summary available')
-            }
-        
-        # Fetch evaluations and merge with case study data
+        # Fetch evaluations and join them with their case study
         evaluations = []
-        for eval in evaluations_ref.stream():
-            eval_data = eval.to_dict()
-            case_study_id = eval_data.get('case_study_id')
-            
-            # Add case study data if available
-            if case_study_id and case_study_id in case_studies:
-                eval_data['source_url'] = case_studies[case_study_id]['source_url']
-                eval_data['case_study_final'] = case_studies[case_study_id]['case_study_final']
-            else:
-                eval_data['source_url'] = 'No URL provided'
-                eval_data['case_study_final'] = 'No summary available'
-            
-            evaluations.append(eval_data)
+        for eval in parallel_scan(evaluations_collection_name):
+            evaluation = Evaluation.from_document(eval.id, eval.to_dict())
+            evaluations.append(evaluation.join(case_studies.get(evaluation.case_study_id)))
         
         return evaluations
     
@@ -47,6 +40,157 @@ def get_all_evaluations(evaluations_collection_name, case_studies_collection_nam
         logger.error(f"Error fetching evaluations: {str(e)}")
         return []
 
+@instrumented
+def load_case_studies(case_studies_collection_name):
+    """Case study records by ID, with the fields joined to evaluations"""
+
+    case_studies = {}
+    for case in parallel_scan(case_studies_collection_name, field_paths=['source_url', 'case_study_final']):
+        case_studies[case.id] = CaseStudy.from_document(case.id, case.to_dict())
+    return case_studies
+
+@instrumented
+def iter_evaluation_batches(evaluations_collection_name, batch_size=EVALUATION_BATCH_SIZE):
+    """Yield lists of evaluation records (not joined with their case study) as they are read"""
+
+    batch = []
+    for eval in parallel_scan(evaluations_collection_name):
+        batch.append(Evaluation.from_document(eval.id, eval.to_dict()))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def join_case_studies(evaluations, case_studies):
+    """Attach their case study to evaluation records"""
+    for evaluation in evaluations:
+        evaluation.join(case_studies.get(evaluation.case_study_id))
+    return evaluations
+
+def _evaluator(evaluation):
+    return evaluation.get('evaluator_email')
+
+def _score(evaluation):
+    return evaluation.get('evaluation_score')
+
+def _score_and_timestamp(evaluation):
+    # The evaluation ID breaks ties, as the scans yield evaluations in no fixed order
+    return (evaluation['evaluation_score'], evaluation['timestamp'] if 'timestamp' in evaluation else '0', evaluation.get('id') or '')
+
+def _has_score(evaluation):
+    return 'evaluation_score' in evaluation and evaluation['evaluation_score'] is not None
+
+def _average_of_evaluator_means(evaluator_stats, log=True):
+    """Mean of the evaluator means computed by a GroupStats aggregator"""
+
+    # Calculate average for each evaluator
+    evaluator_averages = []
+    for email, stats in evaluator_stats.items():
+        evaluator_averages.append(stats['mean'])
+        if log:
+            logger.info(f"Evaluator {email}: average score {round(stats['mean'], 1)} from {stats['count']} evaluations")
+    
+    # Calculate overall average (mean of evaluator means)
+    if evaluator_averages:
+        overall_avg = mean(evaluator_averages)
+        if log:
+            logger.info(f"Overall average (across {len(evaluator_averages)} evaluators): {round(overall_avg, 1)}")
+        return round(overall_avg, 1)
+        
+    return 0
+
+def _format_user_statistics(user_stats):
+    """Rows of the Users Analysis table from a GroupStats aggregator, sorted by email"""
+
+    user_summaries = []
+    for email, stats in user_stats.items():
+        user_summaries.append({
+            'User': email,
+            'Forms Submitted': stats['count'],
+            'Average Score': f"{round(stats['mean'], 1)}/10",
+            'Min Score': f"{stats['min']}/10",
+            'Max Score': f"{stats['max']}/10"
+        })
+    
+    # Sort alphabetically by email
+    return sorted(user_summaries, key=lambda x: x['User'].lower())
+
+def _format_improvement_areas(citations):
+    """Rows of the Improvement Areas table from (area, user) citation counts"""
+
+    # Group by improvement area
+    area_stats = defaultdict(lambda: {'count': 0, 'users': {}})
+    for (area, user), count in citations.items():
+        area_stats[area]['count'] += count
+        area_stats[area]['users'][user] = count
+    
+    # Format results
+    area_summaries = []
+    for area, stats in area_stats.items():
+        # Format user citations
+        user_citations = []
+        for user, count in sorted(stats['users'].items()):
+            user_citations.append(f"{user} ({count})")
+        
+        area_summaries.append({
+            'Improvement Area': area,
+            'Total Citations': stats['count'],
+            'Users Citing': ', '.join(user_citations)
+        })
+    
+    # Sort by total citations (descending), then by area
+    return sorted(area_summaries, key=lambda x: (-x['Total Citations'], x['Improvement Area']))
+
+def _area_citation(evaluation):
+    if 'improvement_area' in evaluation and 'evaluator_email' in evaluation:
+        return [(evaluation['improvement_area'], evaluation['evaluator_email'])]
+    return None
+
+def _is_relevance(evaluation):
+    return evaluation.get('improvement_area', '') == RELEVANCE_AREA
+
+class TeamSummaryStats:
+    """Headline statistics of the Team Summary, updated batch by batch while evaluations stream in"""
+
+    def __init__(self):
+        self.total = Count()
+        self.filtered = Count(where=lambda evaluation: not _is_relevance(evaluation))
+        self.scores = GroupStats(_evaluator, _score)
+        self.filtered_scores = GroupStats(lambda evaluation: None if _is_relevance(evaluation) else _evaluator(evaluation), _score)
+        self.citations = Counter(_area_citation)
+        self.top = TopK(TOP_EVALUATIONS, key=_score_and_timestamp, where=_has_score)
+        self.lowest = TopK(TOP_EVALUATIONS, key=_score_and_timestamp, largest=False, where=_has_score)
+
+    def add(self, evaluations):
+        aggregate(evaluations, {
+            'total': self.total,
+            'filtered': self.filtered,
+            'scores': self.scores,
+            'filtered_scores': self.filtered_scores,
+            'citations': self.citations,
+            'top': self.top,
+            'lowest': self.lowest
+        })
+
+    def average_score(self):
+        return _average_of_evaluator_means(self.scores.result(), log=False)
+
+    def filtered_average_score(self):
+        return _average_of_evaluator_means(self.filtered_scores.result(), log=False)
+
+    def user_statistics(self):
+        return _format_user_statistics(self.scores.result())
+
+    def improvement_areas(self):
+        return _format_improvement_areas(self.citations.result())
+
+    def top_scoring(self):
+        return self.top.result()
+
+    def lowest_scoring(self):
+        return self.lowest.result()
+
 def calculate_average_score(evaluations):
     """
     Calculate the average score from evaluations, where each evaluator's contribution
@@ -55,30 +199,9 @@ def calculate_average_score(evaluations):
     """
     try:
 
-        # Group evaluations by evaluator
-        evaluator_scores = defaultdict(list)
-        
-        # Collect all scores for each evaluator
-        for eval in evaluations:
-            if 'evaluation_score' in eval and 'evaluator_email' in eval:
-                email = eval['evaluator_email']
-                score = eval['evaluation_score']
-                evaluator_scores[email].append(score)
-        
-        # Calculate average for each evaluator
-        evaluator_averages = []
-        for email, scores in evaluator_scores.items():
-            evaluator_avg = mean(scores)
-            evaluator_averages.append(evaluator_avg)
-            logger.info(f"Evaluator {email}: average score {round(evaluator_avg, 1)} from {len(scores)} evaluations")
-        
-        # Calculate overall average (mean of evaluator means)
-        if evaluator_averages:
-            overall_avg = mean(evaluator_averages)
-            logger.info(f"Overall average (across {len(evaluator_averages)} evaluators): {round(overall_avg, 1)}")
-            return round(overall_avg, 1)
-            
-        return 0
+        # Accumulate the scores of each evaluator
+        evaluator_stats = aggregate(evaluations, {'scores': GroupStats(_evaluator, _score)})['scores']
+        return _average_of_evaluator_means(evaluator_stats)
     
     except Exception as e:
         logger.error(f"Error calculating average score: {str(e)}")
@@ -88,74 +211,31 @@ def calculate_user_statistics(evaluations):
     """Calculate statistics per user"""
 
     try:
-        # Group evaluations by user
-        user_stats = defaultdict(lambda: {'scores': [], 'count': 0})
-        
-        for eval in evaluations:
-            if 'evaluator_email' in eval and 'evaluation_score' in eval:
-                email = eval['evaluator_email']
-                user_stats[email]['scores'].append(eval['evaluation_score'])
-                user_stats[email]['count'] += 1
-        
-        # Calculate statistics and format results
-        user_summaries = []
-        for email, stats in user_stats.items():
-            scores = stats['scores']
-            user_summaries.append({
-                'User': email,
-                'Forms Submitted': stats['count'],
-                'Average Score': f"{round(mean(scores), 1)}/10" if scores else "0/10",
-                'Min Score': f"{min(scores)}/10" if scores else "N/A",
-                'Max Score': f"{max(scores)}/10" if scores else "N/A"
-            })
-        
-        # Sort alphabetically by email
-        return sorted(user_summaries, key=lambda x: x['User'].lower())
+        # Accumulate count, sum, min and max per user
+        user_stats = aggregate(evaluations, {'users': GroupStats(_evaluator, _score)})['users']
+        return _format_user_statistics(user_stats)
     
     except Exception as e:
         logger.error(f"Error calculating user statistics: {str(e)}")
         return []
 
-def analyze_top_scoring_evaluations(evaluations, limit=10):
+def analyze_top_scoring_evaluations(evaluations, limit=TOP_EVALUATIONS):
     """Analyze and return the top scoring evaluations"""
     try:
-        # Filter out evaluations without scores and sort them
-        scored_evaluations = [
-            eval for eval in evaluations 
-            if 'evaluation_score' in eval and eval['evaluation_score'] is not None
-        ]
-        
-        # Sort by score (highest first) and timestamp
-        sorted_evaluations = sorted(
-            scored_evaluations,
-            key=lambda x: (x['evaluation_score'], x['timestamp'] if 'timestamp' in x else '0'),
-            reverse=True
-        )
-        
-        # Return top N evaluations
-        return sorted_evaluations[:limit]
+        # Keep the highest scores (then latest timestamps) in a bounded heap
+        top = TopK(limit, key=_score_and_timestamp, where=_has_score)
+        return aggregate(evaluations, {'top': top})['top']
     
     except Exception as e:
         logger.error(f"Error analyzing top scoring evaluations: {str(e)}")
         return []
 
-def analyze_lowest_scoring_evaluations(evaluations, limit=10):
+def analyze_lowest_scoring_evaluations(evaluations, limit=TOP_EVALUATIONS):
     """Analyze and return the lowest scoring evaluations"""
     try:
-        # Filter out evaluations without scores and sort them
-        scored_evaluations = [
-            eval for eval in evaluations 
-            if 'evaluation_score' in eval and eval['evaluation_score'] is not None
-        ]
-        
-        # Sort by score (lowest first) and timestamp
-        sorted_evaluations = sorted(
-            scored_evaluations,
-            key=lambda x: (x['evaluation_score'], x['timestamp'] if 'timestamp' in x else '0')
-        )
-        
-        # Return bottom N evaluations
-        return sorted_evaluations[:limit]
+        # Keep the lowest scores (then earliest timestamps) in a bounded heap
+        lowest = TopK(limit, key=_score_and_timestamp, largest=False, where=_has_score)
+        return aggregate(evaluations, {'lowest': lowest})['lowest']
     
     except Exception as e:
         logger.error(f"Error analyzing lowest scoring evaluations: {str(e)}")
@@ -166,32 +246,9 @@ def analyze_improvement_areas(evaluations):
 
     try:
     
-        # Group by improvement area
-        area_stats = defaultdict(lambda: {'count': 0, 'users': defaultdict(int)})
-        
-        for eval in evaluations:
-            if 'improvement_area' in eval and 'evaluator_email' in eval:
-                area = eval['improvement_area']
-                user = eval['evaluator_email']
-                area_stats[area]['count'] += 1
-                area_stats[area]['users'][user] += 1
-        
-        # Format results
-        area_summaries = []
-        for area, stats in area_stats.items():
-            # Format user citations
-            user_citations = []
-            for user, count in stats['users'].items():
-                user_citations.append(f"{user} ({count})")
-            
-            area_summaries.append({
-                'Improvement Area': area,
-                'Total Citations': stats['count'],
-                'Users Citing': ', '.join(user_citations)
-            })
-        
-        # Sort by total citations (descending)
-        return sorted(area_summaries, key=lambda x: x['Total Citations'], reverse=True)
+        # Count the citations of each (area, user) pair
+        citations = aggregate(evaluations, {'citations': Counter(_area_citation)})['citations']
+        return _format_improvement_areas(citations)
     
     except Exception as e:
         logger.error(f"Error analyzing improvement areas: {str(e)}")
@@ -221,6 +278,7 @@ def analyze_improvement_areas_detailed(evaluations):
                 area_stats[area]['count'] += 1
                 area_stats[area]['users'][user] += 1
                 area_stats[area]['feedbacks'].append({
+                    'id': eval.get('id', ''),
                     'user': user,
                     'feedback': feedback,
                     'timestamp': timestamp,
@@ -231,10 +289,11 @@ def analyze_improvement_areas_detailed(evaluations):
         # Format results
         area_summaries = []
         for area, stats in area_stats.items():
-            # Sort feedbacks by score (highest first), then by timestamp
+            # Sort feedbacks by score (highest first), then by timestamp and evaluation ID
             feedbacks = sorted(stats['feedbacks'], 
                             key=lambda x: (x['score'] if isinstance(x['score'], (int, float)) else 0,
-                                        x['timestamp'] if x['timestamp'] else '0'),
+                                        x['timestamp'] if x['timestamp'] else '0',
+                                        x['id']),
                             reverse=True)
             
             area_summaries.append({
@@ -243,8 +302,8 @@ def analyze_improvement_areas_detailed(evaluations):
                 'feedbacks': feedbacks
             })
         
-        # Sort by count (descending)
-        return sorted(area_summaries, key=lambda x: x['count'], reverse=True)
+        # Sort by count (descending), then by area
+        return sorted(area_summaries, key=lambda x: (-x['count'], x['area']))
     
     except Exception as e:
         logger.error(f"Error analyzing detailed improvement areas: {str(e)}")
@@ -266,6 +325,7 @@ def analyze_user_details(evaluations):
                 user = eval['evaluator_email']
                 user_details[user]['count'] += 1
                 user_details[user]['evaluations'].append({
+                    'id': eval.get('id', ''),
                     'improvement_area': eval.get('improvement_area', 'Not specified'),
                     'feedback': eval.get('improvement_feedback', 'No feedback provided'),
                     'score': eval.get('evaluation_score', 0),  # Default to 0 for sorting
@@ -277,10 +337,11 @@ def analyze_user_details(evaluations):
         # Format and sort evaluations for each user
         user_summaries = []
         for user, details in user_details.items():
-            # Sort evaluations by score (highest first), then by timestamp if scores are equal
+            # Sort evaluations by score (highest first), then by timestamp and evaluation ID if scores are equal
             evaluations = sorted(details['evaluations'],
                               key=lambda x: (x['score'] if isinstance(x['score'], (int, float)) else 0, 
-                                          x['timestamp'] if x['timestamp'] else '0'),
+                                          x['timestamp'] if x['timestamp'] else '0',
+                                          x['id']),
                               reverse=True)
             
             user_summaries.append({
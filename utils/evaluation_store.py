@@ -0,0 +1,385 @@
+"""
+Session store of the user's evaluations for the Case Study Evaluation Hub.
+The User Summary reads the evaluations of the current user from this store instead of
+Firestore on every rerun. Evaluations are loaded page by page, newest first, following a
+Firestore cursor, and only as far as the user pages; their total comes from an aggregation
+query. Saves and deletes update the store immediately (optimistically), while the write
+itself runs in the background.
+
+    store = get_evaluation_store("evaluations_v2", "case_studies_v2")
+    rows = store.page(0, 20)             # loads the first 20 evaluations
+    store.save(evaluation, case_study)   # listed first right away
+    store.delete(evaluation_id)          # removed right away
+    store.delete_many(evaluation_ids)    # bulk operations, written in batches of up to 500
+    store.update_improvement_area(evaluation_ids, area)
+    for message in store.pop_errors():   # writes that failed, and were rolled back
+        st.error(message)
+
+The loaded evaluations are always the newest ones, so writes keep them consistent with the
+cursor: a saved evaluation is the newest and goes first, a deleted one is removed.
+Writes of a session are applied in order. Once a save is committed, its document is read back
+to reconcile the server-side fields (the timestamp); a failed write restores the previous
+state and calls the write's `on_rollback` callback with the IDs of the evaluations concerned,
+so that the caller can undo its own side effects (the prefetcher exclusions). Bulk operations update the store once for the whole selection and are written with
+batched writes; if a batch fails, the evaluations not known to be written are restored and the
+store is reloaded, as earlier batches may have been committed. The store is also reloaded in the background when it is older than RELOAD_INTERVAL,
+to pick up changes made from other sessions.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+from utils.firestore_manager import USER_EVALUATIONS_PAGE_SIZE
+from utils.firestore_manager import count_user_evaluations, delete_evaluation, delete_evaluations, get_db, get_user_evaluations_page
+from utils.firestore_manager import save_evaluation, update_improvement_areas
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds after which the evaluations are reloaded from Firestore in the background
+RELOAD_INTERVAL = 300
+
+# Background writes shared by all sessions
+MAX_STORE_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_STORE_WORKERS, thread_name_prefix="evaluation-store")
+_stores = weakref.WeakSet()
+
+class EvaluationStore:
+    """Evaluations of one user, loaded page by page, updated optimistically and written in the background"""
+
+    def __init__(self, user_email: str, evaluations_collection_name: str, case_studies_collection_name: str):
+        self.user_email = user_email
+        self.evaluations_collection_name = evaluations_collection_name
+        self.case_studies_collection_name = case_studies_collection_name
+        self._lock = threading.Lock()
+        self._errors = []
+
+        # Newest evaluations loaded so far by ID, the cursor after them and the total count
+        self._evaluations = None
+        self._cursor = None
+        self._exhausted = False
+        self._count = 0
+        self._loaded_at = 0.0
+
+        # Serializes the Firestore loads, so that pages follow each other
+        self._load_lock = threading.Lock()
+
+        # Writes not yet applied, run one at a time in submission order
+        self._operations = deque()
+        self._draining = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+        _stores.add(self)
+
+    # # # # # # # # # # #
+    # Reads
+    # # # # # # # # # # #
+
+    def _load_first_page(self, page_size: int) -> Dict[str, Any]:
+        count = count_user_evaluations(self.user_email, self.evaluations_collection_name)
+        evaluations, cursor = get_user_evaluations_page(
+            self.user_email, self.evaluations_collection_name, self.case_studies_collection_name, page_size
+        )
+        return {
+            'evaluations': {evaluation['id']: evaluation for evaluation in evaluations},
+            'cursor': cursor,
+            'count': count
+        }
+
+    def _apply_first_page(self, loaded: Dict[str, Any]):
+        self._evaluations = loaded['evaluations']
+        self._cursor = loaded['cursor']
+        self._exhausted = loaded['cursor'] is None
+        self._count = loaded['count']
+        self._loaded_at = time.monotonic()
+
+    def _load(self, needed: int, page_size: int):
+        """Load pages until `needed` evaluations are loaded or none are left"""
+
+        with self._lock:
+            loaded = self._evaluations is not None
+        if not loaded:
+            # Writes made before the first load are committed first, so that it includes them
+            self.wait()
+
+        with self._load_lock:
+            if not loaded:
+                first_page = self._load_first_page(page_size)
+                with self._lock:
+                    if self._evaluations is None:
+                        self._apply_first_page(first_page)
+
+            while True:
+                with self._lock:
+                    if self._exhausted or len(self._evaluations) >= needed:
+                        return
+                    cursor = self._cursor
+                    # After deletes, only the evaluations missing from the page are read
+                    missing = needed - len(self._evaluations)
+                evaluations, next_cursor = get_user_evaluations_page(
+                    self.user_email, self.evaluations_collection_name, self.case_studies_collection_name,
+                    missing, start_after=cursor
+                )
+                with self._lock:
+                    for evaluation in evaluations:
+                        # Saved again meanwhile: already listed first
+                        self._evaluations.setdefault(evaluation['id'], evaluation)
+                    self._cursor = next_cursor
+                    self._exhausted = next_cursor is None
+
+    def page(self, index: int, page_size: int = USER_EVALUATIONS_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """Evaluations of a page, newest first, including the writes still in flight"""
+
+        self._load((index + 1) * page_size, page_size)
+
+        with self._lock:
+            if time.monotonic() - self._loaded_at > RELOAD_INTERVAL:
+                # Do not schedule another reload before this one is applied
+                self._loaded_at = time.monotonic()
+                self._submit_locked(lambda: self._reload(page_size))
+            return list(self._evaluations.values())[index * page_size:(index + 1) * page_size]
+
+    def count(self) -> int:
+        """Total number of evaluations of the user, including the writes still in flight"""
+
+        self._load(0, USER_EVALUATIONS_PAGE_SIZE)
+        with self._lock:
+            return self._count
+
+    def pop_errors(self) -> List[str]:
+        """Messages of the writes that failed since the last call"""
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    # # # # # # # # # # #
+    # Optimistic writes
+    # # # # # # # # # # #
+
+    def save(self, evaluation: Dict[str, Any], case_study, on_rollback: Optional[Callable[[List[str]], None]] = None) -> Dict[str, Any]:
+        """List an evaluation first right away and save it in the background"""
+
+        # Shown as the user summary lists it, until the saved document is read back
+        entry = {
+            **evaluation,
+            'timestamp': datetime.now(timezone.utc),
+            'case_study_url': case_study.get('source_url', 'N/A'),
+            'case_study_content': case_study.get('case_study_final', 'N/A')
+        }
+        with self._lock:
+            position, previous = None, None
+            if self._evaluations is not None:
+                if entry['id'] in self._evaluations:
+                    position = list(self._evaluations).index(entry['id'])
+                    previous = self._evaluations.pop(entry['id'])
+                else:
+                    self._count += 1
+                # The newest evaluation is listed first
+                self._evaluations = {entry['id']: entry, **self._evaluations}
+            self._submit_locked(lambda: self._save(dict(evaluation), entry, previous, position, on_rollback))
+        return entry
+
+    def delete(self, evaluation_id: str, on_rollback: Optional[Callable[[List[str]], None]] = None):
+        """Remove an evaluation right away and delete it in the background"""
+
+        with self._lock:
+            position, previous = None, None
+            if self._evaluations is not None and evaluation_id in self._evaluations:
+                position = list(self._evaluations).index(evaluation_id)
+                previous = self._evaluations.pop(evaluation_id)
+                self._count -= 1
+            self._submit_locked(lambda: self._delete(evaluation_id, previous, position, on_rollback))
+
+    def delete_many(self, evaluation_ids: List[str], on_rollback: Optional[Callable[[List[str]], None]] = None):
+        """Remove evaluations right away and delete them in the background, with batched writes"""
+
+        evaluation_ids = list(dict.fromkeys(evaluation_ids))
+        with self._lock:
+            removed = []
+            if self._evaluations is not None:
+                selected = set(evaluation_ids)
+                removed = [
+                    (position, evaluation_id, evaluation)
+                    for position, (evaluation_id, evaluation) in enumerate(self._evaluations.items())
+                    if evaluation_id in selected
+                ]
+                self._evaluations = {key: value for key, value in self._evaluations.items() if key not in selected}
+                self._count -= len(removed)
+            self._submit_locked(lambda: self._delete_many(evaluation_ids, removed, on_rollback))
+
+    def update_improvement_area(self, evaluation_ids: List[str], improvement_area: str):
+        """Set the improvement area of evaluations right away and write it in the background, with batched writes"""
+
+        evaluation_ids = list(dict.fromkeys(evaluation_ids))
+        with self._lock:
+            updated = {}
+            if self._evaluations is not None:
+                for evaluation_id in evaluation_ids:
+                    previous = self._evaluations.get(evaluation_id)
+                    if previous is not None:
+                        entry = {**previous, 'improvement_area': improvement_area}
+                        self._evaluations[evaluation_id] = entry
+                        updated[evaluation_id] = (previous, entry)
+            self._submit_locked(lambda: self._update_improvement_area(evaluation_ids, improvement_area, updated))
+
+    @staticmethod
+    def _rolled_back(on_rollback: Optional[Callable[[List[str]], None]], evaluation_ids: List[str]):
+        """Let the caller undo its side effects of failed writes (called without the lock)"""
+
+        if on_rollback is None or not evaluation_ids:
+            return
+        try:
+            on_rollback(evaluation_ids)
+        except Exception as e:
+            logger.error(f"Error in evaluation rollback callback: {str(e)}")
+
+    def _restore(self, entries: List[tuple]):
+        """Put evaluations back where they were, from (position, ID, evaluation) entries (called with the lock held)"""
+
+        restored = {evaluation_id for _, evaluation_id, _ in entries}
+        items = [(key, value) for key, value in self._evaluations.items() if key not in restored]
+        for position, evaluation_id, evaluation in sorted(entries, key=lambda entry: entry[0]):
+            items.insert(position, (evaluation_id, evaluation))
+        self._evaluations = dict(items)
+
+    def _save(self, evaluation: Dict[str, Any], entry: Dict[str, Any], previous: Optional[Dict[str, Any]], position: Optional[int],
+              on_rollback: Optional[Callable[[List[str]], None]]):
+        evaluation_id = entry['id']
+        if not save_evaluation(evaluation, self.evaluations_collection_name):
+            with self._lock:
+                # Roll back, unless a later write replaced the entry meanwhile
+                if self._evaluations is not None and self._evaluations.get(evaluation_id) is entry:
+                    if previous is None:
+                        del self._evaluations[evaluation_id]
+                        self._count -= 1
+                    else:
+                        self._restore([(position, evaluation_id, previous)])
+                self._errors.append("Your evaluation could not be saved. Please submit it again.")
+            self._rolled_back(on_rollback, [evaluation_id])
+            return
+
+        # Reconcile the fields set by the server
+        snapshot = get_db().collection(self.evaluations_collection_name).document(evaluation_id).get()
+        if snapshot.exists:
+            reconciled = {**entry, **snapshot.to_dict(), 'id': evaluation_id}
+            with self._lock:
+                if self._evaluations is not None and self._evaluations.get(evaluation_id) is entry:
+                    self._evaluations[evaluation_id] = reconciled
+
+    def _delete(self, evaluation_id: str, previous: Optional[Dict[str, Any]], position: Optional[int],
+                on_rollback: Optional[Callable[[List[str]], None]]):
+        if delete_evaluation(evaluation_id, self.evaluations_collection_name):
+            return
+
+        with self._lock:
+            # Put the evaluation back where it was, unless it was saved again meanwhile
+            if previous is not None and self._evaluations is not None and evaluation_id not in self._evaluations:
+                self._restore([(position, evaluation_id, previous)])
+                self._count += 1
+            self._errors.append("The evaluation could not be deleted. Please try again.")
+        self._rolled_back(on_rollback, [evaluation_id])
+
+    def _delete_many(self, evaluation_ids: List[str], removed: List[tuple], on_rollback: Optional[Callable[[List[str]], None]]):
+        deleted = delete_evaluations(evaluation_ids, self.evaluations_collection_name)
+        if deleted == len(evaluation_ids):
+            return
+
+        failed = set(evaluation_ids[deleted:])
+        with self._lock:
+            if self._evaluations is not None:
+                # Put back the evaluations not known to be deleted, unless saved again meanwhile
+                restored = [
+                    (position, evaluation_id, previous) for position, evaluation_id, previous in removed
+                    if evaluation_id in failed and evaluation_id not in self._evaluations
+                ]
+                self._restore(restored)
+                self._count += len(restored)
+                # Batches committed before the failure may include some of them: reload on the next page
+                self._loaded_at = 0.0
+            self._errors.append(f"{len(failed)} evaluations could not be deleted. Please try again.")
+        self._rolled_back(on_rollback, evaluation_ids[deleted:])
+
+    def _update_improvement_area(self, evaluation_ids: List[str], improvement_area: str, updated: Dict[str, tuple]):
+        written = update_improvement_areas(evaluation_ids, improvement_area, self.evaluations_collection_name)
+        if written == len(evaluation_ids):
+            return
+
+        failed = set(evaluation_ids[written:])
+        with self._lock:
+            if self._evaluations is not None:
+                # Roll back the evaluations not known to be updated, unless a later write replaced the entries meanwhile
+                for evaluation_id, (previous, entry) in updated.items():
+                    if evaluation_id in failed and self._evaluations.get(evaluation_id) is entry:
+                        self._evaluations[evaluation_id] = previous
+                # Batches committed before the failure may include some of them: reload on the next page
+                self._loaded_at = 0.0
+            self._errors.append(f"The improvement area of {len(failed)} evaluations could not be changed. Please try again.")
+
+    def _reload(self, page_size: int):
+        with self._load_lock:
+            first_page = self._load_first_page(page_size)
+            with self._lock:
+                # Writes queued during the reload may not be part of it: keep the current state then
+                if self._operations:
+                    self._loaded_at = 0.0
+                    return
+                self._apply_first_page(first_page)
+
+    # # # # # # # # # # #
+    # Background queue
+    # # # # # # # # # # #
+
+    def _submit_locked(self, operation: Callable[[], None]):
+        """Queue a background operation (called with the lock held, so that writes keep their order)"""
+
+        self._operations.append(operation)
+        self._idle.clear()
+        if not self._draining:
+            self._draining = True
+            _executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._operations:
+                    self._draining = False
+                    self._idle.set()
+                    return
+                operation = self._operations.popleft()
+            try:
+                operation()
+            except Exception as e:
+                logger.error(f"Error applying an evaluation write: {str(e)}")
+                with self._lock:
+                    self._errors.append("A change to your evaluations could not be applied. Please reload the page.")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write of the session is applied"""
+        return self._idle.wait(timeout)
+
+def get_evaluation_store(evaluations_collection_name: str, case_studies_collection_name: str) -> EvaluationStore:
+    """Evaluation store of the current session and user for a collection"""
+
+    state_key = f"evaluation_store_{evaluations_collection_name}"
+    store = st.session_state.get(state_key)
+    if store is None or store.user_email != st.session_state.email:
+        store = EvaluationStore(st.session_state.email, evaluations_collection_name, case_studies_collection_name)
+        st.session_state[state_key] = store
+    return store
+
+def wait_for_writes(timeout: Optional[float] = None):
+    """Wait for the background writes of every session (benchmarks and tests)"""
+
+    for store in list(_stores):
+        store.wait(timeout)
@@ -0,0 +1,412 @@
+"""
+Export module for the Case Study Evaluation Hub.
+Streams an evaluations collection, joined with case study metadata, to CSV, JSONL or Parquet.
+
+Evaluations are read in pages with a query cursor and written incrementally, so memory stays
+constant whatever the size of the collection. Field selection and date-range filters are pushed
+down to the Firestore queries. In the app, exports are written to EXPORT_DIR and removed once
+downloaded; the download button holds the file in memory while it is shown, so larger exports
+than MAX_DOWNLOAD_BYTES are left to the command line.
+
+    python -m utils.export --format parquet --output cache/exports/evaluations_v2.parquet
+    python -m utils.export --format csv --start-date 2025-03-01 --end-date 2025-04-01 \\
+        --fields evaluator_email,evaluation_score,timestamp --case-study-fields source_url
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.firestore_manager import get_db
+from utils.instrumentation import instrumented
+from utils.profiling import instrumented_fragment
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Evaluation fields exported by default
+EVALUATION_FIELDS = [
+    'case_study_id',
+    'evaluator_email',
+    'evaluation_score',
+    'improvement_area',
+    'improvement_feedback',
+    'timestamp'
+]
+
+# Case study fields joined by default (dot-separated paths are supported)
+CASE_STUDY_FIELDS = [
+    'source_url',
+    'classification.industry.category',
+    'classification.industry.subcategory'
+]
+
+# Prefix of the joined case study columns
+CASE_STUDY_PREFIX = "case_study."
+
+# Number of evaluations read per query
+PAGE_SIZE = 500
+
+# Number of joined case studies kept in memory between pages
+MAX_CACHED_CASE_STUDIES = 5000
+
+# Directory of the exports prepared in the app, until they are downloaded
+EXPORT_DIR = "cache/exports"
+
+# Largest export offered by the download button
+MAX_DOWNLOAD_BYTES = 50 * 1024 * 1024
+
+# Seconds after which exports prepared in the app but never downloaded are removed
+EXPORT_RETENTION_SECONDS = 3600
+
+def _get_path(data: Dict[str, Any], field_path: str) -> Any:
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _as_datetime(value, end_of_day: bool = False) -> Optional[datetime]:
+    """Accept dates, datetimes and ISO strings; naive values are taken as UTC"""
+
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value) if "T" in value or " " in value else date.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.max if end_of_day else time.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def export_columns(fields: List[str], case_study_fields: List[str]) -> List[str]:
+    return ['id'] + list(fields) + [CASE_STUDY_PREFIX + field for field in case_study_fields]
+
+# # # # # # # # # # #
+# Reading
+# # # # # # # # # # #
+
+def iter_evaluation_pages(
+    evaluations_collection_name: str,
+    fields: List[str],
+    start_date=None,
+    end_date=None,
+    page_size: int = PAGE_SIZE
+) -> Iterator[List[Any]]:
+    """Yield pages of evaluation snapshots, following a cursor on the last document of each page"""
+
+    db = get_db()
+    query = db.collection(evaluations_collection_name)
+
+    start, end = _as_datetime(start_date), _as_datetime(end_date, end_of_day=True)
+    if start or end:
+        # A range filter requires ordering on the same field first
+        if start:
+            query = query.where('timestamp', '>=', start)
+        if end:
+            query = query.where('timestamp', '<=', end)
+        query = query.order_by('timestamp')
+        fields = list(dict.fromkeys(list(fields) + ['timestamp']))
+    else:
+        query = query.order_by('__name__')
+
+    query = query.select(list(dict.fromkeys(list(fields) + ['case_study_id']))).limit(page_size)
+
+    last = None
+    while True:
+        page_query = query.start_after(last) if last is not None else query
+        page = list(page_query.stream())
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+class _CaseStudyCache:
+    """Case study metadata fetched in bulk per page and kept in a bounded LRU"""
+
+    def __init__(self, case_studies_collection_name: str, case_study_fields: List[str]):
+        self._collection = case_studies_collection_name
+        self._fields = case_study_fields
+        self._entries = OrderedDict()
+
+    def fetch(self, case_study_ids) -> Dict[str, Dict[str, Any]]:
+        missing = [case_study_id for case_study_id in dict.fromkeys(case_study_ids) if case_study_id and case_study_id not in self._entries]
+        if missing and self._fields:
+            db = get_db()
+            references = [db.collection(self._collection).document(case_study_id) for case_study_id in missing]
+            for snapshot in db.get_all(references, field_paths=self._fields):
+                data = snapshot.to_dict() if snapshot.exists else {}
+                self._entries[snapshot.id] = {field: _get_path(data or {}, field) for field in self._fields}
+
+        result = {}
+        for case_study_id in case_study_ids:
+            if case_study_id in self._entries:
+                self._entries.move_to_end(case_study_id)
+                result[case_study_id] = self._entries[case_study_id]
+
+        while len(self._entries) > MAX_CACHED_CASE_STUDIES:
+            self._entries.popitem(last=False)
+        return result
+
+def iter_export_rows(
+    evaluations_collection_name: str,
+    case_studies_collection_name: str,
+    fields: Optional[List[str]] = None,
+    case_study_fields: Optional[List[str]] = None,
+    start_date=None,
+    end_date=None,
+    page_size: int = PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of flat export rows"""
+
+    fields = list(fields or EVALUATION_FIELDS)
+    case_study_fields = list(CASE_STUDY_FIELDS if case_study_fields is None else case_study_fields)
+    case_studies = _CaseStudyCache(case_studies_collection_name, case_study_fields)
+
+    for page in iter_evaluation_pages(evaluations_collection_name, fields, start_date, end_date, page_size):
+        evaluations = [(snapshot.id, snapshot.to_dict() or {}) for snapshot in page]
+        joined = case_studies.fetch([data.get('case_study_id') for _, data in evaluations])
+
+        rows = []
+        for evaluation_id, data in evaluations:
+            row = {'id': evaluation_id}
+            for field in fields:
+                row[field] = _get_path(data, field)
+            metadata = joined.get(data.get('case_study_id'), {})
+            for field in case_study_fields:
+                row[CASE_STUDY_PREFIX + field] = metadata.get(field)
+            rows.append(row)
+        yield rows
+
+# # # # # # # # # # #
+# Writing
+# # # # # # # # # # #
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+def _arrow_type(column: str) -> pa.DataType:
+    if column == 'evaluation_score':
+        return pa.float64()
+    if column in ('timestamp', 'created_at', 'updated_at'):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+def _arrow_value(value, data_type: pa.DataType):
+    if value is None:
+        return None
+    if pa.types.is_timestamp(data_type):
+        return _as_datetime(value) if isinstance(value, (datetime, date, str)) else None
+    if pa.types.is_floating(data_type):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return _json_default(value) if not isinstance(value, str) else value
+
+@instrumented
+def export_evaluations(
+    output,
+    export_format: str,
+    evaluations_collection_name: str,
+    case_studies_collection_name: str,
+    fields: Optional[List[str]] = None,
+    case_study_fields: Optional[List[str]] = None,
+    start_date=None,
+    end_date=None,
+    page_size: int = PAGE_SIZE
+) -> int:
+    """
+    Stream an evaluations collection joined with case study metadata to a binary file object.
+    Returns the number of exported rows.
+    """
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    fields = list(fields or EVALUATION_FIELDS)
+    case_study_fields = list(CASE_STUDY_FIELDS if case_study_fields is None else case_study_fields)
+    columns = export_columns(fields, case_study_fields)
+    pages = iter_export_rows(
+        evaluations_collection_name, case_studies_collection_name,
+        fields, case_study_fields, start_date, end_date, page_size
+    )
+
+    count = 0
+    if export_format == 'csv':
+        text = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+        writer = csv.DictWriter(text, fieldnames=columns)
+        writer.writeheader()
+        for rows in pages:
+            writer.writerows({column: _csv_value(row[column]) for column in columns} for row in rows)
+            count += len(rows)
+        text.detach()
+
+    elif export_format == 'jsonl':
+        for rows in pages:
+            output.write("".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode('utf-8'))
+            count += len(rows)
+
+    else:
+        schema = pa.schema([(column, _arrow_type(column.removeprefix(CASE_STUDY_PREFIX))) for column in columns])
+        with pq.ParquetWriter(output, schema) as writer:
+            for rows in pages:
+                # Each page is written as its own row group
+                arrays = [
+                    pa.array([_arrow_value(row[field.name], field.type) for row in rows], type=field.type)
+                    for field in schema
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                count += len(rows)
+
+    logger.info(f"Exported {count} evaluations from {evaluations_collection_name} as {export_format}")
+    return count
+
+# # # # # # # # # # #
+# Download Panel
+# # # # # # # # # # #
+
+def _prune_exports():
+    """Remove the exports prepared in the app that were never downloaded"""
+
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    expired = datetime.now(timezone.utc).timestamp() - EXPORT_RETENTION_SECONDS
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+        except OSError as e:
+            logger.error(f"Error removing export {path}: {str(e)}")
+
+def _discard_export(state_key: str):
+    """Forget the prepared export of a panel and remove its file"""
+
+    export = st.session_state.pop(state_key, None)
+    if export and os.path.exists(export['path']):
+        try:
+            os.remove(export['path'])
+        except OSError as e:
+            logger.error(f"Error removing export {export['path']}: {str(e)}")
+
+@instrumented_fragment
+def display_export_panel(evaluations_collection_name: str, case_studies_collection_name: str):
+    """Export options and download button for an evaluations collection (a fragment: only the panel reruns)"""
+
+    state_key = f"export_{evaluations_collection_name}"
+
+    with st.expander("📥 Export Evaluations"):
+        col1, col2 = st.columns(2)
+        with col1:
+            export_format = st.selectbox("Format", options=list(EXPORT_FORMATS), key=f"{state_key}_format")
+            date_range = st.date_input("Date range (optional)", value=(), key=f"{state_key}_dates")
+        with col2:
+            fields = st.multiselect("Evaluation fields", options=EVALUATION_FIELDS, default=EVALUATION_FIELDS, key=f"{state_key}_fields")
+            case_study_fields = st.multiselect("Case study fields", options=CASE_STUDY_FIELDS, default=CASE_STUDY_FIELDS, key=f"{state_key}_case_study_fields")
+
+        if st.button("Prepare Export", key=f"{state_key}_prepare"):
+            start_date = date_range[0] if len(date_range) > 0 else None
+            end_date = date_range[1] if len(date_range) > 1 else start_date
+            _discard_export(state_key)
+            _prune_exports()
+            path = os.path.join(EXPORT_DIR, f"{evaluations_collection_name}-{uuid.uuid4().hex[:12]}.{export_format}")
+            try:
+                os.makedirs(EXPORT_DIR, exist_ok=True)
+                with st.spinner("Exporting evaluations..."), open(path, 'wb') as f:
+                    count = export_evaluations(
+                        f, export_format, evaluations_collection_name, case_studies_collection_name,
+                        fields or EVALUATION_FIELDS, case_study_fields, start_date, end_date
+                    )
+
+                size = os.path.getsize(path)
+                if size > MAX_DOWNLOAD_BYTES:
+                    os.remove(path)
+                    st.warning(
+                        f"This export is {size / 1024 / 1024:.0f} MB, too large to download from the app. "
+                        f"Run `python -m utils.export --format {export_format} --evaluations {evaluations_collection_name} "
+                        f"--output <file>` instead."
+                    )
+                else:
+                    st.session_state[state_key] = {'format': export_format, 'count': count, 'path': path}
+            except Exception as e:
+                if os.path.exists(path):
+                    os.remove(path)
+                logger.error(f"Error exporting evaluations: {str(e)}")
+                st.error("An error occurred while exporting the evaluations. Please try again.")
+
+        export = st.session_state.get(state_key)
+        if export and os.path.exists(export['path']):
+            # Read only while the button is shown; the file is removed once downloaded
+            with open(export['path'], 'rb') as f:
+                st.download_button(
+                    f"Download {export['count']} evaluations ({export['format'].upper()})",
+                    data=f,
+                    file_name=f"{evaluations_collection_name}.{export['format']}",
+                    mime=EXPORT_FORMATS[export['format']],
+                    key=f"{state_key}_download",
+                    on_click=_discard_export,
+                    args=(state_key,)
+                )
+
+def main():
+    parser = argparse.ArgumentParser(description="Export evaluations joined with case study metadata")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--output", required=True, help="Output file ('-' for standard output)")
+    parser.add_argument("--evaluations", default="evaluations_v2", help="Evaluations collection")
+    parser.add_argument("--case-studies", default="case_studies_v2", help="Case studies collection")
+    parser.add_argument("--fields", default=",".join(EVALUATION_FIELDS), help="Comma-separated evaluation fields")
+    parser.add_argument("--case-study-fields", default=",".join(CASE_STUDY_FIELDS), help="Comma-separated case study fields")
+    parser.add_argument("--start-date", default=None, help="Earliest evaluation date (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--end-date", default=None, help="Latest evaluation date (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    fields = [field for field in args.fields.split(",") if field]
+    case_study_fields = [field for field in args.case_study_fields.split(",") if field]
+
+    if args.output == "-":
+        export_evaluations(sys.stdout.buffer, args.format, args.evaluations, args.case_studies,
+                           fields, case_study_fields, args.start_date, args.end_date, args.page_size)
+        return
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'wb') as f:
+        export_evaluations(f, args.format, args.evaluations, args.case_studies,
+                           fields, case_study_fields, args.start_date, args.end_date, args.page_size)
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,23 @@ import json
 import logging
 import os
 import streamlit as st
-from typing import Dict, Any, Optional, List
+from random import sample
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 
 from utils.url_helper import URLHelper
+from utils.batch_writer import BatchWriter
+from utils.document_view import DocumentView
+from utils.markdown_helper import clean_case_study_content
+from utils.records import CaseStudy
+from utils.instrumentation import instrument_client, instrumented
+from utils.local_firestore import create_local_client, is_local_storage
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Evaluations per page of the User Summary
+USER_EVALUATIONS_PAGE_SIZE = 20
+
 # Initialize Firebase
 def get_firebase_credentials():
     """Get Firebase credentials from either local file or Streamlit secrets"""
@@ -41,29 +51,39 @@ def get_firebase_credentials():
     st.error("⚠️ Firebase credentials not found. Please configure them in Streamlit Cloud or add a local config/firebase-credentials.json file.")
     st.stop()
 
-try:
-    app = firebase_admin.get_app()
-except ValueError:
+if is_local_storage():
+
+    # Use the local storage stand-in (benchmarks, load tests and offline development)
+    logger.info("Using local storage instead of Firestore")
+    db = instrument_client(create_local_client())
+
+else:
+
     try:
-        # Get credentials from either local file or Streamlit secrets
-        creds = get_firebase_credentials()
-        
-        # Initialize Firebase
-        cred = credentials.Certificate(creds)
-        app = firebase_admin.initialize_app(cred)
-        
-    except Exception as e:
-        logger.error(f"Failed to initialize Firebase: {str(e)}")
-        st.error(f"⚠️ Failed to initialize Firebase: {str(e)}")
-        st.stop()
+        app = firebase_admin.get_app()
+    except ValueError:
+        try:
+            # Get credentials from either local file or Streamlit secrets
+            creds = get_firebase_credentials()
+            
+            # Initialize Firebase
+            cred = credentials.Certificate(creds)
+            app = firebase_admin.initialize_app(cred)
+            
+        except Exception as e:
+            logger.error(f"Failed to initialize Firebase: {str(e)}")
+            st.error(f"⚠️ Failed to initialize Firebase: {str(e)}")
+            st.stop()
 
-db = firestore.client()
+    # Wrap the client so that every read, query and write is recorded
+    db = instrument_client(firestore.client())
 
 def get_db():
     """Get or initialize Firestore database"""
     return db
 
-def get_random_case_study(case_studies_collection_name: str, evaluations_collection_name: str) -> Optional[Dict[str, Any]]:
+@instrumented
+def get_random_case_study(case_studies_collection_name: str, evaluations_collection_name: str) -> Optional[CaseStudy]:
     """
     Fetch a random case study from Firestore that hasn't been evaluated yet.
     Returns None if no case studies are found.
@@ -83,6 +103,7 @@ def get_random_case_study(case_studies_collection_name: str, evaluations_collect
         st.error(f"Error processing get_random_case_study(): {str(e)}")
         return None
 
+@instrumented
 def save_evaluation(evaluation_data: Dict[str, Any], collection_name: str) -> bool:
     """
     Save an evaluation to Firestore.
@@ -116,11 +137,12 @@ def save_evaluation(evaluation_data: Dict[str, Any], collection_name: str) -> bo
         st.error(f"Error processing save_evaluation(): {str(e)}")
         return False
 
+@instrumented
 def get_unevaluated_case_study(
         user_email: str, 
         case_studies_collection_name: str, 
         evaluations_collection_name: str
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[CaseStudy]:
     """
     Fetch a random case study that hasn't been evaluated by the given user.
     Args:
@@ -128,7 +150,32 @@ def get_unevaluated_case_study(
         case_studies_collection_name: Name of the collection containing case studies
         evaluations_collection_name: Name of the collection containing evaluations
     Returns:
-        Optional[Dict[str, Any]]: A case study dictionary or None if no unevaluated cases found
+        Optional[CaseStudy]: A case study record or None if no unevaluated cases found
+    """
+    case_studies = get_unevaluated_case_studies(user_email, case_studies_collection_name, evaluations_collection_name)
+    return case_studies[0] if case_studies else None
+
+@instrumented
+def get_unevaluated_case_studies(
+        user_email: str, 
+        case_studies_collection_name: str, 
+        evaluations_collection_name: str,
+        count: int = 1,
+        exclude_ids: Iterable[str] = (),
+        exclude_clean_urls: Iterable[str] = ()
+    ) -> List[CaseStudy]:
+    """
+    Fetch up to `count` random case studies that haven't been evaluated by the given user, each from
+    a different clean URL (evaluating one excludes the others), with a single scan of the case studies.
+    Args:
+        user_email: Email of the user
+        case_studies_collection_name: Name of the collection containing case studies
+        evaluations_collection_name: Name of the collection containing evaluations
+        count: Maximum number of case studies to return
+        exclude_ids: IDs of case studies to skip as well (e.g. already queued or just evaluated)
+        exclude_clean_urls: Clean URLs of case studies to skip as well
+    Returns:
+        List[CaseStudy]: Case study records, empty if no unevaluated cases found
     """
     try:
         
@@ -136,25 +183,25 @@ def get_unevaluated_case_study(
 
         # Get all case studies this user has evaluated
         evaluated_refs = db.collection(evaluations_collection_name)\
-            .where('user_email', '==', user_email)\
+            .where('evaluator_email', '==', user_email)\
             .get()
         
         # Get all case study IDs and clean URLs this user has evaluated
-        evaluated_ids = set()
-        evaluated_clean_urls = set()
+        evaluated_ids = set(exclude_ids)
+        evaluated_clean_urls = set(exclude_clean_urls)
         
         for eval_ref in evaluated_refs:
 
-            # Get the evaluation data
-            eval_data = eval_ref.to_dict()
+            # Only read the two fields needed from the evaluation
+            evaluation = DocumentView(eval_ref)
             
             # Add case study ID to evaluated set
-            case_study_id = eval_data.get('case_study_id')
+            case_study_id = evaluation.get('case_study_id')
             if case_study_id:
                 evaluated_ids.add(case_study_id)
             
-            # Add clean URL to evaluated set
-            source_url = eval_data.get('source_url')
+            # Add clean URL to evaluated set (evaluations store it as case_study_url)
+            source_url = evaluation.get('case_study_url') or evaluation.get('source_url')
             if source_url:
                 clean_url = URLHelper.clean_url(source_url)
                 if clean_url:
@@ -172,43 +219,41 @@ def get_unevaluated_case_study(
                 if doc.id in evaluated_ids:
                     continue
                 
-                # Get case study data
-                case_study = doc.to_dict()
-                if not case_study:
+                # Only the source URL is read here; the body is decoded for the chosen case study
+                view = DocumentView(doc)
+                if not view:
                     continue
                 
-                # Add document ID
-                case_study['id'] = doc.id
-                
-                # Add clean URL if source_url exists and check if it's been evaluated
-                source_url = case_study.get('source_url')
-                if source_url:
-                    clean_url = URLHelper.clean_url(source_url)
-                    case_study['clean_url'] = clean_url
-                    
-                    # Skip if we've already evaluated a case study from this URL
-                    if clean_url in evaluated_clean_urls:
-                        continue
-                else:
-                    case_study['clean_url'] = ''
+                # Skip if we've already evaluated a case study from this URL
+                source_url = view.get('source_url')
+                clean_url = URLHelper.clean_url(source_url) if source_url else None
+                if clean_url and clean_url in evaluated_clean_urls:
+                    continue
                 
-                available_cases.append(case_study)
+                available_cases.append((view, clean_url))
                 
             except Exception as e:
                 logger.error(f"Error processing case study {doc.id}: {str(e)}")
                 continue
         
-        # Return a random one if any available
-        if available_cases:
-            from random import choice
-            return choice(available_cases)
-        
-        return None
+        # Return random ones from distinct clean URLs if any available, each decoded once
+        chosen = []
+        chosen_clean_urls = set()
+        for view, clean_url in sample(available_cases, len(available_cases)):
+            if len(chosen) >= count:
+                break
+            if clean_url and clean_url in chosen_clean_urls:
+                continue
+            chosen.append(view)
+            if clean_url:
+                chosen_clean_urls.add(clean_url)
+        return [CaseStudy.from_document(view.id, view) for view in chosen]
         
     except Exception as e:
-        logger.error(f"Error processing get_unevaluated_case_study(): {str(e)}")
-        return None
+        logger.error(f"Error processing get_unevaluated_case_studies(): {str(e)}")
+        return []
 
+@instrumented
 def get_user_evaluations_count(user_email):
     """Get the number of case studies reviewed by a specific user"""
     try:
@@ -222,6 +267,7 @@ def get_user_evaluations_count(user_email):
         logger.error(f"Error getting user evaluations count: {e}")
         return 0
 
+@instrumented
 def get_user_evaluations(user_email: str, evaluations_collection_name: str, case_studies_collection_name: str):
     """Get all evaluations provided by a specific user"""
     
@@ -243,9 +289,9 @@ def get_user_evaluations(user_email: str, evaluations_collection_name: str, case
             # Get the case study document
             case_study_doc = db.collection(case_studies_collection_name).document(eval_dict['case_study_id']).get()
             if case_study_doc.exists:
-                case_study_data = case_study_doc.to_dict()
+                case_study_data = DocumentView(case_study_doc)
                 eval_dict['case_study_url'] = case_study_data.get('source_url', 'N/A')
-                eval_dict['case_study_content'] = case_study_data.get('case_study_final', 'N/A')
+                eval_dict['case_study_content'] = clean_case_study_content(case_study_data.get('case_study_final', 'N/A'))
             else:
                 eval_dict['case_study_url'] = 'N/A'
                 eval_dict['case_study_content'] = 'N/A'
@@ -263,6 +309,81 @@ def get_user_evaluations(user_email: str, evaluations_collection_name: str, case
         logger.error(f"Error getting user evaluations: {str(e)}")
         return []
 
+@instrumented
+def count_user_evaluations(user_email: str, evaluations_collection_name: str) -> int:
+    """Number of evaluations provided by a user, counted with an aggregation query"""
+
+    try:
+        result = db.collection(evaluations_collection_name)\
+            .where('evaluator_email', '==', user_email)\
+            .count()\
+            .get()
+        return result[0][0].value
+    except Exception as e:
+        logger.error(f"Error counting user evaluations: {str(e)}")
+        return 0
+
+@instrumented
+def get_user_evaluations_page(
+        user_email: str,
+        evaluations_collection_name: str,
+        case_studies_collection_name: str,
+        page_size: int = USER_EVALUATIONS_PAGE_SIZE,
+        start_after=None
+    ) -> Tuple[List[Dict[str, Any]], Any]:
+    """
+    Get one page of the evaluations provided by a user, newest first, with their case study.
+    Uses the (evaluator_email, timestamp) composite index declared in firestore.indexes.json.
+    Args:
+        user_email: Email of the user
+        evaluations_collection_name: Name of the collection containing evaluations
+        case_studies_collection_name: Name of the collection containing case studies
+        page_size: Maximum number of evaluations to return
+        start_after: Cursor returned with the previous page, None for the first page
+    Returns:
+        The evaluations of the page, and the cursor of the next page (None after the last page)
+    """
+
+    try:
+
+        # Query one page of the user's evaluations, ordered by the server
+        query = db.collection(evaluations_collection_name)\
+            .where('evaluator_email', '==', user_email)\
+            .order_by('timestamp', direction=firestore.Query.DESCENDING)\
+            .limit(page_size)
+        if start_after is not None:
+            query = query.start_after(start_after)
+        evaluations = query.get()
+
+        # Read the case studies of the page in a single batch, only the displayed fields
+        case_study_ids = {eval.get('case_study_id') for eval in evaluations} - {None}
+        references = [db.collection(case_studies_collection_name).document(case_study_id) for case_study_id in case_study_ids]
+        case_studies = {
+            snapshot.id: DocumentView(snapshot)
+            for snapshot in db.get_all(references, field_paths=['source_url', 'case_study_final'])
+            if snapshot.exists
+        } if references else {}
+
+        result = []
+        for eval in evaluations:
+            eval_dict = eval.to_dict()
+            case_study_data = case_studies.get(eval_dict.get('case_study_id'))
+            eval_dict['case_study_url'] = case_study_data.get('source_url', 'N/A') if case_study_data else 'N/A'
+            eval_dict['case_study_content'] = clean_case_study_content(case_study_data.get('case_study_final', 'N/A')) if case_study_data else 'N/A'
+            result.append({
+                'id': eval.id,
+                **eval_dict
+            })
+
+        # A short page is the last one
+        cursor = evaluations[-1] if len(evaluations) == page_size else None
+        return result, cursor
+
+    except Exception as e:
+        logger.error(f"Error getting user evaluations page: {str(e)}")
+        return [], None
+
+@instrumented
 def delete_evaluation(evaluation_id: str, collection_name: str):
     """Delete an evaluation by its ID"""
     try:
@@ -273,10 +394,54 @@ def delete_evaluation(evaluation_id: str, collection_name: str):
         logger.error(f"Error deleting evaluation {evaluation_id}: {str(e)}")
         return False
 
-def get_one_case_study_per_company() -> List[Dict[str, Any]]:
+def _write_evaluations(evaluation_ids: List[str], collection_name: str, write) -> int:
+    """
+    Apply write(writer, reference, sequence) to evaluations in batches of up to 500 writes.
+    Returns how many of the first evaluations are known to be written: all of them on success.
+    """
+
+    committed = [0]
+
+    def _on_commit(writes: int, committed_through: int):
+        committed[0] = committed_through + 1
+
+    try:
+        collection = db.collection(collection_name)
+        with BatchWriter(db, on_commit=_on_commit) as writer:
+            for sequence, evaluation_id in enumerate(evaluation_ids):
+                write(writer, collection.document(evaluation_id), sequence)
+        return len(evaluation_ids)
+    except Exception as e:
+        logger.error(f"Error writing {len(evaluation_ids)} evaluations: {str(e)}")
+        return committed[0]
+
+@instrumented
+def delete_evaluations(evaluation_ids: List[str], collection_name: str) -> int:
+    """Delete evaluations by their IDs with batched writes; returns how many are known to be deleted"""
+
+    deleted = _write_evaluations(
+        evaluation_ids, collection_name,
+        lambda writer, reference, sequence: writer.delete(reference, sequence=sequence)
+    )
+    logger.info(f"Deleted {deleted} of {len(evaluation_ids)} evaluations")
+    return deleted
+
+@instrumented
+def update_improvement_areas(evaluation_ids: List[str], improvement_area: str, collection_name: str) -> int:
+    """Set the improvement area of evaluations with batched writes; returns how many are known to be updated"""
+
+    updated = _write_evaluations(
+        evaluation_ids, collection_name,
+        lambda writer, reference, sequence: writer.update(reference, {'improvement_area': improvement_area}, sequence=sequence)
+    )
+    logger.info(f"Set the improvement area of {updated} of {len(evaluation_ids)} evaluations to {improvement_area}")
+    return updated
+
+@instrumented
+def get_one_case_study_per_company() -> List[CaseStudy]:
     """
     Retrieve one case study per company from Firestore.
-    Returns a list of dictionaries containing case study data grouped by company URL.
+    Returns a list of case study records, one per company URL.
     """
     try:
 
@@ -291,16 +456,13 @@ def get_one_case_study_per_company() -> List[Dict[str, Any]]:
             logger.error("Failed to fetch case studies")
             return []
 
-        # Convert to list of dictionaries and group by clean URL
+        # Group the case studies by clean URL, only reading their source URL
         url_cases = {}
         for doc in case_studies:
             try:
 
-                data = doc.to_dict()
-                if not data:
-                    continue
-                    
-                source_url = data.get('source_url')
+                view = DocumentView(doc)
+                source_url = view.get('source_url')
                 if not source_url:
                     continue
                     
@@ -308,10 +470,9 @@ def get_one_case_study_per_company() -> List[Dict[str, Any]]:
                 if not clean_url:
                     continue
                     
-                # Only keep the first case study for each clean URL
+                # Only keep (and decode) the first case study for each clean URL
                 if clean_url not in url_cases:
-                    data['id'] = doc.id
-                    url_cases[clean_url] = data
+                    url_cases[clean_url] = CaseStudy.from_document(doc.id, view)
                     
             except Exception as e:
                 logger.error(f"Error processing case study {doc.id}: {str(e)}")
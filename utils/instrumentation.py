@@ -0,0 +1,380 @@
+"""
+Instrumentation for the Case Study Evaluation Hub.
+Counts Firestore document reads, queries, writes and bytes, and records call latencies,
+attributed to the current page, rerun and data-access function.
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from utils.document_view import snapshot_data
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in milliseconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Number of reruns kept in memory
+MAX_RECORDED_RERUNS = 500
+
+# Name used when a read happens outside of an instrumented function
+DIRECT_ACCESS = "(direct)"
+
+# Page used when a read happens outside of a page rerun (e.g. background threads)
+BACKGROUND_PAGE = "(background)"
+
+_current_rerun = contextvars.ContextVar('current_rerun', default=None)
+_current_function = contextvars.ContextVar('current_function', default=DIRECT_ACCESS)
+
+_lock = threading.Lock()
+_reruns = deque(maxlen=MAX_RECORDED_RERUNS)
+_page_totals = {}
+
+def _new_stats() -> Dict[str, Any]:
+    return {
+        'calls': 0,
+        'reads': 0,
+        'queries': 0,
+        'writes': 0,
+        'bytes': 0,
+        'errors': 0,
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+        'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    }
+
+def _targets(function_name: str):
+    """Return the stats dictionaries to update for a function: the current rerun and the page totals"""
+
+    rerun = _current_rerun.get()
+    page = rerun['page'] if rerun else BACKGROUND_PAGE
+
+    targets = [_page_totals.setdefault(page, {}).setdefault(function_name, _new_stats())]
+    if rerun is not None:
+        targets.append(rerun['functions'].setdefault(function_name, _new_stats()))
+    return targets
+
+def record_access(reads: int = 0, queries: int = 0, writes: int = 0, bytes_read: int = 0):
+    """Record Firestore operations against the current function, page and rerun"""
+
+    with _lock:
+        for stats in _targets(_current_function.get()):
+            stats['reads'] += reads
+            stats['queries'] += queries
+            stats['writes'] += writes
+            stats['bytes'] += bytes_read
+
+def _record_call(function_name: str, elapsed_ms: float, failed: bool):
+    bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+    with _lock:
+        for stats in _targets(function_name):
+            stats['calls'] += 1
+            stats['errors'] += int(failed)
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['histogram'][bucket] += 1
+
+def instrumented(func):
+    """Decorator recording the latency of a data-access function and attributing its Firestore operations to it"""
+
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    if inspect.isgeneratorfunction(func):
+        return _instrumented_generator(func, name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_function.set(name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _record_call(name, (time.perf_counter() - start) * 1000, failed)
+            _current_function.reset(token)
+
+    return wrapper
+
+def _instrumented_generator(func, name: str):
+    """Generator version: operations are attributed while the generator runs, not while it is suspended"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        elapsed = 0.0
+        failed = False
+        try:
+            while True:
+                token = _current_function.set(name)
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                    _current_function.reset(token)
+                yield item
+        except GeneratorExit:
+            generator.close()
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _record_call(name, elapsed * 1000, failed)
+
+    return wrapper
+
+def begin_rerun(page: str, session_id: Optional[str] = None, user: Optional[str] = None, fragment: Optional[str] = None) -> str:
+    """Start attributing Firestore operations to a new rerun of a page (or of one of its fragments). Returns the rerun ID."""
+
+    rerun = {
+        'rerun_id': uuid.uuid4().hex[:12],
+        'session_id': session_id,
+        'user': user,
+        'page': page,
+        'fragment': fragment,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'functions': {}
+    }
+    with _lock:
+        _reruns.append(rerun)
+    _current_rerun.set(rerun)
+    return rerun['rerun_id']
+
+def end_rerun():
+    """Stop attributing Firestore operations to the current rerun"""
+    _current_rerun.set(None)
+
+def in_rerun() -> bool:
+    """Check whether Firestore operations are being attributed to a rerun"""
+    return _current_rerun.get() is not None
+
+def percentile_ms(histogram, percentile: float) -> Optional[float]:
+    """Approximate a latency percentile from histogram buckets (upper bound of the bucket reached)"""
+
+    total = sum(histogram)
+    if not total:
+        return None
+    threshold = total * percentile / 100
+    running = 0
+    for index, count in enumerate(histogram):
+        running += count
+        if running >= threshold:
+            return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else float('inf')
+    return float('inf')
+
+def export_metrics() -> Dict[str, Any]:
+    """Return a JSON-serializable copy of every recorded metric"""
+
+    with _lock:
+        return {
+            'exported_at': datetime.now(timezone.utc).isoformat(),
+            'latency_buckets_ms': list(LATENCY_BUCKETS_MS),
+            'pages': {
+                page: {name: dict(stats, histogram=list(stats['histogram'])) for name, stats in functions.items()}
+                for page, functions in _page_totals.items()
+            },
+            'reruns': [
+                {
+                    **{key: value for key, value in rerun.items() if key != 'functions'},
+                    'functions': {name: dict(stats, histogram=list(stats['histogram'])) for name, stats in rerun['functions'].items()}
+                }
+                for rerun in _reruns
+            ]
+        }
+
+def reset_metrics():
+    """Drop every recorded metric"""
+    with _lock:
+        _reruns.clear()
+        _page_totals.clear()
+
+# # # # # # # # # # #
+# Client Proxy
+# # # # # # # # # # #
+
+def _value_size(value: Any) -> int:
+    """Approximate the Firestore storage size of a field value"""
+
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key).encode('utf-8')) + 1 + _value_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(item) for item in value)
+    return 16
+
+def document_size(snapshot) -> int:
+    """Approximate the size of a document snapshot, following Firestore storage size rules"""
+
+    try:
+        if not getattr(snapshot, 'exists', True):
+            return 0
+        # Local snapshots know their encoded size without decoding their fields
+        stored_size = getattr(snapshot, 'stored_size', None)
+        if stored_size is not None:
+            return stored_size
+        data = snapshot_data(snapshot) or {}
+        return 32 + len(getattr(snapshot, 'id', '') or '') + 1 + _value_size(data)
+    except Exception:
+        return 0
+
+def _unwrap(value):
+    return value._target if isinstance(value, _Proxy) else value
+
+def _wrap(value):
+    """Wrap Firestore references, queries and batches returned by the client"""
+
+    if value is None or isinstance(value, (_Proxy, str, bytes, int, float, dict, list, tuple)):
+        return value
+    if hasattr(value, 'commit') and hasattr(value, 'set'):
+        return _BatchProxy(value)
+    if hasattr(value, 'stream'):
+        return _QueryProxy(value)
+    if hasattr(value, 'set') and hasattr(value, 'delete'):
+        return _DocumentProxy(value)
+    return value
+
+class _Proxy:
+    """Delegate everything to the wrapped object, wrapping returned references and queries"""
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def method(*args, **kwargs):
+            args = [_unwrap(arg) for arg in args]
+            kwargs = {key: _unwrap(value) for key, value in kwargs.items()}
+            return _wrap(attribute(*args, **kwargs))
+
+        return method
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return f"Instrumented({self._target!r})"
+
+class _QueryProxy(_Proxy):
+    """Collection reference or query: counts the documents returned by get() and stream()"""
+
+    def get(self, *args, **kwargs):
+        result = self._target.get(*args, **kwargs)
+        if isinstance(result, list) and all(hasattr(item, 'exists') for item in result):
+            # A query is billed at least one read, even when it returns no document
+            record_access(reads=max(1, len(result)), queries=1, bytes_read=sum(document_size(doc) for doc in result))
+        else:
+            record_access(reads=1, queries=1)
+        return result
+
+    def stream(self, *args, **kwargs):
+        record_access(queries=1)
+        count = 0
+        for doc in self._target.stream(*args, **kwargs):
+            count += 1
+            record_access(reads=1, bytes_read=document_size(doc))
+            yield doc
+        if count == 0:
+            record_access(reads=1)
+
+    def add(self, *args, **kwargs):
+        record_access(writes=1)
+        return self._target.add(*args, **kwargs)
+
+class _DocumentProxy(_Proxy):
+    """Document reference: counts reads and writes"""
+
+    def get(self, *args, **kwargs):
+        snapshot = self._target.get(*args, **kwargs)
+        record_access(reads=1, bytes_read=document_size(snapshot))
+        return snapshot
+
+    def _write(self, name, *args, **kwargs):
+        record_access(writes=1)
+        args = [_unwrap(arg) for arg in args]
+        return getattr(self._target, name)(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._write('set', *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write('update', *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._write('create', *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write('delete', *args, **kwargs)
+
+class _BatchProxy(_Proxy):
+    """Write batch: counts the writes it commits"""
+
+    def __init__(self, target):
+        super().__init__(target)
+        object.__setattr__(self, '_pending_writes', 0)
+
+    def _add(self, name, *args, **kwargs):
+        object.__setattr__(self, '_pending_writes', self._pending_writes + 1)
+        args = [_unwrap(arg) for arg in args]
+        getattr(self._target, name)(*args, **kwargs)
+        return self
+
+    def set(self, *args, **kwargs):
+        return self._add('set', *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._add('update', *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._add('create', *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._add('delete', *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        result = self._target.commit(*args, **kwargs)
+        record_access(writes=self._pending_writes)
+        object.__setattr__(self, '_pending_writes', 0)
+        return result
+
+class InstrumentedClient(_Proxy):
+    """Firestore client wrapper recording every read, query and write"""
+
+    def get_all(self, references, *args, **kwargs):
+        references = [_unwrap(reference) for reference in references]
+        for snapshot in self._target.get_all(references, *args, **kwargs):
+            record_access(reads=1, bytes_read=document_size(snapshot))
+            yield snapshot
+
+def instrument_client(client) -> InstrumentedClient:
+    """Wrap a Firestore client so that its operations are recorded"""
+    return client if isinstance(client, InstrumentedClient) else InstrumentedClient(client)
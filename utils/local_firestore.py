@@ -0,0 +1,639 @@
+"""
+Local storage stand-in for Firestore.
+
+In-memory implementation of the subset of the Firestore client API used by the app
+(collections, documents, queries with filters, ordering, cursors and projections,
+count aggregations, collection group partitions, batched writes and get_all). It is
+used by the benchmarks and load tests, and by the app itself when EVALHUB_STORAGE=local.
+
+Like Firestore, documents are stored encoded field by field and decoded when a
+snapshot is read. An optional latency can be injected into every round trip.
+"""
+
+import copy
+import logging
+import os
+import pickle
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Environment variables selecting the local backend and its data file
+STORAGE_ENV_VAR = "EVALHUB_STORAGE"
+LOCAL_DATA_ENV_VAR = "EVALHUB_LOCAL_DATA"
+LOCAL_LATENCY_ENV_VAR = "EVALHUB_LOCAL_LATENCY_MS"
+
+# Maximum number of writes in a batch, as enforced by Firestore
+MAX_BATCH_WRITES = 500
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+try:
+    from google.cloud.firestore_v1.transforms import SERVER_TIMESTAMP as _SERVER_TIMESTAMP
+except Exception:
+    _SERVER_TIMESTAMP = None
+
+_MISSING = object()
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _encode(data: Dict[str, Any], timestamp: datetime) -> Dict[str, bytes]:
+    """Encode a document field by field, resolving server timestamps"""
+
+    def _resolve(value):
+        if _SERVER_TIMESTAMP is not None and value is _SERVER_TIMESTAMP:
+            return timestamp
+        if isinstance(value, dict):
+            return {key: _resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [_resolve(item) for item in value]
+        return value
+
+    return {
+        field: pickle.dumps(_resolve(value), protocol=pickle.HIGHEST_PROTOCOL)
+        for field, value in data.items()
+    }
+
+def _decode_field(fields: Dict[str, bytes], field_path: str) -> Any:
+    """Decode a (possibly nested, dot-separated) field, or return _MISSING"""
+
+    top, _, rest = field_path.partition(".")
+    encoded = fields.get(top)
+    if encoded is None:
+        return _MISSING
+    value = pickle.loads(encoded)
+    for part in rest.split(".") if rest else []:
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _sort_key(value: Any) -> Tuple:
+    """Order values across types the way Firestore does (null < bool < number < timestamp < string < ...)"""
+
+    if value is _MISSING or value is None:
+        return (0,)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    return (6, str(value))
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    if op == "==":
+        return value is not _MISSING and value == expected
+    if op == "!=":
+        return value is not _MISSING and value is not None and value != expected
+    if op == "in":
+        return value is not _MISSING and value in expected
+    if op == "not-in":
+        return value is not _MISSING and value is not None and value not in expected
+    if op == "array_contains":
+        return isinstance(value, list) and expected in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(item in value for item in expected)
+    if value is _MISSING or value is None:
+        return False
+    # Range filters only match values of the same type group
+    if _sort_key(value)[0] != _sort_key(expected)[0]:
+        return False
+    if op == "<":
+        return _sort_key(value) < _sort_key(expected)
+    if op == "<=":
+        return _sort_key(value) <= _sort_key(expected)
+    if op == ">":
+        return _sort_key(value) > _sort_key(expected)
+    if op == ">=":
+        return _sort_key(value) >= _sort_key(expected)
+    raise ValueError(f"Unsupported operator: {op}")
+
+class _StoredDocument:
+    __slots__ = ('fields', 'create_time', 'update_time')
+
+    def __init__(self, fields: Dict[str, bytes], create_time: datetime, update_time: datetime):
+        self.fields = fields
+        self.create_time = create_time
+        self.update_time = update_time
+
+class LocalDocumentSnapshot:
+    """Snapshot of a local document; fields are decoded when first read, like a lazy Firestore snapshot"""
+
+    def __init__(self, reference: "LocalDocumentReference", stored: Optional[_StoredDocument], field_paths: Optional[List[str]] = None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = stored is not None
+        self.create_time = stored.create_time if stored else None
+        self.update_time = stored.update_time if stored else None
+        self.read_time = _now()
+        self._fields = None
+        self._decoded = {}
+        if stored is not None:
+            fields = stored.fields
+            if field_paths is not None:
+                fields = {field: encoded for field, encoded in fields.items() if field in {path.split(".")[0] for path in field_paths}}
+            self._fields = fields
+
+    @property
+    def stored_size(self) -> int:
+        """Approximate size of the document, from its encoded fields"""
+        if self._fields is None:
+            return 0
+        return 32 + len(self.id) + 1 + sum(len(field) + 1 + len(encoded) for field, encoded in self._fields.items())
+
+    def _field(self, field: str) -> Any:
+        """Decoded value of a top-level field, cached, or _MISSING"""
+        value = self._decoded.get(field, _MISSING)
+        if value is _MISSING and self._fields is not None and field in self._fields:
+            value = self._decoded[field] = pickle.loads(self._fields[field])
+        return value
+
+    def get_field(self, field: str, default: Any = None) -> Any:
+        """Decoded value of a top-level field, shared with the snapshot (not copied, unlike get())"""
+        value = self._field(field)
+        return default if value is _MISSING else value
+
+    def field_names(self) -> List[str]:
+        return list(self._fields) if self._fields is not None else []
+
+    @property
+    def _data(self) -> Optional[Dict[str, Any]]:
+        if self._fields is None:
+            return None
+        return {field: self._field(field) for field in self._fields}
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        # Decoding again returns an independent copy
+        if self._fields is None:
+            return None
+        return {field: pickle.loads(encoded) for field, encoded in self._fields.items()}
+
+    def get(self, field_path: str) -> Any:
+        top, _, rest = field_path.partition(".")
+        value = self._field(top)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        for part in rest.split(".") if rest else []:
+            value = value[part]
+        return copy.deepcopy(value)
+
+class LocalDocumentReference:
+    """Reference to a document of a local collection"""
+
+    def __init__(self, client: "LocalFirestoreClient", collection_name: str, document_id: str):
+        self._client = client
+        self.id = document_id
+        self.path = f"{collection_name}/{document_id}"
+        self._collection_name = collection_name
+
+    @property
+    def parent(self) -> "LocalCollectionReference":
+        return LocalCollectionReference(self._client, self._collection_name)
+
+    def get(self, field_paths: Optional[List[str]] = None, **kwargs) -> LocalDocumentSnapshot:
+        self._client._round_trip()
+        return LocalDocumentSnapshot(self, self._client._read(self._collection_name, self.id), field_paths)
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False, **kwargs):
+        self._client._round_trip()
+        self._client._write(self._collection_name, self.id, document_data, merge=merge)
+
+    def create(self, document_data: Dict[str, Any], **kwargs):
+        self._client._round_trip()
+        if self._client._read(self._collection_name, self.id) is not None:
+            raise ValueError(f"Document already exists: {self.path}")
+        self._client._write(self._collection_name, self.id, document_data)
+
+    def update(self, field_updates: Dict[str, Any], **kwargs):
+        self._client._round_trip()
+        if self._client._read(self._collection_name, self.id) is None:
+            raise ValueError(f"No document to update: {self.path}")
+        self._client._write(self._collection_name, self.id, field_updates, merge=True)
+
+    def delete(self, **kwargs):
+        self._client._round_trip()
+        self._client._delete(self._collection_name, self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, LocalDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+class LocalAggregationResult:
+    def __init__(self, alias: str, value: int):
+        self.alias = alias
+        self.value = value
+
+class LocalAggregationQuery:
+    """Count aggregation over a local query"""
+
+    def __init__(self, query: "LocalQuery", alias: Optional[str] = None):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    def get(self, **kwargs) -> List[List[LocalAggregationResult]]:
+        self._query._client._round_trip()
+        count = sum(1 for _ in self._query._matching())
+        return [[LocalAggregationResult(self._alias, count)]]
+
+    def stream(self, **kwargs) -> Iterator[List[LocalAggregationResult]]:
+        yield from self.get()
+
+class LocalQuery:
+    """Immutable query over a local collection"""
+
+    def __init__(self, client: "LocalFirestoreClient", collection_name: str, filters=(), orders=(),
+                 limit: Optional[int] = None, start: Optional[Tuple[Tuple, bool]] = None,
+                 end: Optional[Tuple[Tuple, bool]] = None, projection: Optional[List[str]] = None,
+                 limit_to_last: bool = False):
+        self._client = client
+        self._collection_name = collection_name
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._start = start
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **changes) -> "LocalQuery":
+        state = {
+            'filters': self._filters,
+            'orders': self._orders,
+            'limit': self._limit,
+            'start': self._start,
+            'end': self._end,
+            'projection': self._projection,
+            'limit_to_last': self._limit_to_last
+        }
+        state.update(changes)
+        return LocalQuery(self._client, self._collection_name, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None, *, filter=None) -> "LocalQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "LocalQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "LocalQuery":
+        return self._copy(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count: int) -> "LocalQuery":
+        return self._copy(limit=count, limit_to_last=True)
+
+    def select(self, field_paths: Iterable[str]) -> "LocalQuery":
+        return self._copy(projection=list(field_paths))
+
+    def _cursor(self, document_fields_or_snapshot) -> Tuple:
+        """Cursor values following the query ordering, plus the document ID tie-breaker"""
+
+        if isinstance(document_fields_or_snapshot, (list, tuple)):
+            # Document ID cursors are given as document references
+            return tuple(value.id if isinstance(value, LocalDocumentReference) else value for value in document_fields_or_snapshot)
+
+        if isinstance(document_fields_or_snapshot, dict):
+            data, document_id = document_fields_or_snapshot, None
+        else:
+            data, document_id = document_fields_or_snapshot._data or {}, document_fields_or_snapshot.id
+
+        values = []
+        for field_path, _ in self._orders:
+            if field_path == "__name__":
+                values.append(document_id)
+                continue
+            value = data
+            for part in field_path.split("."):
+                value = value.get(part, None) if isinstance(value, dict) else None
+            values.append(value)
+        if document_id is not None:
+            values.append(document_id)
+        return tuple(values)
+
+    def start_at(self, document_fields_or_snapshot) -> "LocalQuery":
+        return self._copy(start=(self._cursor(document_fields_or_snapshot), True))
+
+    def start_after(self, document_fields_or_snapshot) -> "LocalQuery":
+        return self._copy(start=(self._cursor(document_fields_or_snapshot), False))
+
+    def end_at(self, document_fields_or_snapshot) -> "LocalQuery":
+        return self._copy(end=(self._cursor(document_fields_or_snapshot), True))
+
+    def end_before(self, document_fields_or_snapshot) -> "LocalQuery":
+        return self._copy(end=(self._cursor(document_fields_or_snapshot), False))
+
+    def count(self, alias: Optional[str] = None) -> LocalAggregationQuery:
+        return LocalAggregationQuery(self, alias)
+
+    def _order_values(self, document_id: str, stored: _StoredDocument) -> Tuple:
+        return tuple(
+            document_id if field_path == "__name__" else _decode_field(stored.fields, field_path)
+            for field_path, _ in self._orders
+        ) + (document_id,)
+
+    def _compare(self, values: Tuple, cursor: Tuple) -> int:
+        """Compare order values with a cursor, following the direction of each ordering"""
+
+        directions = [direction for _, direction in self._orders] + [
+            self._orders[-1][1] if self._orders else ASCENDING
+        ]
+        for value, cursor_value, direction in zip(values, cursor, directions):
+            left, right = _sort_key(value), _sort_key(cursor_value)
+            if left == right:
+                continue
+            result = -1 if left < right else 1
+            return -result if direction == DESCENDING else result
+        return 0
+
+    def _after_cursor(self, values: Tuple, cursor: Tuple, inclusive: bool) -> bool:
+        comparison = self._compare(values[:len(cursor)], cursor)
+        return comparison > 0 or (inclusive and comparison == 0)
+
+    def _before_cursor(self, values: Tuple, cursor: Tuple, inclusive: bool) -> bool:
+        comparison = self._compare(values[:len(cursor)], cursor)
+        return comparison < 0 or (inclusive and comparison == 0)
+
+    def _matching(self) -> Iterator[Tuple[str, _StoredDocument]]:
+        """Yield the matching documents in query order, applying cursors and limits"""
+
+        documents = self._client._snapshot_collection(self._collection_name)
+
+        matching = []
+        for document_id, stored in documents:
+            keep = True
+            for field_path, op, value in self._filters:
+                if field_path == "__name__":
+                    # Document ID filters compare with document references
+                    actual, value = document_id, getattr(value, 'id', value)
+                else:
+                    actual = _decode_field(stored.fields, field_path)
+                if not _matches(actual, op, value):
+                    keep = False
+                    break
+            # Ordering on a field excludes documents that do not have it
+            if keep and any(_decode_field(stored.fields, field_path) is _MISSING for field_path, _ in self._orders if field_path != "__name__"):
+                keep = False
+            if keep:
+                matching.append((self._order_values(document_id, stored), document_id, stored))
+
+        # Sort by each ordering, last first, so that earlier orderings take precedence
+        tie_direction = self._orders[-1][1] if self._orders else ASCENDING
+        matching.sort(key=lambda item: _sort_key(item[0][-1]), reverse=tie_direction == DESCENDING)
+        for position in reversed(range(len(self._orders))):
+            matching.sort(key=lambda item: _sort_key(item[0][position]), reverse=self._orders[position][1] == DESCENDING)
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            matching = [item for item in matching if self._after_cursor(item[0], cursor, inclusive)]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            matching = [item for item in matching if self._before_cursor(item[0], cursor, inclusive)]
+
+        if self._limit is not None:
+            matching = matching[-self._limit:] if self._limit_to_last else matching[:self._limit]
+
+        for _, document_id, stored in matching:
+            yield document_id, stored
+
+    def stream(self, **kwargs) -> Iterator[LocalDocumentSnapshot]:
+        self._client._round_trip()
+        for document_id, stored in self._matching():
+            reference = LocalDocumentReference(self._client, self._collection_name, document_id)
+            yield LocalDocumentSnapshot(reference, stored, self._projection)
+
+    def get(self, **kwargs) -> List[LocalDocumentSnapshot]:
+        return list(self.stream())
+
+class LocalCollectionReference(LocalQuery):
+    """Reference to a local collection"""
+
+    def __init__(self, client: "LocalFirestoreClient", collection_name: str):
+        super().__init__(client, collection_name)
+        self.id = collection_name
+
+    def document(self, document_id: Optional[str] = None) -> LocalDocumentReference:
+        if document_id is None:
+            document_id = "".join(random.choices(string.ascii_letters + string.digits, k=20))
+        return LocalDocumentReference(self._client, self._collection_name, document_id)
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return _now(), reference
+
+    def list_documents(self, **kwargs) -> Iterator[LocalDocumentReference]:
+        for document_id, _ in self._client._snapshot_collection(self._collection_name):
+            yield self.document(document_id)
+
+class LocalQueryPartition:
+    """Range of a collection group, bounded by document references like a Firestore QueryPartition"""
+
+    def __init__(self, query: "LocalCollectionGroup", start_at: Optional[LocalDocumentReference], end_at: Optional[LocalDocumentReference]):
+        self._query = query
+        self.start_at = start_at
+        self.end_at = end_at
+
+    def query(self) -> LocalQuery:
+        query = self._query.order_by("__name__")
+        if self.start_at is not None:
+            query = query.start_at([self.start_at])
+        if self.end_at is not None:
+            query = query.end_before([self.end_at])
+        return query
+
+class LocalCollectionGroup(LocalQuery):
+    """Collection group query; local collections have no subcollections, so it spans a single collection"""
+
+    def get_partitions(self, partition_count: int, **kwargs) -> Iterator[LocalQueryPartition]:
+        """Split the collection into at most `partition_count` key ranges of similar sizes"""
+
+        self._client._round_trip()
+        document_ids = sorted(document_id for document_id, _ in self._client._snapshot_collection(self._collection_name))
+        split_points = sorted({
+            document_ids[len(document_ids) * index // partition_count]
+            for index in range(1, partition_count)
+        }) if document_ids else []
+
+        start_at = None
+        for document_id in split_points:
+            end_at = LocalDocumentReference(self._client, self._collection_name, document_id)
+            yield LocalQueryPartition(self, start_at, end_at)
+            start_at = end_at
+        yield LocalQueryPartition(self, start_at, None)
+
+class LocalWriteBatch:
+    """Batch of writes committed atomically"""
+
+    def __init__(self, client: "LocalFirestoreClient"):
+        self._client = client
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def _add(self, write):
+        if len(self._writes) >= MAX_BATCH_WRITES:
+            raise ValueError(f"A batch cannot contain more than {MAX_BATCH_WRITES} writes")
+        self._writes.append(write)
+        return self
+
+    def set(self, reference: LocalDocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        return self._add(('set', reference, document_data, merge))
+
+    def create(self, reference: LocalDocumentReference, document_data: Dict[str, Any]):
+        return self._add(('create', reference, document_data, False))
+
+    def update(self, reference: LocalDocumentReference, field_updates: Dict[str, Any]):
+        return self._add(('update', reference, field_updates, True))
+
+    def delete(self, reference: LocalDocumentReference):
+        return self._add(('delete', reference, None, False))
+
+    def commit(self, **kwargs):
+        self._client._round_trip()
+        with self._client._lock:
+            for operation, reference, data, _ in self._writes:
+                exists = self._client._read(reference._collection_name, reference.id) is not None
+                if operation == 'create' and exists:
+                    raise ValueError(f"Document already exists: {reference.path}")
+                if operation == 'update' and not exists:
+                    raise ValueError(f"No document to update: {reference.path}")
+            for operation, reference, data, merge in self._writes:
+                if operation == 'delete':
+                    self._client._delete(reference._collection_name, reference.id)
+                else:
+                    self._client._write(reference._collection_name, reference.id, data, merge=merge)
+        results = [_now()] * len(self._writes)
+        self._writes = []
+        return results
+
+class LocalFirestoreClient:
+    """In-memory stand-in for a Firestore client"""
+
+    def __init__(self, latency_ms: float = 0.0, latency_jitter_ms: float = 0.0):
+        self._collections = {}
+        self._lock = threading.RLock()
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+
+    # # # # # # # # # # #
+    # Public API
+    # # # # # # # # # # #
+
+    def collection(self, collection_name: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, collection_name)
+
+    def collection_group(self, collection_id: str) -> LocalCollectionGroup:
+        return LocalCollectionGroup(self, collection_id)
+
+    def batch(self) -> LocalWriteBatch:
+        return LocalWriteBatch(self)
+
+    def get_all(self, references: Iterable[LocalDocumentReference], field_paths: Optional[List[str]] = None, **kwargs) -> Iterator[LocalDocumentSnapshot]:
+        self._round_trip()
+        for reference in references:
+            yield LocalDocumentSnapshot(reference, self._read(reference._collection_name, reference.id), field_paths)
+
+    def collections(self) -> List[LocalCollectionReference]:
+        with self._lock:
+            return [self.collection(name) for name in self._collections]
+
+    def set_latency(self, latency_ms: float, latency_jitter_ms: float = 0.0):
+        """Change the latency injected into every round trip"""
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+
+    def clear(self):
+        """Delete every collection"""
+        with self._lock:
+            self._collections.clear()
+
+    def save(self, path: str):
+        """Persist every collection to a file"""
+        with self._lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(self._collections, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path: str):
+        """Replace every collection with those persisted in a file"""
+        with open(path, 'rb') as f:
+            collections = pickle.load(f)
+        with self._lock:
+            self._collections = collections
+
+    # # # # # # # # # # #
+    # Storage
+    # # # # # # # # # # #
+
+    def _round_trip(self):
+        """Simulate the latency of a round trip to the server"""
+        if self.latency_ms or self.latency_jitter_ms:
+            time.sleep(max(0.0, self.latency_ms + random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)) / 1000)
+
+    def _read(self, collection_name: str, document_id: str) -> Optional[_StoredDocument]:
+        with self._lock:
+            return self._collections.get(collection_name, {}).get(document_id)
+
+    def _snapshot_collection(self, collection_name: str) -> List[Tuple[str, _StoredDocument]]:
+        with self._lock:
+            return list(self._collections.get(collection_name, {}).items())
+
+    def _write(self, collection_name: str, document_id: str, data: Dict[str, Any], merge: bool = False):
+        timestamp = _now()
+        with self._lock:
+            documents = self._collections.setdefault(collection_name, {})
+            existing = documents.get(document_id)
+            if merge and existing is not None:
+                fields = dict(existing.fields)
+                for field_path, value in data.items():
+                    top, _, rest = field_path.partition(".")
+                    if rest:
+                        # Update a nested field of a map
+                        current = _decode_field(fields, top)
+                        root = current if isinstance(current, dict) else {}
+                        target = root
+                        parts = rest.split(".")
+                        for part in parts[:-1]:
+                            target = target.setdefault(part, {})
+                        target[parts[-1]] = value
+                        fields.update(_encode({top: root}, timestamp))
+                    else:
+                        fields.update(_encode({top: value}, timestamp))
+            else:
+                fields = _encode(data, timestamp)
+            create_time = existing.create_time if existing is not None else timestamp
+            documents[document_id] = _StoredDocument(fields, create_time, timestamp)
+
+    def _delete(self, collection_name: str, document_id: str):
+        with self._lock:
+            self._collections.get(collection_name, {}).pop(document_id, None)
+
+def is_local_storage() -> bool:
+    """Check whether the app is configured to use the local storage stand-in"""
+    return os.environ.get(STORAGE_ENV_VAR, "").lower() == "local"
+
+def create_local_client() -> LocalFirestoreClient:
+    """Create the local client configured by environment variables, loading its data file if any"""
+
+    client = LocalFirestoreClient(latency_ms=float(os.environ.get(LOCAL_LATENCY_ENV_VAR, 0) or 0))
+    data_path = os.environ.get(LOCAL_DATA_ENV_VAR)
+    if data_path and os.path.exists(data_path):
+        client.load(data_path)
+        logger.info(f"Loaded local storage from {data_path}")
+    return client
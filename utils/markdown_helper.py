@@ -0,0 +1,19 @@
+"""
+Markdown helpers for the Case Study Evaluation Hub.
+Case study bodies are normalized once, where they are loaded or imported, and rendered as is.
+"""
+
+import streamlit as st
+
+# Separator line used by the generator between case study sections
+SECTION_SEPARATOR = "- - - - - - - - -"
+
+def clean_case_study_content(content: str) -> str:
+    """Return the case study content with separator lines replaced by blank lines"""
+    if not isinstance(content, str):
+        return ""
+    return content.replace(SECTION_SEPARATOR, "\n")
+
+def render_case_study(content: str):
+    """Render a case study body, already cleaned when it was loaded, as markdown"""
+    st.markdown(content)
@@ -0,0 +1,364 @@
+"""
+Migration engine for the Case Study Evaluation Hub.
+Copies or transforms documents from one collection generation to another
+(e.g. case_studies_v2 -> case_studies_v3, evaluations -> evaluations_v2).
+
+The source collection is read in pages ordered by document ID, each document goes through a
+transform function, and the results are written with batched writes, rate-limited to stay under
+quota. A checkpoint records the last source document whose write is committed, with a running
+checksum of the committed documents, so a failed migration resumes where it stopped; `verify`
+compares every target document with the transformed source document.
+
+    python -m utils.migration case_studies_v2_to_v3
+    python -m utils.migration copy --source evaluations --target evaluations_v2 --max-writes-per-second 200
+    python -m utils.migration copy --source case_studies --target case_studies_archive --transform my_module:my_transform
+    python -m utils.migration case_studies_v2_to_v3 --verify
+
+A transform receives (document ID, document) and returns (target document ID, document),
+or None to skip the document.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from utils import batch_writer
+from utils.batch_writer import DEFAULT_WRITERS, MAX_BATCH_WRITES, BatchWriter, RateLimiter
+from utils.case_study_import import sampling_key
+from utils.firestore_manager import get_db
+from utils.url_helper import URLHelper
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where migration checkpoints are written
+MIGRATIONS_DIR = "cache/migrations"
+
+# Number of source documents read per query
+PAGE_SIZE = 500
+
+# Checksums are sums of 128-bit document hashes, so they do not depend on the order of the documents
+CHECKSUM_MODULUS = 2 ** 128
+
+Transform = Callable[[str, Dict[str, Any]], Optional[Tuple[str, Dict[str, Any]]]]
+
+# # # # # # # # # # #
+# Transforms
+# # # # # # # # # # #
+
+def copy_document(document_id: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Copy a document unchanged"""
+    return document_id, data
+
+def case_study_to_v3(document_id: str, data: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Add the clean URL and random sampling key of the v3 case studies; skip documents without content"""
+
+    if not data.get('case_study_final'):
+        return None
+    source_url = data.get('source_url') or ''
+    return document_id, dict(
+        data,
+        clean_url=URLHelper.clean_url(source_url) if source_url else '',
+        random_key=sampling_key(document_id),
+        migrated_at=firestore.SERVER_TIMESTAMP
+    )
+
+# Named migrations: name -> (source collection, target collection, transform)
+MIGRATIONS = {
+    'case_studies_v2_to_v3': ('case_studies_v2', 'case_studies_v3', case_study_to_v3),
+    'evaluations_to_v2': ('evaluations', 'evaluations_v2', copy_document)
+}
+
+def load_transform(spec: str) -> Transform:
+    """Load a user-supplied transform given as 'package.module:function'"""
+
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"Invalid transform '{spec}': expected 'module:function'")
+    return getattr(importlib.import_module(module_name), function_name)
+
+# # # # # # # # # # #
+# Checksums
+# # # # # # # # # # #
+
+def _canonical(value):
+    """JSON-compatible form of a Firestore value, identical before writing and after reading"""
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return {'$timestamp': round(value.timestamp(), 6)}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, bytes):
+        return {'$bytes': value.hex()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    # References, geo points...
+    return {'$value': str(getattr(value, 'path', value))}
+
+def _server_fields(data: Dict[str, Any]) -> List[str]:
+    """Top-level fields set by the server when written, which cannot be compared"""
+    return [key for key, value in data.items() if value is firestore.SERVER_TIMESTAMP]
+
+def document_checksum(document_id: str, data: Dict[str, Any], ignored_fields=()) -> int:
+    """128-bit hash of a document ID and its content"""
+    content = {key: value for key, value in data.items() if key not in ignored_fields}
+    encoded = json.dumps([document_id, _canonical(content)], sort_keys=True, separators=(",", ":"))
+    return int(hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest(), 16)
+
+# # # # # # # # # # #
+# Reading
+# # # # # # # # # # #
+
+def iter_source_pages(source_collection: str, after_document_id: Optional[str] = None,
+                      page_size: int = PAGE_SIZE, read_limiter: Optional[RateLimiter] = None) -> Iterator[List[Any]]:
+    """Yield pages of source snapshots in document ID order, after a given document ID"""
+
+    db = get_db()
+    collection = db.collection(source_collection)
+    query = collection.order_by('__name__').limit(page_size)
+    if after_document_id:
+        query = query.where('__name__', '>', collection.document(after_document_id))
+
+    last = None
+    while True:
+        page = list((query.start_after(last) if last is not None else query).stream())
+        if not page:
+            return
+        if read_limiter is not None:
+            read_limiter.acquire(len(page))
+        yield page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+# # # # # # # # # # #
+# Checkpoints
+# # # # # # # # # # #
+
+def checkpoint_path(name: str, source_collection: str, target_collection: str) -> str:
+    return os.path.join(MIGRATIONS_DIR, f"{name}-{source_collection}-{target_collection}.json")
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    checkpoint['checksum'] = int(checkpoint['checksum'], 16)
+    return checkpoint
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    batch_writer.save_checkpoint(path, dict(checkpoint, checksum=f"{checkpoint['checksum']:032x}"))
+
+# # # # # # # # # # #
+# Migration
+# # # # # # # # # # #
+
+def migrate(
+    name: str,
+    source_collection: str,
+    target_collection: str,
+    transform: Transform = copy_document,
+    page_size: int = PAGE_SIZE,
+    max_writers: int = DEFAULT_WRITERS,
+    max_writes_per_second: Optional[float] = None,
+    max_reads_per_second: Optional[float] = None,
+    restart: bool = False,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run a migration, resuming from its checkpoint. Returns the final checkpoint."""
+
+    path = checkpoint_path(name, source_collection, target_collection)
+    checkpoint = None if restart else load_checkpoint(path)
+    if checkpoint and checkpoint.get('completed'):
+        logger.info(f"Migration {name} already completed; use --restart to run it again")
+        return checkpoint
+
+    checkpoint = checkpoint or {
+        'migration': name,
+        'source': source_collection,
+        'target': target_collection,
+        'last_document_id': None,
+        'migrated': 0,
+        'skipped': 0,
+        'checksum': 0,
+        'completed': False,
+        'started_at': datetime.now(timezone.utc).isoformat()
+    }
+    if checkpoint['last_document_id']:
+        logger.info(f"Resuming migration {name} after document {checkpoint['last_document_id']}")
+
+    # Source documents not yet known to be committed: sequence -> (source document ID, checksum),
+    # with no checksum for a skipped document. Skipped documents are counted once the writes before them are.
+    pending = OrderedDict()
+    lock = threading.Lock()
+
+    def _count_through(committed_through: Optional[int]):
+        while pending and (committed_through is None or next(iter(pending)) <= committed_through):
+            _, (document_id, checksum) = pending.popitem(last=False)
+            checkpoint['last_document_id'] = document_id
+            if checksum is None:
+                checkpoint['skipped'] += 1
+            else:
+                checkpoint['migrated'] += 1
+                checkpoint['checksum'] = (checkpoint['checksum'] + checksum) % CHECKSUM_MODULUS
+
+    def _on_commit(writes: int, committed_through: int):
+        with lock:
+            _count_through(committed_through)
+            checkpoint['updated_at'] = datetime.now(timezone.utc).isoformat()
+            save_checkpoint(path, checkpoint)
+
+    db = get_db()
+    target = db.collection(target_collection)
+    write_limiter = RateLimiter(max_writes_per_second) if max_writes_per_second else None
+    read_limiter = RateLimiter(max_reads_per_second) if max_reads_per_second else None
+
+    sequence = 0
+    read = 0
+    finished = True
+    with BatchWriter(db, batch_size=min(page_size, MAX_BATCH_WRITES), max_writers=max_writers,
+                     on_commit=_on_commit, rate_limiter=write_limiter) as writer:
+        for page in iter_source_pages(source_collection, checkpoint['last_document_id'], page_size, read_limiter):
+            for snapshot in page:
+                if limit is not None and read >= limit:
+                    finished = False
+                    break
+                read += 1
+
+                result = transform(snapshot.id, snapshot.to_dict() or {})
+                if result is None:
+                    with lock:
+                        pending[sequence] = (snapshot.id, None)
+                    sequence += 1
+                    continue
+
+                target_id, data = result
+                checksum = document_checksum(target_id, data, _server_fields(data))
+                with lock:
+                    pending[sequence] = (snapshot.id, checksum)
+                writer.set(target.document(target_id), data, sequence=sequence)
+                sequence += 1
+            if not finished:
+                break
+
+    # Every batch is committed: count the documents skipped after the last write
+    with lock:
+        _count_through(None)
+        checkpoint['completed'] = finished
+        checkpoint['updated_at'] = datetime.now(timezone.utc).isoformat()
+        save_checkpoint(path, checkpoint)
+
+    logger.info(
+        f"Migration {name}: {checkpoint['migrated']} documents migrated, {checkpoint['skipped']} skipped "
+        f"from {source_collection} to {target_collection} (checksum {checkpoint['checksum']:032x})"
+    )
+    return checkpoint
+
+def verify(
+    name: str,
+    source_collection: str,
+    target_collection: str,
+    transform: Transform = copy_document,
+    page_size: int = PAGE_SIZE,
+    max_reads_per_second: Optional[float] = None,
+    max_reported: int = 20
+) -> Dict[str, Any]:
+    """Compare every target document with its transformed source document"""
+
+    db = get_db()
+    target = db.collection(target_collection)
+    read_limiter = RateLimiter(max_reads_per_second) if max_reads_per_second else None
+
+    report = {'checked': 0, 'missing': 0, 'mismatched': 0, 'checksum': 0, 'errors': []}
+    for page in iter_source_pages(source_collection, None, page_size, read_limiter):
+        expected = {}
+        for snapshot in page:
+            result = transform(snapshot.id, snapshot.to_dict() or {})
+            if result is not None:
+                expected[result[0]] = result[1]
+        if not expected:
+            continue
+
+        references = [target.document(target_id) for target_id in expected]
+        for target_snapshot in db.get_all(references):
+            data = expected[target_snapshot.id]
+            ignored = _server_fields(data)
+            checksum = document_checksum(target_snapshot.id, data, ignored)
+            report['checked'] += 1
+            report['checksum'] = (report['checksum'] + checksum) % CHECKSUM_MODULUS
+
+            if not target_snapshot.exists:
+                report['missing'] += 1
+                problem = 'missing'
+            elif document_checksum(target_snapshot.id, target_snapshot.to_dict() or {}, ignored) != checksum:
+                report['mismatched'] += 1
+                problem = 'mismatched'
+            else:
+                continue
+            if len(report['errors']) < max_reported:
+                report['errors'].append({'document_id': target_snapshot.id, 'problem': problem})
+
+    checkpoint = load_checkpoint(checkpoint_path(name, source_collection, target_collection))
+    report['checkpoint_checksum_matches'] = (
+        checkpoint is not None and checkpoint.get('completed') and checkpoint['checksum'] == report['checksum']
+    )
+    report['checksum'] = f"{report['checksum']:032x}"
+
+    logger.info(
+        f"Verified migration {name}: {report['checked']} documents, {report['missing']} missing, "
+        f"{report['mismatched']} mismatched"
+    )
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy or transform documents between collection generations")
+    parser.add_argument("migration", help=f"Named migration ({', '.join(MIGRATIONS)}) or a name for a custom one")
+    parser.add_argument("--source", help="Source collection (custom migrations)")
+    parser.add_argument("--target", help="Target collection (custom migrations)")
+    parser.add_argument("--transform", help="Transform as 'module:function' (default: copy)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS, help="Number of batches committed in parallel")
+    parser.add_argument("--max-writes-per-second", type=float, default=None)
+    parser.add_argument("--max-reads-per-second", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many source documents (the migration can be resumed)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and migrate from the first document")
+    parser.add_argument("--verify", action="store_true", help="Compare the target documents with the transformed source documents")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    source, target, transform = MIGRATIONS.get(args.migration, (None, None, copy_document))
+    source = args.source or source
+    target = args.target or target
+    if args.transform:
+        transform = load_transform(args.transform)
+    if not source or not target:
+        parser.error("--source and --target are required for custom migrations")
+
+    if args.verify:
+        report = verify(args.migration, source, target, transform, args.page_size, args.max_reads_per_second)
+        print(json.dumps(report, indent=2))
+        if report['missing'] or report['mismatched']:
+            raise SystemExit(1)
+        return
+
+    migrate(
+        args.migration, source, target, transform, args.page_size, args.writers,
+        args.max_writes_per_second, args.max_reads_per_second, args.restart, args.limit
+    )
+
+if __name__ == "__main__":
+    main()
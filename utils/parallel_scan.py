@@ -0,0 +1,110 @@
+"""
+Parallel collection scans for the Case Study Evaluation Hub.
+Splits a collection into key ranges with Firestore partition queries and reads the
+partitions concurrently, yielding documents as they arrive so that the caller can
+aggregate them while the rest of the collection is still being read.
+
+    for snapshot in parallel_scan('evaluations_v2', field_paths=['evaluator_email', 'evaluation_score']):
+        ...
+
+Documents are yielded in no particular order.
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional
+
+from utils.firestore_manager import get_db
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default number of partitions read concurrently
+DEFAULT_PARTITIONS = 8
+
+# Documents buffered between the readers and the caller, so memory stays bounded
+QUEUE_SIZE = 2000
+
+# Seconds between checks for an abandoned scan while a reader waits for the caller
+PUT_TIMEOUT = 0.5
+
+_DONE = object()
+
+def partition_queries(collection_name: str, partitions: int = DEFAULT_PARTITIONS, field_paths: Optional[List[str]] = None) -> List[Any]:
+    """Queries covering disjoint key ranges of a collection, in document ID order"""
+
+    db = get_db()
+    collection = db.collection(collection_name)
+    base = collection.select(field_paths) if field_paths is not None else collection
+    if partitions <= 1:
+        return [base]
+
+    queries = []
+    for partition in db.collection_group(collection_name).get_partitions(partitions):
+        # Partition bounds are document references; rebuild the query on the collection itself
+        query = base.order_by('__name__')
+        if partition.start_at is not None:
+            query = query.start_at([partition.start_at])
+        if partition.end_at is not None:
+            query = query.end_before([partition.end_at])
+        queries.append(query)
+    return queries
+
+def parallel_scan(
+    collection_name: str,
+    partitions: int = DEFAULT_PARTITIONS,
+    field_paths: Optional[List[str]] = None,
+    max_workers: Optional[int] = None
+) -> Iterator[Any]:
+    """Yield every document snapshot of a collection, reading its partitions concurrently"""
+
+    queries = partition_queries(collection_name, partitions, field_paths)
+    if len(queries) == 1:
+        yield from queries[0].stream()
+        return
+
+    results = queue.Queue(maxsize=QUEUE_SIZE)
+    stopped = threading.Event()
+
+    def _put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(query):
+        try:
+            for snapshot in query.stream():
+                if not _put(snapshot):
+                    return
+        except Exception as e:
+            logger.error(f"Error scanning a partition of {collection_name}: {str(e)}")
+            _put(e)
+        finally:
+            _put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(queries), thread_name_prefix="parallel-scan")
+    try:
+        # Each reader runs in a copy of the caller's context, so its reads are attributed to the caller
+        for query in queries:
+            executor.submit(contextvars.copy_context().run, _read, query)
+
+        remaining = len(queries)
+        while remaining:
+            item = results.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        # Also reached when the caller stops iterating early
+        stopped.set()
+        executor.shutdown(wait=False)
@@ -0,0 +1,221 @@
+"""
+Case study prefetching for the Case Study Evaluation Hub.
+Keeps a small per-session queue of unevaluated case studies, selected and decoded in the
+background while the user reads the current one, so that submitting an evaluation or
+skipping a document swaps in the next case study without waiting for a new scan.
+
+    prefetcher = get_prefetcher("case_studies_v2", "evaluations_v2")
+    case_study = prefetcher.next_case_study()
+    ...
+    prefetcher.evaluated(case_study)
+
+The queue stays consistent with the user's writes: evaluated (or skipped) case studies and
+any other case study from the same clean URL are dropped from it and excluded from later
+selections, and deleting evaluations makes their case studies eligible again. Callers undo these changes
+when the write fails (see the `on_rollback` callbacks of the evaluation store).
+"""
+
+import logging
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterable, List, Optional
+
+import streamlit as st
+
+from utils.firestore_manager import get_unevaluated_case_studies
+from utils.records import CaseStudy
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of case studies kept ready after the current one
+PREFETCH_DEPTH = 2
+
+# Background selections shared by all sessions
+MAX_PREFETCH_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_PREFETCH_WORKERS, thread_name_prefix="prefetch")
+_prefetchers = weakref.WeakSet()
+
+class CaseStudyPrefetcher:
+    """Queue of unevaluated case studies for one user, refilled in the background"""
+
+    def __init__(self, user_email: str, case_studies_collection_name: str, evaluations_collection_name: str, depth: int = PREFETCH_DEPTH):
+        self.user_email = user_email
+        self.case_studies_collection_name = case_studies_collection_name
+        self.evaluations_collection_name = evaluations_collection_name
+        self.depth = depth
+        self._lock = threading.Lock()
+        self._ready = deque()
+        self._future = None
+
+        # Case studies handed out this session (evaluated, skipped or current), by ID, with their clean URL
+        self._excluded = {}
+
+        # Set when a selection found fewer case studies than requested: none are left to prefetch
+        # until exclusions are lifted (counted by the generation, as a selection may be running)
+        self._exhausted = False
+        self._generation = 0
+        _prefetchers.add(self)
+
+    # # # # # # # # # # #
+    # Selection
+    # # # # # # # # # # #
+
+    def _select(self, count: int) -> List[CaseStudy]:
+        """Select case studies that are neither queued nor excluded (runs without holding the lock)"""
+
+        with self._lock:
+            exclude_ids = set(self._excluded) | {case_study.id for case_study in self._ready}
+            exclude_urls = {url for url in self._excluded.values() if url}
+            generation = self._generation
+        case_studies = get_unevaluated_case_studies(
+            self.user_email,
+            self.case_studies_collection_name,
+            self.evaluations_collection_name,
+            count=count,
+            exclude_ids=exclude_ids,
+            exclude_clean_urls=exclude_urls
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._exhausted = len(case_studies) < count
+        return case_studies
+
+    def _accept(self, case_studies: Iterable[CaseStudy]):
+        """Queue selected case studies that are still eligible (the user may have moved on meanwhile)"""
+
+        with self._lock:
+            queued = {case_study.id for case_study in self._ready}
+            excluded_urls = {url for url in self._excluded.values() if url}
+            for case_study in case_studies:
+                if case_study.id in self._excluded or case_study.id in queued:
+                    continue
+                if case_study.clean_url and case_study.clean_url in excluded_urls:
+                    continue
+                self._ready.append(case_study)
+                queued.add(case_study.id)
+
+    def _refill(self):
+        try:
+            self._accept(self._select(self.depth))
+        except Exception as e:
+            logger.error(f"Error prefetching case studies: {str(e)}")
+
+    def prefetch(self):
+        """Start a background selection if the queue is short and none is running"""
+
+        with self._lock:
+            if self._exhausted or len(self._ready) >= self.depth or (self._future is not None and not self._future.done()):
+                return
+            self._future = _executor.submit(self._refill)
+
+    # # # # # # # # # # #
+    # Queue
+    # # # # # # # # # # #
+
+    def _pop(self) -> Optional[CaseStudy]:
+        with self._lock:
+            if not self._ready:
+                return None
+            case_study = self._ready.popleft()
+            self._excluded[case_study.id] = case_study.clean_url
+            return case_study
+
+    def next_case_study(self) -> Optional[CaseStudy]:
+        """
+        The next case study to evaluate: a prefetched one when ready, otherwise the result of the
+        running background selection, or of a new selection that also fills the queue.
+        Returns None if no unevaluated case studies are left.
+        """
+
+        case_study = self._pop()
+        refilled = False
+        if case_study is None:
+            with self._lock:
+                future = self._future
+            if future is not None and not future.done():
+                future.result()
+                case_study = self._pop()
+                refilled = True
+
+        # A background selection that just found none left need not be repeated
+        if case_study is None and not (refilled and self._exhausted):
+            # Select the current case study and the queue with a single scan
+            self._accept(self._select(self.depth + 1))
+            case_study = self._pop()
+
+        self.prefetch()
+        return case_study
+
+    def evaluated(self, case_study: CaseStudy):
+        """Record that a case study was evaluated or skipped: it and its clean URL are not offered again"""
+
+        clean_url = case_study.clean_url
+        with self._lock:
+            self._excluded[case_study.id] = clean_url
+            self._ready = deque(
+                queued for queued in self._ready
+                if queued.id != case_study.id and not (clean_url and queued.clean_url == clean_url)
+            )
+        self.prefetch()
+
+    def evaluations_deleted(self, case_study_ids: Iterable[str]):
+        """Make the case studies of deleted evaluations eligible again"""
+
+        with self._lock:
+            for case_study_id in case_study_ids:
+                self._excluded.pop(case_study_id, None)
+            self._exhausted = False
+            self._generation += 1
+
+    def evaluations_restored(self, case_study_ids: Iterable[str]):
+        """Exclude again the case studies of evaluations whose delete failed"""
+
+        case_study_ids = set(case_study_ids)
+        with self._lock:
+            for case_study_id in case_study_ids:
+                self._excluded.setdefault(case_study_id, None)
+            self._ready = deque(queued for queued in self._ready if queued.id not in case_study_ids)
+        self.prefetch()
+
+    def discard(self, case_study_ids: Iterable[str]):
+        """Drop case studies that no longer exist from the queue"""
+
+        case_study_ids = set(case_study_ids)
+        with self._lock:
+            self._ready = deque(queued for queued in self._ready if queued.id not in case_study_ids)
+        self.prefetch()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for the running background selection, if any"""
+
+        with self._lock:
+            future = self._future
+        if future is not None:
+            wait([future], timeout=timeout)
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+def get_prefetcher(case_studies_collection_name: str, evaluations_collection_name: str) -> CaseStudyPrefetcher:
+    """Prefetcher of the current session and user for a pair of collections"""
+
+    state_key = f"prefetcher_{case_studies_collection_name}"
+    prefetcher = st.session_state.get(state_key)
+    if (
+        prefetcher is None
+        or prefetcher.user_email != st.session_state.email
+        or prefetcher.evaluations_collection_name != evaluations_collection_name
+    ):
+        prefetcher = CaseStudyPrefetcher(st.session_state.email, case_studies_collection_name, evaluations_collection_name)
+        st.session_state[state_key] = prefetcher
+    return prefetcher
+
+def wait_for_prefetches(timeout: Optional[float] = None):
+    """Wait for the background selections of every session (benchmarks and tests)"""
+
+    for prefetcher in list(_prefetchers):
+        prefetcher.wait(timeout)
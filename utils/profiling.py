@@ -0,0 +1,250 @@
+"""
+Profiling hooks for the Case Study Evaluation Hub.
+Opt-in per-rerun profiling of Streamlit pages, with wall/CPU time per section and
+optional cProfile and tracemalloc snapshots.
+
+Profiling is enabled with the `profile` query parameter (e.g. `?profile=1`) or the
+EVALHUB_PROFILE environment variable. Its value is a comma-separated list of options:
+`cprofile` adds a cProfile dump per rerun and `memory` adds a tracemalloc snapshot
+(`all` enables both; any other value only records section timings).
+
+Fragments decorated with `instrumented_fragment` are instrumented and profiled like a page
+rerun when they rerun on their own, as these reruns do not go through the page.
+
+Each rerun is written to PROFILES_DIR as:
+- <name>.json: section timings and memory statistics
+- <name>.folded: section timings in collapsed-stack format (flamegraph.pl, speedscope)
+- <name>.prof: cProfile statistics (snakeviz, flameprof, pstats)
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+import streamlit as st
+
+from utils.instrumentation import begin_rerun, end_rerun, in_rerun
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where rerun profiles are stored
+PROFILES_DIR = "cache/profiles"
+
+# Number of reruns kept on disk
+MAX_STORED_PROFILES = 200
+
+# Number of allocation sites kept from each tracemalloc snapshot
+TOP_ALLOCATIONS = 25
+
+PROFILE_ENV_VAR = "EVALHUB_PROFILE"
+PROFILE_QUERY_PARAM = "profile"
+
+# Session state key of the page title, set by the app for the fragment reruns
+PAGE_STATE_KEY = "instrumentation_page"
+
+_current_profile = contextvars.ContextVar('current_profile', default=None)
+
+def get_profiling_options() -> Optional[Set[str]]:
+    """Return the requested profiling options, or None if profiling is disabled"""
+
+    value = os.environ.get(PROFILE_ENV_VAR, "")
+    try:
+        value = st.query_params.get(PROFILE_QUERY_PARAM, value) or value
+    except Exception:
+        pass
+
+    value = str(value).strip().lower()
+    if not value or value in ("0", "false", "off"):
+        return None
+
+    options = {option.strip() for option in value.split(",") if option.strip()}
+    if "all" in options:
+        options |= {"cprofile", "memory"}
+    return options
+
+def is_profiling() -> bool:
+    """Check whether the current rerun is being profiled"""
+    return _current_profile.get() is not None
+
+@contextlib.contextmanager
+def profile_section(name: str):
+    """Record the wall and CPU time of a section of a page; does nothing unless the rerun is profiled"""
+
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    stack = profile['stack']
+    stack.append(name)
+    path = ";".join(stack)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        section = profile['sections'].setdefault(path, {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0})
+        section['calls'] += 1
+        section['wall_ms'] += (time.perf_counter() - wall_start) * 1000
+        section['cpu_ms'] += (time.thread_time() - cpu_start) * 1000
+        stack.pop()
+
+@contextlib.contextmanager
+def profile_rerun(page: str, fragment: Optional[str] = None):
+    """Profile a whole page rerun (or a fragment rerun) when profiling is enabled"""
+
+    options = get_profiling_options()
+    if options is None or _current_profile.get() is not None:
+        yield
+        return
+
+    profile = {
+        'rerun_id': uuid.uuid4().hex[:12],
+        'page': page,
+        'fragment': fragment,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'options': sorted(options),
+        'sections': {},
+        'stack': []
+    }
+    token = _current_profile.set(profile)
+
+    profiler = None
+    if "cprofile" in options:
+        profiler = cProfile.Profile()
+
+    started_tracemalloc = False
+    if "memory" in options and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracemalloc = True
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with profile_section("rerun"):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+        memory = None
+        if "memory" in options and tracemalloc.is_tracing():
+            memory = _memory_statistics(tracemalloc.take_snapshot())
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+        _current_profile.reset(token)
+        _save_profile(profile, profiler, memory)
+
+def instrumented_fragment(func):
+    """
+    Streamlit fragment whose own reruns are attributed and profiled like page reruns.
+    Only full reruns go through the page, where the app starts the instrumentation.
+    """
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        page = st.session_state.get(PAGE_STATE_KEY)
+
+        # Part of a page rerun (or of a page run outside of the app): already handled
+        if in_rerun() or page is None:
+            return func(*args, **kwargs)
+
+        fragment = func.__qualname__
+        begin_rerun(page, st.session_state.get('instrumentation_session_id'), st.session_state.get('email'), fragment=fragment)
+        try:
+            with profile_rerun(page, fragment=fragment):
+                return func(*args, **kwargs)
+        finally:
+            end_rerun()
+
+    return st.fragment(run)
+
+def _memory_statistics(snapshot) -> Dict[str, Any]:
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'current_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'top_allocations': [
+            {'location': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+        ]
+    }
+
+def _collapsed_stacks(sections: Dict[str, Dict[str, float]]) -> List[str]:
+    """Convert nested section timings to collapsed stacks with self time in microseconds"""
+
+    lines = []
+    for path, section in sections.items():
+        children_ms = sum(
+            child['wall_ms'] for child_path, child in sections.items()
+            if child_path.startswith(path + ";") and child_path.count(";") == path.count(";") + 1
+        )
+        self_us = int(max(0.0, section['wall_ms'] - children_ms) * 1000)
+        if self_us:
+            lines.append(f"{path} {self_us}")
+    return lines
+
+def _save_profile(profile: Dict[str, Any], profiler: Optional[cProfile.Profile], memory: Optional[Dict[str, Any]]):
+    try:
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        page = re.sub(r"[^A-Za-z0-9_-]+", "_", profile['page'] or "page")
+        base = os.path.join(PROFILES_DIR, f"{timestamp}-{page}-{profile['rerun_id']}")
+
+        record = {key: value for key, value in profile.items() if key != 'stack'}
+        record['memory'] = memory
+        with open(f"{base}.json", 'w') as f:
+            json.dump(record, f, indent=2)
+
+        with open(f"{base}.folded", 'w') as f:
+            f.write("\n".join(_collapsed_stacks(profile['sections'])) + "\n")
+
+        if profiler is not None:
+            profiler.dump_stats(f"{base}.prof")
+
+        _prune_profiles()
+        logger.info(f"Saved rerun profile: {base}")
+
+    except Exception as e:
+        logger.error(f"Error saving rerun profile: {str(e)}")
+
+def _prune_profiles():
+    """Keep only the most recent profiles on disk"""
+
+    reruns = sorted({name.rsplit(".", 1)[0] for name in os.listdir(PROFILES_DIR)})
+    for base in reruns[:-MAX_STORED_PROFILES]:
+        for extension in ("json", "folded", "prof"):
+            path = os.path.join(PROFILES_DIR, f"{base}.{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Return the stored rerun profiles, most recent first"""
+
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+
+    profiles = []
+    for name in sorted(os.listdir(PROFILES_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILES_DIR, name), 'r') as f:
+                record = json.load(f)
+            record['base_path'] = os.path.join(PROFILES_DIR, name[:-len(".json")])
+            profiles.append(record)
+        except Exception as e:
+            logger.error(f"Error reading profile {name}: {str(e)}")
+    return profiles
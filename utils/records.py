@@ -0,0 +1,295 @@
+"""
+Record types for the Case Study Evaluation Hub.
+Case studies, their classification and evaluations are decoded once, when read from
+Firestore, into compact `__slots__` records instead of being passed around as dictionaries.
+
+Decoding validates the field types a single time, so the analyses do not need to check them
+again, and interns the strings that repeat across records (evaluator emails, improvement
+areas, taxonomy labels). Records are read-only views that behave like the dictionaries they
+replace: `record['evaluation_score']`, `record.get('source_url')`, `'timestamp' in record`.
+A field stored as null is treated as missing.
+"""
+
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.markdown_helper import clean_case_study_content
+from utils.url_helper import URLHelper
+
+# Values of the joined case study fields when the case study does not exist
+NO_URL = 'No URL provided'
+NO_SUMMARY = 'No summary available'
+
+_MISSING = object()
+
+def _intern(value: Any) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else None
+
+def _text(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    return value if isinstance(value, datetime) else None
+
+def _score(value: Any) -> Optional[float]:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+class Record(Mapping):
+    """Read-only mapping over the slots listed in _FIELDS, plus derived and unknown fields"""
+
+    __slots__ = ()
+
+    _FIELDS: Tuple[str, ...] = ()
+
+    # # # # # # # # # # #
+    # Mapping interface
+    # # # # # # # # # # #
+
+    def _value(self, key: str) -> Any:
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            return _MISSING if value is None else value
+        extra = self.extra
+        if extra is not None and key in extra:
+            return extra[key]
+        return self._derived(key)
+
+    def _derived(self, key: str) -> Any:
+        """Value of a field computed from other fields, or _MISSING"""
+        return _MISSING
+
+    def _derived_keys(self) -> Tuple[str, ...]:
+        return ()
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._value(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._value(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._value(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+        for key in self._derived_keys():
+            if self._derived(key) is not _MISSING:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dictionary copy, with nested records converted too"""
+        return {key: value.to_dict() if isinstance(value, Record) else value for key, value in self.items()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({getattr(self, 'id', None)!r})"
+
+class Classification(Record):
+    """Industry and taxonomy labels of a case study, stored as tuples of interned strings"""
+
+    __slots__ = ('industry', 'business_functions', 'business_impacts', 'maturity_models', 'extra')
+
+    def __init__(self, industry, business_functions, business_impacts, maturity_models, extra=None):
+        self.industry = industry                      # (category, subcategory) or None
+        self.business_functions = business_functions  # ((category, subcategory), ...)
+        self.business_impacts = business_impacts      # ((category, subcategory), ...)
+        self.maturity_models = maturity_models        # ((level, category, subcategory), ...)
+        self.extra = extra
+
+    @staticmethod
+    def _pairs(items: Any) -> Tuple[Tuple[Optional[str], Optional[str]], ...]:
+        if not isinstance(items, list):
+            return ()
+        return tuple(
+            (_intern(item.get('category')), _intern(item.get('subcategory')))
+            for item in items if isinstance(item, dict)
+        )
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Optional["Classification"]:
+        """Decode a classification; returns None if it is not an object"""
+
+        if not isinstance(data, dict):
+            return None
+
+        industry = data.get('industry')
+        models = data.get('maturity_models')
+        extra = {
+            key: value for key, value in data.items()
+            if key not in ('industry', 'business_functions', 'business_impacts', 'maturity_models')
+        }
+        return cls(
+            (_intern(industry.get('category')), _intern(industry.get('subcategory'))) if isinstance(industry, dict) else None,
+            cls._pairs(data.get('business_functions')),
+            cls._pairs(data.get('business_impacts')),
+            tuple(
+                (_intern(model.get('level')), _intern(model.get('category')), _intern(model.get('subcategory')))
+                for model in models if isinstance(model, dict)
+            ) if isinstance(models, list) else (),
+            extra or None
+        )
+
+    def _value(self, key: str) -> Any:
+        # The mapping view rebuilds the nested objects of the stored document
+        if key == 'industry':
+            if self.industry is None:
+                return _MISSING
+            return _labels(('category', 'subcategory'), self.industry)
+        if key in ('business_functions', 'business_impacts'):
+            return [_labels(('category', 'subcategory'), item) for item in getattr(self, key)]
+        if key == 'maturity_models':
+            return [_labels(('level', 'category', 'subcategory'), item) for item in self.maturity_models]
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        return _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        if self.industry is not None:
+            yield 'industry'
+        yield from ('business_functions', 'business_impacts', 'maturity_models')
+        if self.extra:
+            yield from self.extra
+
+def _labels(names: Tuple[str, ...], values: Tuple[Optional[str], ...]) -> Dict[str, str]:
+    return {name: value for name, value in zip(names, values) if value is not None}
+
+class CaseStudy(Record):
+    """Case study document; its clean URL is computed on first use"""
+
+    __slots__ = (
+        'id', 'source_url', '_clean_url', 'case_study_final', 'case_study_summary',
+        'classification', 'created_at', 'updated_at', 'extra'
+    )
+
+    _FIELDS = (
+        'id', 'source_url', 'clean_url', 'case_study_final', 'case_study_summary',
+        'classification', 'created_at', 'updated_at'
+    )
+
+    def __init__(self, id, source_url=None, case_study_final=None, case_study_summary=None,
+                 classification=None, created_at=None, updated_at=None, extra=None, clean_url=None):
+        self.id = id
+        self.source_url = source_url
+        self._clean_url = clean_url
+        self.case_study_final = case_study_final
+        self.case_study_summary = case_study_summary
+        self.classification = classification
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.extra = extra
+
+    @property
+    def clean_url(self) -> str:
+        # Documents without a URL get an empty clean URL
+        if self._clean_url is None:
+            self._clean_url = sys.intern(URLHelper.clean_url(self.source_url)) if self.source_url else ''
+        return self._clean_url
+
+    @classmethod
+    def from_document(cls, document_id: str, data: Optional[Dict[str, Any]]) -> "CaseStudy":
+        """Decode a case study document"""
+
+        data = data or {}
+        extra = {key: value for key, value in data.items() if key not in _CASE_STUDY_FIELDS}
+        summary = data.get('case_study_summary')
+        content = _text(data.get('case_study_final'))
+        return cls(
+            sys.intern(document_id),
+            _text(data.get('source_url')),
+            # Separator lines are replaced once here, not on every render
+            clean_case_study_content(content) if content else content,
+            summary if isinstance(summary, dict) else None,
+            Classification.from_dict(data.get('classification')),
+            _timestamp(data.get('created_at')),
+            _timestamp(data.get('updated_at')),
+            extra or None,
+            _text(data.get('clean_url'))
+        )
+
+_CASE_STUDY_FIELDS = frozenset(CaseStudy._FIELDS)
+
+# Stands for the case study of an evaluation when it no longer exists
+UNKNOWN_CASE_STUDY = CaseStudy('', source_url=NO_URL, case_study_final=NO_SUMMARY, clean_url='')
+
+class Evaluation(Record):
+    """Evaluation document, optionally joined with its case study"""
+
+    __slots__ = (
+        'id', 'case_study_id', 'case_study_url', 'evaluator_email', 'evaluation_score',
+        'improvement_area', 'improvement_feedback', 'timestamp', 'case_study', 'extra'
+    )
+
+    _FIELDS = __slots__[:-2]
+
+    # Fields read from the joined case study
+    _JOINED = ('source_url', 'case_study_final')
+
+    def __init__(self, id, case_study_id=None, case_study_url=None, evaluator_email=None, evaluation_score=None,
+                 improvement_area=None, improvement_feedback=None, timestamp=None, case_study=None, extra=None):
+        self.id = id
+        self.case_study_id = case_study_id
+        self.case_study_url = case_study_url
+        self.evaluator_email = evaluator_email
+        self.evaluation_score = evaluation_score
+        self.improvement_area = improvement_area
+        self.improvement_feedback = improvement_feedback
+        self.timestamp = timestamp
+        self.case_study = case_study
+        self.extra = extra
+
+    @classmethod
+    def from_document(cls, document_id: str, data: Optional[Dict[str, Any]]) -> "Evaluation":
+        """Decode an evaluation document"""
+
+        data = data or {}
+        extra = {key: value for key, value in data.items() if key not in _EVALUATION_FIELDS}
+        return cls(
+            _text(data.get('id')) or document_id,
+            _intern(data.get('case_study_id')),
+            _text(data.get('case_study_url')),
+            _intern(data.get('evaluator_email')),
+            _score(data.get('evaluation_score')),
+            _intern(data.get('improvement_area')),
+            _text(data.get('improvement_feedback')),
+            _timestamp(data.get('timestamp')),
+            None,
+            extra or None
+        )
+
+    def join(self, case_study: Optional[CaseStudy]) -> "Evaluation":
+        """Attach the evaluated case study, shared by all its evaluations"""
+        self.case_study = case_study if case_study is not None else UNKNOWN_CASE_STUDY
+        return self
+
+    def _derived(self, key: str) -> Any:
+        if self.case_study is None or key not in self._JOINED:
+            return _MISSING
+        value = getattr(self.case_study, key)
+        if value is None:
+            return NO_URL if key == 'source_url' else NO_SUMMARY
+        return value
+
+    def _derived_keys(self) -> Tuple[str, ...]:
+        return self._JOINED
+
+    @property
+    def source_url(self) -> Optional[str]:
+        return self.get('source_url')
+
+    @property
+    def case_study_final(self) -> Optional[str]:
+        return self.get('case_study_final')
+
+_EVALUATION_FIELDS = frozenset(Evaluation._FIELDS)
@@ -0,0 +1,375 @@
+"""
+Report builder for the Case Study Evaluation Hub.
+Renders the Team Summary of each evaluation round as static HTML and Markdown reports.
+
+Evaluations are loaded once per round and every analysis of `evaluation_helpers` is computed
+once; the per-evaluator and per-area documents are rendered in a process pool. Each round is
+written to REPORTS_DIR/<round>/ and swapped in atomically, so the app can serve the latest
+complete report at any time:
+
+    <round>/index.md, index.html          overview (scores, evaluators, areas, top/lowest)
+    <round>/evaluators/<evaluator>.md|html one document per evaluator
+    <round>/areas/<area>.md|html           one document per improvement area
+    <round>/manifest.json                  generation time and document list
+
+    python -m utils.report_builder
+    python -m utils.report_builder --rounds round_2 --workers 8
+"""
+
+import argparse
+import html
+import json
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from utils.evaluation_helpers import (
+    TeamSummaryStats,
+    analyze_improvement_areas_detailed,
+    analyze_user_details,
+    iter_evaluation_batches,
+    join_case_studies,
+    load_case_studies,
+)
+from utils.profiling import instrumented_fragment
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where the reports are written
+REPORTS_DIR = "cache/reports"
+
+# Evaluation rounds: name -> (title, evaluations collection, case studies collection)
+ROUNDS = {
+    'round_1': ("AI Case Study Evaluation (1)", 'evaluations', 'case_studies'),
+    'round_2': ("AI Case Study Evaluation (2)", 'evaluations_v2', 'case_studies_v2')
+}
+
+# # # # # # # # # # #
+# Documents
+# # # # # # # # # # #
+# A document is a title and a list of blocks, rendered to both Markdown and HTML:
+# ('heading', text), ('paragraph', text), ('quote', text), ('link', url), ('table', rows)
+
+Document = Tuple[str, List[Tuple[str, Any]]]
+
+def slugify(text: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:80] or "untitled"
+
+def _unique_slug(text: str, used: set) -> str:
+    slug = base = slugify(text)
+    index = 2
+    while slug in used:
+        slug = f"{base}-{index}"
+        index += 1
+    used.add(slug)
+    return slug
+
+def _format_timestamp(timestamp) -> str:
+    return timestamp.strftime('%Y-%m-%d %H:%M:%S') if hasattr(timestamp, 'strftime') else 'No date'
+
+def _format_score(score) -> str:
+    return f"{score}/10" if isinstance(score, (int, float)) else 'N/A'
+
+# Table column holding the relative path of a linked document
+LINK_COLUMN = 'Report'
+
+def _markdown_cell(column: str, value) -> str:
+    if column == LINK_COLUMN and value:
+        # The Markdown documents link to each other
+        return f"[open]({value[:-len('.html')]}.md)"
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+def _html_cell(column: str, value) -> str:
+    if column == LINK_COLUMN and value:
+        return f'<a href="{html.escape(value)}">open</a>'
+    return html.escape(str(value))
+
+def render_markdown(document: Document) -> str:
+    title, blocks = document
+    lines = [f"# {title}", ""]
+    for kind, value in blocks:
+        if kind == 'heading':
+            lines += [f"## {value}", ""]
+        elif kind == 'paragraph':
+            lines += [value, ""]
+        elif kind == 'quote':
+            lines += ["> " + line for line in str(value).splitlines() or [""]] + [""]
+        elif kind == 'link':
+            lines += [f"<{value}>", ""]
+        elif kind == 'table' and value:
+            columns = list(value[0])
+            lines.append("| " + " | ".join(columns) + " |")
+            lines.append("|" + "---|" * len(columns))
+            for row in value:
+                lines.append("| " + " | ".join(_markdown_cell(column, row[column]) for column in columns) + " |")
+            lines.append("")
+    return "\n".join(lines)
+
+_HTML_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; max-width: 1100px; margin: 2rem auto; padding: 0 1rem; color: #1f1f1f; }
+h1, h2 { color: #0066cc; }
+table { border-collapse: collapse; width: 100%; margin-bottom: 1.5rem; }
+th, td { border: 1px solid #ddd; padding: 6px 10px; text-align: left; vertical-align: top; }
+th { background-color: #f8f9fa; }
+blockquote { border-left: 4px solid #ddd; margin: 0 0 1rem 0; padding: 0.2rem 1rem; color: #444; }
+"""
+
+def render_html(document: Document) -> str:
+    title, blocks = document
+    body = [f"<h1>{html.escape(title)}</h1>"]
+    for kind, value in blocks:
+        if kind == 'heading':
+            body.append(f"<h2>{html.escape(value)}</h2>")
+        elif kind == 'paragraph':
+            # Paragraphs may contain **bold** labels
+            text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html.escape(value))
+            body.append(f"<p>{text}</p>")
+        elif kind == 'quote':
+            body.append(f"<blockquote>{html.escape(str(value))}</blockquote>")
+        elif kind == 'link':
+            url = html.escape(str(value))
+            body.append(f'<p><a href="{url}">{url}</a></p>')
+        elif kind == 'table' and value:
+            columns = list(value[0])
+            header = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+            rows = "".join(
+                "<tr>" + "".join(f"<td>{_html_cell(column, row[column])}</td>" for column in columns) + "</tr>"
+                for row in value
+            )
+            body.append(f"<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>")
+    return (
+        f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+        f"<style>{_HTML_STYLE}</style></head><body>\n" + "\n".join(body) + "\n</body></html>\n"
+    )
+
+def _write_document(document: Document, base_path: str):
+    with open(f"{base_path}.md", 'w', encoding='utf-8') as f:
+        f.write(render_markdown(document))
+    with open(f"{base_path}.html", 'w', encoding='utf-8') as f:
+        f.write(render_html(document))
+
+def _evaluation_blocks(label: str, evaluation: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    return [
+        ('heading', label),
+        ('paragraph', f"**Date:** {_format_timestamp(evaluation.get('timestamp'))} · "
+                      f"**Score:** {_format_score(evaluation.get('score'))} · "
+                      f"**Area:** {evaluation.get('improvement_area', 'Not specified')}"),
+        ('link', evaluation.get('source_url', 'No URL provided')),
+        ('quote', evaluation.get('feedback', 'No feedback provided'))
+    ]
+
+def evaluator_document(round_title: str, details: Dict[str, Any]) -> Document:
+    """Every evaluation of one evaluator, highest scores first"""
+
+    blocks = [('paragraph', f"**{round_title}** · {details['count']} evaluations")]
+    for index, evaluation in enumerate(details['evaluations'], 1):
+        blocks += _evaluation_blocks(f"{index}. {_format_score(evaluation.get('score'))}", evaluation)
+    return details['user'], blocks
+
+def area_document(round_title: str, area: Dict[str, Any]) -> Document:
+    """Every feedback citing one improvement area, highest scores first"""
+
+    blocks = [('paragraph', f"**{round_title}** · {area['count']} citations")]
+    for index, feedback in enumerate(area['feedbacks'], 1):
+        blocks += [
+            ('heading', f"{index}. {feedback['user']} ({_format_score(feedback['score'])})"),
+            ('paragraph', f"**Date:** {_format_timestamp(feedback.get('timestamp'))}"),
+            ('link', feedback.get('source_url', 'No URL provided')),
+            ('quote', feedback.get('feedback', 'No feedback provided'))
+        ]
+    return area['area'], blocks
+
+def _render_evaluator(task: Tuple[str, Dict[str, Any], str]) -> str:
+    round_title, details, base_path = task
+    _write_document(evaluator_document(round_title, details), base_path)
+    return base_path
+
+def _render_area(task: Tuple[str, Dict[str, Any], str]) -> str:
+    round_title, area, base_path = task
+    _write_document(area_document(round_title, area), base_path)
+    return base_path
+
+def overview_document(round_title: str, analyses: Dict[str, Any], evaluator_links: Dict[str, str],
+                      area_links: Dict[str, str], generated_at: str) -> Document:
+    """Team Summary of a round"""
+
+    def _evaluation_rows(evaluations):
+        return [{
+            'Score': _format_score(evaluation.get('evaluation_score')),
+            'Date': _format_timestamp(evaluation.get('timestamp')),
+            'Evaluator': evaluation.get('evaluator_email', 'Unknown'),
+            'Area': evaluation.get('improvement_area', 'Not specified'),
+            'Source': evaluation.get('source_url', 'No URL provided')
+        } for evaluation in evaluations]
+
+    blocks = [
+        ('paragraph', f"Generated {generated_at}"),
+        ('heading', "Overview"),
+        ('table', [
+            {'Metric': 'Total Evaluations', 'Value': analyses['total']},
+            {'Metric': 'Unique Evaluators', 'Value': len(analyses['user_statistics'])},
+            {'Metric': 'Average Score', 'Value': f"{analyses['average_score']}/10"},
+            {'Metric': 'Average Score (excl. Relevance)', 'Value': f"{analyses['filtered_average_score']}/10"}
+        ]),
+        ('heading', "Evaluators"),
+        ('table', [dict(row, **{LINK_COLUMN: evaluator_links.get(row['User'], '')}) for row in analyses['user_statistics']]),
+        ('heading', "Improvement Areas"),
+        ('table', [dict(row, **{LINK_COLUMN: area_links.get(row['Improvement Area'], '')}) for row in analyses['improvement_areas']]),
+        ('heading', "Top 10 Highest Scoring Evaluations"),
+        ('table', _evaluation_rows(analyses['top_scoring'])),
+        ('heading', "Top 10 Lowest Scoring Evaluations"),
+        ('table', _evaluation_rows(analyses['lowest_scoring']))
+    ]
+    return f"{round_title} - Team Summary", blocks
+
+# # # # # # # # # # #
+# Build
+# # # # # # # # # # #
+
+def compute_analyses(evaluations: List[Dict[str, Any]], stats: TeamSummaryStats) -> Dict[str, Any]:
+    """Compute every Team Summary analysis once, from the statistics accumulated while the evaluations streamed in"""
+
+    return {
+        'total': stats.total.result(),
+        'average_score': stats.average_score(),
+        'filtered_average_score': stats.filtered_average_score(),
+        'user_statistics': stats.user_statistics(),
+        'user_details': analyze_user_details(evaluations),
+        'improvement_areas': stats.improvement_areas(),
+        'improvement_areas_detailed': analyze_improvement_areas_detailed(evaluations),
+        'top_scoring': stats.top_scoring(),
+        'lowest_scoring': stats.lowest_scoring()
+    }
+
+def build_round_report(round_name: str, reports_dir: str = REPORTS_DIR, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Build the reports of one round and atomically replace the previous ones. Returns the manifest."""
+
+    round_title, evaluations_collection, case_studies_collection = ROUNDS[round_name]
+    generated_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+
+    # Accumulate the statistics of the live Team Summary in the same pass
+    stats = TeamSummaryStats()
+    evaluations = []
+    for batch in iter_evaluation_batches(evaluations_collection):
+        evaluations.extend(batch)
+        stats.add(batch)
+    join_case_studies(evaluations, load_case_studies(case_studies_collection))
+    analyses = compute_analyses(evaluations, stats)
+    # The per-document analyses hold everything the documents need
+    del evaluations
+
+    output_dir = os.path.join(reports_dir, round_name)
+    build_dir = f"{output_dir}.building-{os.getpid()}"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(os.path.join(build_dir, "evaluators"))
+    os.makedirs(os.path.join(build_dir, "areas"))
+
+    evaluator_links = {}
+    evaluator_tasks = []
+    used = set()
+    for details in analyses['user_details']:
+        name = _unique_slug(details['user'], used)
+        evaluator_links[details['user']] = f"evaluators/{name}.html"
+        # The case study bodies are not rendered: keep them out of the worker payloads
+        details = dict(details, evaluations=[
+            {key: value for key, value in evaluation.items() if key != 'case_study_final'}
+            for evaluation in details['evaluations']
+        ])
+        evaluator_tasks.append((round_title, details, os.path.join(build_dir, "evaluators", name)))
+
+    area_links = {}
+    area_tasks = []
+    used = set()
+    for area in analyses['improvement_areas_detailed']:
+        name = _unique_slug(area['area'], used)
+        area_links[area['area']] = f"areas/{name}.html"
+        area_tasks.append((round_title, area, os.path.join(build_dir, "areas", name)))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rendered = list(executor.map(_render_evaluator, evaluator_tasks, chunksize=4))
+        rendered += list(executor.map(_render_area, area_tasks))
+
+    _write_document(
+        overview_document(round_title, analyses, evaluator_links, area_links, generated_at),
+        os.path.join(build_dir, "index")
+    )
+
+    manifest = {
+        'round': round_name,
+        'title': round_title,
+        'generated_at': generated_at,
+        'evaluations': analyses['total'],
+        'average_score': analyses['average_score'],
+        'evaluators': evaluator_links,
+        'areas': area_links
+    }
+    with open(os.path.join(build_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the new reports in place of the previous ones
+    previous_dir = f"{output_dir}.previous-{os.getpid()}"
+    if os.path.exists(output_dir):
+        os.replace(output_dir, previous_dir)
+    os.replace(build_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+    logger.info(f"Built {round_name} report: {len(rendered)} documents in {output_dir}")
+    return manifest
+
+def load_report(round_name: str, reports_dir: str = REPORTS_DIR) -> Optional[Dict[str, Any]]:
+    """Return the manifest of the latest report of a round, with its overview, or None"""
+
+    output_dir = os.path.join(reports_dir, round_name)
+    try:
+        with open(os.path.join(output_dir, "manifest.json"), 'r') as f:
+            manifest = json.load(f)
+        with open(os.path.join(output_dir, "index.md"), 'r', encoding='utf-8') as f:
+            manifest['markdown'] = f.read()
+        with open(os.path.join(output_dir, "index.html"), 'r', encoding='utf-8') as f:
+            manifest['html'] = f.read()
+        return manifest
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error loading {round_name} report: {str(e)}")
+        return None
+
+@instrumented_fragment
+def display_published_report(round_name: str):
+    """Show the latest static report of a round, if one was built (a fragment: downloading only reruns it)"""
+
+    report = load_report(round_name)
+    if report is None:
+        return
+
+    with st.expander(f"📄 Published Report (generated {report['generated_at']})"):
+        st.download_button(
+            "Download HTML Report",
+            data=report['html'],
+            file_name=f"team_summary_{round_name}.html",
+            mime="text/html",
+            key=f"report_{round_name}_download"
+        )
+        st.markdown(report['markdown'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the Team Summary reports of each evaluation round")
+    parser.add_argument("--rounds", default=",".join(ROUNDS), help="Comma-separated rounds to build")
+    parser.add_argument("--output", default=REPORTS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Number of rendering processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for round_name in [name for name in args.rounds.split(",") if name]:
+        build_round_report(round_name, args.output, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Full-text search index for the Case Study Evaluation Hub.
+In-process inverted index with BM25 ranking over case study content.
+"""
+
+import hashlib
+import heapq
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where search indexes are persisted
+SEARCH_INDEX_DIR = "cache/search_index"
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Number of words shown around the best match in a result snippet
+SNIPPET_WORDS = 40
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that
+the their theirs them themselves then there these they this those through to too under until up very was
+we were what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased index terms, dropping stopwords and single characters"""
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+def _summary_text(summary: Any) -> str:
+    """Flatten a structured case study summary into plain text"""
+
+    if not isinstance(summary, dict):
+        return ""
+
+    parts = [summary.get('title') or "", summary.get('introduction') or ""]
+    for section in summary.get('sections') or []:
+        if not isinstance(section, dict):
+            continue
+        parts.append(section.get('section_title') or "")
+        parts.append(section.get('section_introduction') or "")
+        parts.extend(str(point) for point in section.get('section_content') or [] if point)
+
+    return "\n".join(part for part in parts if part)
+
+def case_study_search_text(case_study: Dict[str, Any]) -> str:
+    """Return the searchable text of a case study: its final body and its structured summary"""
+
+    parts = []
+    if isinstance(case_study.get('case_study_final'), str):
+        parts.append(case_study['case_study_final'])
+    parts.append(_summary_text(case_study.get('case_study_summary')))
+    return "\n\n".join(part for part in parts if part)
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking.
+    Documents are keyed by an arbitrary string (e.g. "collection/doc_id") and can be
+    added, replaced and removed one at a time, so the index is built incrementally.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = {}          # term -> {doc number: term frequency}
+        self.doc_numbers = {}       # doc key -> doc number
+        self.doc_keys = {}          # doc number -> doc key
+        self.doc_lengths = {}       # doc number -> number of terms
+        self.doc_fingerprints = {}  # doc number -> hash of the indexed text
+        self.doc_texts = {}         # doc number -> compressed text, used for snippets
+        self.doc_metadata = {}      # doc number -> metadata returned with results
+        self.total_length = 0
+        self._next_doc_number = 0
+
+    def __len__(self):
+        return len(self.doc_numbers)
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def is_current(self, doc_key: str, text: str) -> bool:
+        """Check whether a document is already indexed with the same text"""
+        doc_number = self.doc_numbers.get(doc_key)
+        return doc_number is not None and self.doc_fingerprints.get(doc_number) == self.fingerprint(text)
+
+    def add_document(self, doc_key: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Add or replace a document in the index.
+        Returns False if the document was already indexed with the same text.
+        """
+        with self._lock:
+            fingerprint = self.fingerprint(text)
+            doc_number = self.doc_numbers.get(doc_key)
+            if doc_number is not None:
+                if self.doc_fingerprints.get(doc_number) == fingerprint:
+                    self.doc_metadata[doc_number] = metadata or {}
+                    return False
+                self.remove_document(doc_key)
+
+            doc_number = self._next_doc_number
+            self._next_doc_number += 1
+
+            terms = tokenize(text)
+            frequencies = {}
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[doc_number] = frequency
+
+            self.doc_numbers[doc_key] = doc_number
+            self.doc_keys[doc_number] = doc_key
+            self.doc_lengths[doc_number] = len(terms)
+            self.doc_fingerprints[doc_number] = fingerprint
+            self.doc_texts[doc_number] = zlib.compress(text.encode('utf-8'))
+            self.doc_metadata[doc_number] = metadata or {}
+            self.total_length += len(terms)
+            return True
+
+    def remove_document(self, doc_key: str) -> bool:
+        """Remove a document from the index. Returns False if it was not indexed."""
+        with self._lock:
+            doc_number = self.doc_numbers.pop(doc_key, None)
+            if doc_number is None:
+                return False
+
+            for term in set(tokenize(self._text(doc_number))):
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(doc_number, None)
+                if not postings:
+                    del self.postings[term]
+
+            self.total_length -= self.doc_lengths.pop(doc_number, 0)
+            self.doc_keys.pop(doc_number, None)
+            self.doc_fingerprints.pop(doc_number, None)
+            self.doc_texts.pop(doc_number, None)
+            self.doc_metadata.pop(doc_number, None)
+            return True
+
+    def remove_missing(self, prefix: str, seen_keys: Iterable[str]) -> int:
+        """Remove the documents whose key starts with prefix and is not in seen_keys. Returns how many were removed."""
+        seen_keys = set(seen_keys)
+        with self._lock:
+            missing = [key for key in self.doc_numbers if key.startswith(prefix) and key not in seen_keys]
+            for doc_key in missing:
+                self.remove_document(doc_key)
+            return len(missing)
+
+    def _text(self, doc_number: int) -> str:
+        compressed = self.doc_texts.get(doc_number)
+        return zlib.decompress(compressed).decode('utf-8') if compressed else ""
+
+    def search(self, query: str, limit: int = 20, with_snippets: bool = True) -> List[Dict[str, Any]]:
+        """
+        Rank documents against the query with BM25.
+        Returns a list of results with key, score, metadata and a highlighted snippet.
+        """
+        with self._lock:
+            query_terms = set(tokenize(query))
+            doc_count = len(self.doc_numbers)
+            if not query_terms or not doc_count:
+                return []
+
+            average_length = self.total_length / doc_count if doc_count else 0
+            scores = {}
+            for term in query_terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_number, frequency in postings.items():
+                    length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_number] / average_length
+                    score = idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                    scores[doc_number] = scores.get(doc_number, 0.0) + score
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+            results = []
+            for doc_number, score in top:
+                results.append({
+                    'key': self.doc_keys[doc_number],
+                    'score': round(score, 3),
+                    'metadata': self.doc_metadata.get(doc_number, {}),
+                    'snippet': highlight(self._text(doc_number), query_terms) if with_snippets else ""
+                })
+            return results
+
+    def save(self, path: str):
+        """Persist the index to disk atomically"""
+        with self._lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            state = {key: value for key, value in self.__dict__.items() if key != '_lock'}
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        """Load an index from disk, or return an empty index if none can be read"""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, 'rb') as f:
+                index.__dict__.update(pickle.load(f))
+        except Exception as e:
+            logger.error(f"Error loading search index from {path}: {str(e)}")
+            return cls()
+        return index
+
+def highlight(text: str, query_terms: Iterable[str], window: int = SNIPPET_WORDS) -> str:
+    """Return a markdown snippet of the text around the densest group of query terms, with matches in bold"""
+
+    query_terms = set(query_terms)
+    words = text.split()
+    if not words:
+        return ""
+
+    matches = [
+        position for position, word in enumerate(words)
+        if any(token in query_terms for token in _TOKEN_PATTERN.findall(word.lower()))
+    ]
+
+    # Pick the window that contains the most matches
+    start = 0
+    if matches:
+        best_count = 0
+        right = 0
+        for left in range(len(matches)):
+            while right < len(matches) and matches[right] - matches[left] < window:
+                right += 1
+            if right - left > best_count:
+                best_count = right - left
+                start = max(0, matches[left] - window // 4)
+
+    snippet_words = []
+    for word in words[start:start + window]:
+        if any(token in query_terms for token in _TOKEN_PATTERN.findall(word.lower())):
+            snippet_words.append(f"**{word.strip('*')}**")
+        else:
+            snippet_words.append(word)
+
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + window < len(words) else ""
+    return f"{prefix}{' '.join(snippet_words)}{suffix}"
+
+def index_path(name: str) -> str:
+    """Return the file path of a persisted index"""
+    return os.path.join(SEARCH_INDEX_DIR, f"{name}.pkl")
+
+def update_index_from_collection(index: SearchIndex, db, collection_name: str) -> Dict[str, int]:
+    """
+    Stream a case study collection into the index.
+    Only new or changed documents are (re)indexed and documents deleted from the collection are removed.
+    Returns counts of added, unchanged and removed documents.
+    """
+
+    stats = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+    seen_keys = set()
+
+    for doc in db.collection(collection_name).stream():
+        try:
+            data = doc.to_dict()
+            if not data:
+                continue
+
+            doc_key = f"{collection_name}/{doc.id}"
+            seen_keys.add(doc_key)
+
+            text = case_study_search_text(data)
+            if not text:
+                continue
+
+            metadata = {
+                'collection': collection_name,
+                'id': doc.id,
+                'source_url': data.get('source_url', 'No URL available'),
+                'updated_at': str(data.get('updated_at', 'N/A'))
+            }
+            if index.add_document(doc_key, text, metadata):
+                stats['indexed'] += 1
+            else:
+                stats['unchanged'] += 1
+
+        except Exception as e:
+            logger.error(f"Error indexing case study {doc.id}: {str(e)}")
+            continue
+
+    # Remove documents that no longer exist in the collection (the index may be searched meanwhile)
+    stats['removed'] = index.remove_missing(f"{collection_name}/", seen_keys)
+
+    logger.info(f"Search index updated from {collection_name}: {stats}")
+    return stats